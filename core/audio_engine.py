@@ -0,0 +1,371 @@
+import bisect
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+def to_float32(audio: np.ndarray) -> np.ndarray:
+    """合成結果（int16 または float）を -1.0〜1.0 の float32 にする"""
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    return audio.astype(np.float32, copy=False)
+
+
+def resample(audio: np.ndarray, sr: int, target_sr: int) -> np.ndarray:
+    """線形補間でサンプルレートを揃える"""
+    if sr == target_sr or len(audio) == 0:
+        return audio
+    n = int(round(len(audio) * target_sr / sr))
+    return np.interp(np.linspace(0, len(audio) - 1, n), np.arange(len(audio)), audio).astype(np.float32)
+
+
+class RingBuffer:
+    """1対1（書き込み1スレッド・読み出し1スレッド）のリングバッファ
+
+    書き込み位置は書き込み側だけ、読み出し位置は読み出し側だけが進めるので、ロックが要らない。
+    位置は通算フレーム数で持つ（満杯と空を区別するため）。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=np.float32)
+        self._read = 0
+        self._write = 0
+
+    def available(self) -> int:
+        return self._write - self._read
+
+    def space(self) -> int:
+        return self.capacity - self.available()
+
+    def write(self, data: np.ndarray) -> int:
+        n = min(len(data), self.space())
+        if n <= 0:
+            return 0
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = data[:first]
+        self._buf[:n - first] = data[first:n]
+        self._write += n
+        return n
+
+    def read(self, out: np.ndarray) -> int:
+        n = min(len(out), self.available())
+        if n <= 0:
+            return 0
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start:start + first]
+        out[first:n] = self._buf[:n - first]
+        self._read += n
+        return n
+
+    def discard(self):
+        """読み出し側から、溜まっている分を捨てる"""
+        self._read = self._write
+
+
+class SoundDeviceSink:
+    """sounddevice の OutputStream（起動したら閉じるまで開きっぱなし）"""
+
+    def __init__(self, samplerate: int, blocksize: int, latency):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.latency = latency
+        self.stream = None
+
+    def start(self, callback):
+        import sounddevice as sd
+        self.stream = sd.OutputStream(
+            samplerate=self.samplerate, blocksize=self.blocksize, latency=self.latency,
+            channels=1, dtype='float32', callback=callback,
+        )
+        self.stream.start()
+
+    def output_latency(self) -> float:
+        return float(self.stream.latency) if self.stream is not None else 0.0
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+class NullSink:
+    """音を出さない出力先（デバイスの無い環境やテスト用）
+
+    realtime=True なら実時間の速さで、False なら待たずにコールバックを呼び続ける。
+    """
+
+    def __init__(self, samplerate: int, blocksize: int, realtime: bool = True):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.realtime = realtime
+        self._running = False
+        self._thread = None
+
+    def start(self, callback):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(callback,), name="null-sink", daemon=True)
+        self._thread.start()
+
+    def _run(self, callback):
+        out = np.zeros((self.blocksize, 1), dtype=np.float32)
+        period = self.blocksize / self.samplerate
+        next_time = time.perf_counter()
+        while self._running:
+            callback(out, self.blocksize, None, None)
+            self.consume(out[:, 0])
+            if self.realtime:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                time.sleep(0)
+
+    def consume(self, block: np.ndarray):
+        pass
+
+    def output_latency(self) -> float:
+        return 0.0
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+class FileSink(NullSink):
+    """出力をWAVファイルに書き出す（再生内容の確認用）"""
+
+    def __init__(self, path: str, samplerate: int, blocksize: int, realtime: bool = False):
+        super().__init__(samplerate, blocksize, realtime)
+        self.path = path
+        self._file = None
+
+    def start(self, callback):
+        import soundfile as sf
+        self._file = sf.SoundFile(self.path, 'w', samplerate=self.samplerate, channels=1, format='WAV')
+        super().start(callback)
+
+    def consume(self, block: np.ndarray):
+        self._file.write(block)
+
+    def stop(self):
+        super().stop()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class AudioEngine:
+    """開きっぱなしの出力ストリームで再生する音声エンジン
+
+    再生する音声はタイムライン（区間のリスト）に積み、供給スレッドがリングバッファへ先読みする。
+    出力コールバックはリングバッファから読むだけなので、区間の継ぎ目で途切れない。
+    タイムラインを残しておくので、再生位置の移動（seek）もできる。
+    ただし再生位置より seek_back_seconds 以上前に終わった区間は捨てる（長い連続再生でメモリが増え続けないように）。
+    """
+
+    def __init__(self, samplerate: int = 44100, blocksize: int = 512, latency='low',
+                 buffer_seconds: float = 1.0, sink=None, seek_back_seconds: float = 60.0):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.latency = latency
+        self.buffer_seconds = buffer_seconds
+        self.seek_back_seconds = seek_back_seconds
+        self._sink = sink
+        self._started = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+        self._segments: List[np.ndarray] = []
+        self._starts: List[int] = []  # 各区間のタイムライン上の開始フレーム
+        self._end = 0                 # タイムラインの長さ（フレーム）
+        self._first = 0               # 残っている最初の区間の開始フレーム（これより前には戻れない）
+        self._write_frame = 0         # 次にリングバッファへ送るタイムライン上の位置
+        self._base_frame = 0          # リングバッファ先頭のタイムライン上の位置
+        self._played = 0              # _base_frame から出力したフレーム数（コールバックだけが更新）
+        self._generation = 0          # stop/seek のたびに進める
+        self._flushed_generation = 0  # コールバックがバッファを捨て終えた世代
+        self._ring = RingBuffer(int(samplerate * buffer_seconds))
+
+        self.underruns = 0
+        self.blocks = 0
+        self._feeder = None
+        self._running = False
+
+    # ---------- ストリーム ----------
+    def start(self):
+        """出力ストリームと供給スレッドを開始（開けなければ NullSink で動かす）"""
+        if self._started:
+            return
+        if self._sink is None:
+            self._sink = SoundDeviceSink(self.samplerate, self.blocksize, self.latency)
+        try:
+            self._sink.start(self._callback)
+        except Exception as e:
+            print(f"音声出力の初期化エラー: {e}")
+            self._sink = NullSink(self.samplerate, self.blocksize)
+            self._sink.start(self._callback)
+        self._running = True
+        self._feeder = threading.Thread(target=self._feed_loop, name="audio-feeder", daemon=True)
+        self._feeder.start()
+        self._started = True
+
+    def configure(self, blocksize: Optional[int] = None, latency=None):
+        """ブロックサイズとレイテンシを変えてストリームを開き直す"""
+        if blocksize is not None:
+            self.blocksize = blocksize
+        if latency is not None:
+            self.latency = latency
+        if self._started and isinstance(self._sink, SoundDeviceSink):
+            self._sink.stop()
+            self._sink = SoundDeviceSink(self.samplerate, self.blocksize, self.latency)
+            self._sink.start(self._callback)
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        if self._feeder is not None:
+            self._feeder.join(timeout=1.0)
+            self._feeder = None
+        if self._sink is not None and self._started:
+            self._sink.stop()
+        self._started = False
+
+    # ---------- 再生操作 ----------
+    def enqueue(self, audio: np.ndarray, sr: Optional[int] = None) -> float:
+        """タイムラインの末尾に区間を追加（前の区間と隙間なく続く）。区間の開始時刻（秒）を返す"""
+        self.start()
+        data = resample(to_float32(audio), sr or self.samplerate, self.samplerate)
+        with self._lock:
+            self._trim()
+            start = self._end
+            self._segments.append(data)
+            self._starts.append(start)
+            self._end += len(data)
+        self._wake.set()
+        return start / self.samplerate
+
+    def play(self, audio: np.ndarray, sr: Optional[int] = None) -> float:
+        """再生中のものを止めて、すぐに再生"""
+        self.stop()
+        return self.enqueue(audio, sr)
+
+    def stop(self):
+        """再生を止めてタイムラインを空にする"""
+        with self._lock:
+            self._segments = []
+            self._starts = []
+            self._end = 0
+            self._first = 0
+            self._reset_to(0)
+
+    def seek(self, seconds: float):
+        """タイムライン上の位置に移動（捨てた区間より前は、残っている最初の区間の先頭になる）"""
+        with self._lock:
+            self._reset_to(min(max(int(seconds * self.samplerate), self._first), self._end))
+
+    def _trim(self):
+        """再生位置より seek_back_seconds 以上前に終わった区間を捨てる（ロックを持って呼ぶ）"""
+        if self._flushed_generation != self._generation:
+            return  # stop/seek の直後は再生位置が定まっていない
+        horizon = min(self._base_frame + self._played, self._write_frame) \
+            - int(self.seek_back_seconds * self.samplerate)
+        drop = 0
+        while drop < len(self._segments) and self._starts[drop] + len(self._segments[drop]) <= horizon:
+            drop += 1
+        if drop:
+            del self._segments[:drop]
+            del self._starts[:drop]
+            self._first = self._starts[0] if self._starts else self._end
+
+    def _reset_to(self, frame: int):
+        # リングバッファの中身はコールバック側で捨てる（読み出し位置はコールバックのもの）
+        self._generation += 1
+        self._write_frame = frame
+        self._base_frame = frame
+        self._wake.set()
+
+    # ---------- 状態 ----------
+    def position(self) -> float:
+        """再生位置（秒）。出力レイテンシ分を差し引いた、実際に聞こえている位置"""
+        if self._flushed_generation != self._generation:
+            frames = self._base_frame
+        else:
+            frames = self._base_frame + self._played
+        latency = self._sink.output_latency() if self._sink is not None else 0.0
+        return max(frames / self.samplerate - latency, 0.0)
+
+    def duration(self) -> float:
+        return self._end / self.samplerate
+
+    def retained_seconds(self) -> float:
+        """タイムラインに残っている音声の長さ（秒）"""
+        with self._lock:
+            return (self._end - self._first) / self.samplerate
+
+    def is_playing(self) -> bool:
+        return self._write_frame < self._end or self._ring.available() > 0
+
+    def segment_starts(self) -> List[float]:
+        with self._lock:
+            return [s / self.samplerate for s in self._starts]
+
+    def stats(self) -> dict:
+        return {
+            'underruns': self.underruns,
+            'blocks': self.blocks,
+            'buffered': self._ring.available() / self.samplerate,
+            'blocksize': self.blocksize,
+            'latency': self._sink.output_latency() if self._sink is not None else 0.0,
+            'retained': (self._end - self._first) / self.samplerate,
+        }
+
+    # ---------- スレッド ----------
+    def _callback(self, outdata, frames, time_info, status):
+        """出力コールバック（リングバッファから読むだけ。ロックも確保もしない）"""
+        out = outdata[:, 0]
+        generation = self._generation
+        if generation != self._flushed_generation:
+            self._ring.discard()
+            self._played = 0
+            self._flushed_generation = generation
+        if status is not None and getattr(status, 'output_underflow', False):
+            self.underruns += 1
+        n = self._ring.read(out)
+        if n < frames:
+            out[n:] = 0.0
+            # 再生すべき音が残っているのに供給が間に合わなかった
+            if self._write_frame < self._end:
+                self.underruns += 1
+        self._played += n
+        self.blocks += 1
+
+    def _feed_loop(self):
+        """タイムラインからリングバッファへ先読みする供給スレッド"""
+        chunk = max(self.blocksize * 4, 2048)
+        while self._running:
+            wrote = 0
+            with self._lock:
+                self._trim()
+                # stop/seek の後、コールバックが古い中身を捨てるまでは書かない
+                if self._flushed_generation == self._generation and self._write_frame < self._end:
+                    space = self._ring.space()
+                    if space > 0:
+                        i = bisect.bisect_right(self._starts, self._write_frame) - 1
+                        segment = self._segments[i]
+                        offset = self._write_frame - self._starts[i]
+                        piece = segment[offset:offset + min(space, chunk)]
+                        wrote = self._ring.write(piece)
+                        self._write_frame += wrote
+            if not wrote:
+                self._wake.wait(timeout=self.blocksize / self.samplerate)
+                self._wake.clear()
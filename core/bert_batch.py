@@ -0,0 +1,201 @@
+import time
+from typing import Dict, List, Optional, Sequence
+
+import torch
+
+# 1回の forward に載せるトークン数の上限（行数 × パディング後の長さ）
+DEFAULT_MAX_TOKENS = 4096
+
+
+class BatchBertExtractor:
+    """複数行の BERT 特徴量をまとめて計算し、BertFeatureCache に入れる
+
+    infer の中では1行ずつ deberta を通すが、長さの近い行をまとめてパディングすれば
+    1回の forward で何行分も計算できる。行を（SBV2 と同じ前処理後の）文字数で並べ替え、
+    トークン数が max_tokens に収まるだけ束ねて、束ごとに1回 forward する。
+    各行の特徴量は extract_bert_feature と同じく hidden_states[-3] を word2ph で音素に広げたもので、
+    キーも get_text と同じ（add_blank 後の word2ph）なので、後の infer はキャッシュに当たる。
+    パディングした束の出力は1行ずつの出力と丸め誤差の分だけ違うことがあり、そのままキャッシュに入れると
+    同じ合成キーでも BERT の経路によって音声が変わってしまう。そこで束ごとに、一番パディングの多い行と
+    一番長い行を1行だけで（infer と同じ形で）計算し直し、キャッシュに入れる fp16 の値の差が
+    tolerance 以下か確かめる。超えた束は捨てて1行ずつ計算し直し、以後の束も1行ずつにする
+    （差の最大値は stats['check_diff']）。tolerance=0 なら束ねてもキャッシュの値は1行ずつと同じになる。
+    """
+
+    def __init__(self, bert_cache, device: str = "cpu", max_tokens: int = DEFAULT_MAX_TOKENS,
+                 tolerance: float = 0.0):
+        self.bert_cache = bert_cache
+        self.device = device
+        self.max_tokens = max(1, max_tokens)
+        self.tolerance = tolerance
+        self.stats = {'rows': 0, 'cached': 0, 'extracted': 0, 'batches': 0, 'fallback': 0,
+                      'tokens': 0, 'padded_tokens': 0, 'forward_time': 0.0,
+                      'checks': 0, 'mismatches': 0, 'check_diff': 0.0}
+
+    # ---------- 行の準備 ----------
+    @staticmethod
+    def prepare(texts: Sequence[str], hps) -> List[tuple]:
+        """行ごとに (キー用の正規化テキスト, word2ph) を作る（clean_text はフロントエンドキャッシュを通る）
+
+        get_text と同じく、複数行のテキストは改行で分け、add_blank なら word2ph を2倍して先頭に1を足す。
+        """
+        from style_bert_vits2.models import infer as sbv2_infer
+        from style_bert_vits2.constants import Languages
+
+        use_jp_extra = str(getattr(hps, "version", "")).endswith("JP-Extra")
+        add_blank = getattr(getattr(hps, "data", None), "add_blank", True)
+        rows = []
+        for text in texts:
+            for line in text.split("\n"):
+                if not line.strip():
+                    continue
+                norm_text, _, _, word2ph = sbv2_infer.clean_text(line, Languages.JP, use_jp_extra=use_jp_extra)
+                word2ph = list(word2ph)
+                if add_blank:
+                    word2ph = [n * 2 for n in word2ph]
+                    word2ph[0] += 1
+                rows.append((norm_text, word2ph))
+        return rows
+
+    def plan(self, lengths: Sequence[int]) -> List[List[int]]:
+        """長さ順に並べ、パディング後のトークン数が max_tokens に収まるように束ねる"""
+        batches, batch, width = [], [], 0
+        for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            new_width = max(width, lengths[i])
+            if batch and new_width * (len(batch) + 1) > self.max_tokens:
+                batches.append(batch)
+                batch, new_width = [], lengths[i]
+            batch.append(i)
+            width = new_width
+        if batch:
+            batches.append(batch)
+        return batches
+
+    # ---------- 計算 ----------
+    def extract(self, rows: Sequence[tuple]) -> int:
+        """(正規化テキスト, word2ph) の並びの特徴量を計算してキャッシュに入れ、計算した行数を返す"""
+        from style_bert_vits2.nlp import bert_models
+        from style_bert_vits2.nlp.japanese.g2p import text_to_sep_kata
+        from style_bert_vits2.constants import Languages
+
+        pending, seen = [], set()
+        for norm_text, word2ph in rows:
+            key = self.bert_cache.make_key(norm_text, word2ph, Languages.JP)
+            self.stats['rows'] += 1
+            if key in seen or key in self.bert_cache:
+                self.stats['cached'] += 1
+                continue
+            seen.add(key)
+            # extract_bert_feature と同じく、BERT には単語に区切り直したテキストを通す
+            bert_text = "".join(text_to_sep_kata(norm_text, raise_yomi_error=False)[0])
+            pending.append((key, bert_text, word2ph))
+        if not pending:
+            return 0
+
+        device = self.device
+        if device == "cuda" and not torch.cuda.is_available():
+            device = "cpu"
+        model = bert_models.load_model(Languages.JP)
+        if hasattr(bert_models, "transfer_model"):
+            bert_models.transfer_model(Languages.JP, device)
+        tokenizer = bert_models.load_tokenizer(Languages.JP)
+
+        def forward(texts):
+            start = time.perf_counter()
+            with torch.no_grad():
+                inputs = tokenizer(texts, return_tensors="pt", padding=True)
+                inputs = {name: tensor.to(device) for name, tensor in inputs.items()}
+                hidden = model(**inputs, output_hidden_states=True)["hidden_states"][-3].cpu()
+            lengths = inputs["attention_mask"].sum(dim=1).tolist()
+            self.stats['forward_time'] += time.perf_counter() - start
+            self.stats['batches'] += 1
+            self.stats['tokens'] += sum(lengths)
+            self.stats['padded_tokens'] += hidden.shape[0] * hidden.shape[1]
+            return hidden, lengths
+
+        def features_of(hidden, lengths, indices):
+            features = {}
+            for row, i in enumerate(indices):
+                word2ph = pending[i][2]
+                if lengths[row] != len(word2ph):
+                    # トークン化が1文字1トークンにならなかった行は infer に任せる
+                    continue
+                repeats = torch.tensor(word2ph, dtype=torch.long)
+                features[i] = hidden[row, :lengths[row]].repeat_interleave(repeats, dim=0).T
+            return features
+
+        extracted = 0
+        batches = self.plan([len(text) + 2 for _, text, _ in pending])
+        while batches:
+            batch = batches.pop(0)
+            features = features_of(*forward([pending[i][1] for i in batch]), batch)
+            self.stats['fallback'] += len(batch) - len(features)
+            if len(batch) > 1 and features:
+                singles = self._check(features, pending, lambda i: features_of(*forward([pending[i][1]]), [i]))
+                if singles is None:
+                    # 束ねた結果は使わず、この束から先は1行ずつ計算する
+                    batches = [[i] for i in batch] + [[i] for b in batches for i in b]
+                    continue
+                features.update(singles)
+            for i, feature in features.items():
+                self.bert_cache.put(pending[i][0], feature)
+                extracted += 1
+        self.stats['extracted'] += extracted
+        return extracted
+
+    def _check(self, features: Dict[int, torch.Tensor], pending: Sequence[tuple], single) -> Optional[Dict]:
+        """一番パディングの多い（短い）行と一番長い行を1行だけで計算し、束ねた結果とキャッシュ上の値（fp16）で比べる
+
+        差が tolerance 以下なら1行ずつの特徴量（そのままキャッシュに入れる）を、超えたら None を返す。
+        """
+        order = sorted(features, key=lambda i: len(pending[i][1]))
+        singles = {}
+        for i in {order[0], order[-1]}:
+            singles.update(single(i))
+            self.stats['checks'] += 1
+            batched = features[i].half().float()
+            alone = singles[i].half().float() if i in singles else None
+            diff = float((batched - alone).abs().max()) if alone is not None and batched.shape == alone.shape \
+                else float("inf")
+            self.stats['check_diff'] = max(self.stats['check_diff'], diff)
+            if diff > self.tolerance:
+                self.stats['mismatches'] += 1
+                return None
+        return singles
+
+    def warm(self, texts: Sequence[str], hps) -> int:
+        """台本の行をまとめて前処理し、BERT 特徴量をキャッシュに入れる"""
+        return self.extract(self.prepare(texts, hps))
+
+
+def benchmark_bert_batch(engine, texts: Sequence[str], max_tokens: Sequence[int] = (0, 1024, 4096, 16384)) -> Dict:
+    """同じ行の BERT 特徴量を、1行ずつ（max_tokens=0）と束ねた場合とで計算して行/秒を比べる
+
+    毎回 BERT キャッシュを空にしてから測る（g2p はフロントエンドキャッシュに当たるので、測るのは forward だけ）。
+    束ねた結果と1行ずつの結果の差（check_diff）も返す。
+    1000行程度の台本を渡すことを想定している。
+    """
+    hps = engine.model.hyper_parameters
+    device = engine.model_info.get('device', 'cpu')
+    rows = BatchBertExtractor.prepare(texts, hps)
+    results = {}
+    for budget in max_tokens:
+        engine.bert_cache.clear()
+        extractor = BatchBertExtractor(engine.bert_cache, device, max_tokens=budget or 1)
+        start = time.perf_counter()
+        extractor.extract(rows)
+        wall = time.perf_counter() - start
+        stats = extractor.stats
+        results[budget] = {
+            'wall_time': wall,
+            'rows_per_sec': len(rows) / wall if wall else 0.0,
+            'batches': stats['batches'],
+            'padding': 1 - stats['tokens'] / stats['padded_tokens'] if stats['padded_tokens'] else 0.0,
+            # 束ねた結果が1行ずつの結果と（fp16 で）一致したか。一致しなければ1行ずつに戻している
+            'matches_single': not stats['mismatches'],
+            'check_diff': stats['check_diff'],
+        }
+    base = results[max_tokens[0]]['wall_time']
+    for result in results.values():
+        result['speedup'] = base / result['wall_time'] if result['wall_time'] else 0.0
+    return results
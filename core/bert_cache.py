@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import torch
+
+
+class BertFeatureCache:
+    """テキストごとのBERT特徴量キャッシュ（fp16 で保持し、合計バイト数で上限管理）
+
+    BERT特徴量はテキストのみに依存するため、スタイル・話速・ピッチ・ノイズなどを
+    変えて同じ行を合成し直す場合は deberta の forward を丸ごと省略できる。
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, torch.Tensor]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(norm_text, word2ph, language, assist_text=None, assist_text_weight=0.7) -> tuple:
+        lang = getattr(language, "value", language)
+        weight = float(assist_text_weight) if assist_text else None
+        return (lang, norm_text, tuple(word2ph), assist_text or None, weight)
+
+    @staticmethod
+    def _nbytes(tensor: torch.Tensor) -> int:
+        return tensor.numel() * tensor.element_size()
+
+    def get(self, key) -> Optional[torch.Tensor]:
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return stored.float()
+
+    def __contains__(self, key) -> bool:
+        """ヒット率に数えずに有無だけを調べる（まとめて計算する前の確認用）"""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, feature: torch.Tensor) -> torch.Tensor:
+        """特徴量を fp16 で格納し、格納後の値（float32）を返す
+
+        ヒット時と未ヒット時で同じ値を返すため、呼び出し側は戻り値を使うこと。
+        """
+        stored = feature.detach().to("cpu", dtype=torch.float16).contiguous()
+        size = self._nbytes(stored)
+        if size <= self.max_bytes:
+            with self._lock:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= self._nbytes(old)
+                self._entries[key] = stored
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= self._nbytes(evicted)
+        return stored.float()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,277 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .job_scheduler import LengthBucketScheduler
+from .synthesis_pipeline import SynthesisPipeline
+
+
+class _Slot:
+    """プール内のエンジンと、それを使っている（貸し出し中の）数"""
+
+    __slots__ = ('engine', 'size', 'users')
+
+    def __init__(self, engine, size: int):
+        self.engine = engine
+        self.size = size
+        self.users = 0
+
+
+class EnginePool:
+    """モデルIDごとに読み込んだ TTSEngine を持つプール
+
+    基準エンジン（メインウィンドウで読み込んだモデル）は常に残し、それ以外は
+    重みファイルのサイズの合計が memory_budget を超えないよう、古いものから解放する。
+    合成に使う間は lease() で借りる。借りられているエンジンは解放しない（予算を一時的に超えたら、
+    返されたときに解放する）。
+    モデルの読み込みはプールのロックの外で行い、同じモデルを同時に求めた側はその読み込みを待つ。
+    """
+
+    def __init__(self, base_engine, model_manager, memory_budget: int = 4 * 1024 ** 3):
+        self.base_engine = base_engine
+        self.model_manager = model_manager
+        self.memory_budget = memory_budget
+        self._engines: "OrderedDict[str, _Slot]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}  # 読み込み中のモデルID -> 読み込みの完了
+        self._lock = threading.RLock()
+        self.stats = {'loads': 0, 'evictions': 0, 'hits': 0, 'deferred_evictions': 0}
+
+    def base_model_id(self) -> str:
+        return self.base_engine.get_model_info().get('model_id') or ""
+
+    def is_resident(self, model_id: str) -> bool:
+        with self._lock:
+            return not model_id or model_id == self.base_model_id() or model_id in self._engines
+
+    def _used_bytes(self) -> int:
+        used = sum(slot.size for slot in self._engines.values())
+        base_path = self.base_engine.get_model_info().get('local_model_path')
+        if base_path and os.path.exists(base_path):
+            used += os.path.getsize(base_path)
+        return used
+
+    def engines(self) -> List[object]:
+        """基準エンジンと読み込み済みのエンジンすべて"""
+        with self._lock:
+            return [self.base_engine] + [slot.engine for slot in self._engines.values()]
+
+    def peek(self, model_id: str):
+        """読み込み済みならそのエンジン、未読み込みなら None（読み込みはしない）"""
+        with self._lock:
+            if not model_id or model_id == self.base_model_id():
+                return self.base_engine
+            slot = self._engines.get(model_id)
+            return slot.engine if slot else None
+
+    @contextmanager
+    def lease(self, model_id: str, entry: Optional[Dict] = None):
+        """with の間だけエンジンを借りる（その間は解放されない）"""
+        engine = self._checkout(model_id, entry)
+        try:
+            yield engine
+        finally:
+            self._checkin(model_id, engine)
+
+    def acquire(self, model_id: str, entry: Optional[Dict] = None):
+        """モデルIDのエンジンを返す（未読み込みなら読み込む）。借りないので、合成には lease() を使う
+
+        entry（model_path / config_path / style_path）を渡すと、履歴を引かずにそのファイルから読み込む。
+        """
+        with self.lease(model_id, entry) as engine:
+            return engine
+
+    def _checkout(self, model_id: str, entry: Optional[Dict]):
+        if not model_id:
+            return self.base_engine
+        while True:
+            with self._lock:
+                if model_id == self.base_model_id():
+                    return self.base_engine
+                slot = self._engines.get(model_id)
+                if slot is not None:
+                    self._engines.move_to_end(model_id)
+                    slot.users += 1
+                    self.stats['hits'] += 1
+                    return slot.engine
+                loading = self._loading.get(model_id)
+                owner = loading is None
+                if owner:
+                    loading = self._loading[model_id] = Future()
+            if owner:
+                return self._load(model_id, entry, loading)
+            # 他のスレッドが読み込み中（失敗すればその例外が上がる）。終わったら借り直す
+            loading.result()
+
+    def _load(self, model_id: str, entry: Optional[Dict], loading: Future):
+        try:
+            entry = entry or self.model_manager.get_model_by_id(model_id)
+            if not entry:
+                raise RuntimeError(f"履歴にないモデルです: {model_id}")
+            size = os.path.getsize(entry['model_path']) if os.path.exists(entry['model_path']) else 0
+            with self._lock:
+                evicted = self._make_room(size)
+            self._unload(evicted)
+
+            engine = self.base_engine.spawn()
+            if not engine.load_model(entry['model_path'], entry['config_path'], entry['style_path'],
+                                     model_id=model_id):
+                raise RuntimeError(f"モデルの読み込みに失敗しました: {entry.get('name', model_id)}")
+        except BaseException as e:
+            with self._lock:
+                del self._loading[model_id]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            slot = self._engines[model_id] = _Slot(engine, size)
+            slot.users += 1
+            self.stats['loads'] += 1
+            del self._loading[model_id]
+        loading.set_result(engine)
+        return engine
+
+    def _checkin(self, model_id: str, engine):
+        if engine is self.base_engine:
+            return
+        with self._lock:
+            slot = self._engines.get(model_id)
+            if slot is None or slot.engine is not engine:
+                return
+            slot.users -= 1
+            # 借りられていて解放できなかった分を、ここで予算内に戻す
+            evicted = self._make_room(0) if slot.users == 0 else []
+        self._unload(evicted)
+
+    def _make_room(self, size: int) -> List[object]:
+        """予算に収まるまで、借りられていないエンジンを古い順にプールから外す（ロックを持って呼ぶ）
+
+        外したエンジンを返す。モデルの解放（unload_model）はロックの外で _unload する。
+        """
+        evicted = []
+        while self._used_bytes() + size > self.memory_budget:
+            idle = next((model_id for model_id, slot in self._engines.items() if slot.users == 0), None)
+            if idle is None:
+                if self._engines:
+                    self.stats['deferred_evictions'] += 1
+                break
+            evicted.append(self._engines.pop(idle).engine)
+            self.stats['evictions'] += 1
+        return evicted
+
+    @staticmethod
+    def _unload(engines):
+        for engine in engines:
+            engine.unload_model()
+
+    def release_all(self):
+        """借りられていないエンジンをすべて解放する"""
+        with self._lock:
+            idle = [model_id for model_id, slot in self._engines.items() if slot.users == 0]
+            evicted = [self._engines.pop(model_id).engine for model_id in idle]
+            self.stats['evictions'] += len(evicted)
+        self._unload(evicted)
+
+
+class ModelGroupedScheduler:
+    """行ごとにモデルが違う台本を、モデル単位にまとめて合成するスケジューラ
+
+    ジョブは (テキスト, パラメータ, モデルID) 。モデルIDが空なら基準エンジンで読む。
+    読み込み済みのモデルのグループから順に、1グループずつ LengthBucketScheduler で合成するので、
+    モデルの読み込みは1回の投入につき多くても使うモデルの数だけで済む。
+    結果は元の台本順の Future で返す。
+    executor を渡すと、合成はそこ（PriorityScheduler の一括の窓口など）で実行する。
+    pipeline_depth を 1 以上にすると、g2p・BERT を別スレッドで先に計算する SynthesisPipeline で合成する。
+    そのとき BERT 特徴量は bert_batch 行ずつまとめて計算する（1 で行ごと）。
+    """
+
+    def __init__(self, pool: EnginePool, workers: int = 2, executor=None, pipeline_depth: int = 0,
+                 bert_batch: int = 16):
+        self.pool = pool
+        self.workers = workers
+        self.executor = executor
+        self.pipeline_depth = pipeline_depth
+        self.bert_batch = bert_batch
+        self.last_pipeline_stats: Dict = {}
+        self.last_stats: Dict = {}
+
+    def group(self, jobs: Sequence[Tuple]) -> List[Tuple[str, List[int]]]:
+        """(モデルID, 行インデックスのリスト) を実行順に返す。読み込み済みのモデルが先"""
+        groups: "OrderedDict[str, List[int]]" = OrderedDict()
+        for i, job in enumerate(jobs):
+            model_id = job[2] if len(job) > 2 else ""
+            groups.setdefault(model_id or "", []).append(i)
+        return sorted(groups.items(), key=lambda item: not self.pool.is_resident(item[0]))
+
+    def submit(self, jobs: Sequence[Tuple], token=None) -> List[Future]:
+        """token（CancelToken）が取り消されると、まだ始まっていない行とモデルの読み込みを飛ばす"""
+        jobs = list(jobs)
+        futures = [Future() for _ in jobs]
+        groups = self.group(jobs)
+        loads_before = self.pool.stats['loads']
+        self.last_stats = {'jobs': len(jobs), 'groups': len(groups), 'loads': 0}
+
+        def drive():
+            for model_id, indices in groups:
+                pending = [i for i in indices if futures[i].set_running_or_notify_cancel()]
+                if not pending:
+                    continue
+                try:
+                    if token is not None:
+                        token.check()
+                    # グループを合成し終えるまで借りておく（その間に解放されないように）
+                    lease = self.pool.lease(model_id)
+                    engine = lease.__enter__()
+                except Exception as e:
+                    for i in pending:
+                        futures[i].set_exception(e)
+                    continue
+                scheduler = pipeline = None
+                try:
+                    scheduler = LengthBucketScheduler(engine.synthesize_cached, workers=self.workers,
+                                                      executor=self.executor)
+                    group_jobs = [(jobs[i][0], jobs[i][1]) for i in pending]
+                    if self.pipeline_depth > 0:
+                        # 長さバケット順のまま、前段（g2p・BERT）を depth 行先行させる
+                        pipeline = SynthesisPipeline(engine, acoustic_workers=self.workers,
+                                                     depth=self.pipeline_depth, executor=self.executor,
+                                                     bert_batch=self.bert_batch)
+                        inner = pipeline.submit(group_jobs, order=scheduler.plan(group_jobs), token=token)
+                    else:
+                        inner = scheduler.submit(group_jobs, token=token)
+                    # このグループが終わるまで次のモデルに進まない
+                    for i, future in zip(pending, inner):
+                        try:
+                            futures[i].set_result(future.result())
+                        except Exception as e:
+                            futures[i].set_exception(e)
+                except Exception as e:
+                    # 実行中にした Future を残すと map() が戻らないので、このグループの残りは失敗にして次へ
+                    for i in pending:
+                        if not futures[i].done():
+                            futures[i].set_exception(e)
+                    pipeline = None
+                finally:
+                    if scheduler is not None:
+                        scheduler.shutdown()
+                    lease.__exit__(None, None, None)
+                if pipeline is not None:
+                    self.last_pipeline_stats = pipeline.stats()
+                self.last_stats['loads'] = self.pool.stats['loads'] - loads_before
+
+        threading.Thread(target=drive, name="model-grouped-scheduler", daemon=True).start()
+        return futures
+
+    def map(self, jobs: Sequence[Tuple], token=None):
+        """結果を元の台本順に返す"""
+        futures = self.submit(jobs, token=token)
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self, wait: bool = False):
+        self.pool.release_all()
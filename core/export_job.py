@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .synthesis_cache import synthesis_key
+
+
+def output_filename(number: int, text: str, width: int = 2) -> str:
+    """個別保存のファイル名（番号_テキスト先頭20文字.wav）"""
+    safe_text = "".join(c for c in text[:20] if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    if not safe_text:
+        safe_text = f"text_{number}"
+    return f"{number:0{width}d}_{safe_text}.wav"
+
+
+def row_key(number: int, content_key: str) -> str:
+    """マニフェスト上の行キー（行番号＋合成キー）。内容が変われば別キーになる"""
+    return f"{number}:{content_key}"
+
+
+class ExportJob:
+    """個別保存の書き出しジョブ（再開可能）
+
+    書き出し済みの行は出力フォルダのマニフェスト（追記専用のJSONL）に1行ずつ記録する。
+    途中で落ちたりキャンセルしたりしても、同じ台本で再実行すれば済んだ行を飛ばして続きから書き出す。
+    ファイル名は行番号とテキストだけで決まるので、マニフェストはファイルごとに最後の記録だけを有効にする
+    （パラメータを変えて書き直したファイルを、前の内容の行として飛ばさないため）。
+    同じ (テキスト, パラメータ, モデル) の行は一度だけ合成し、2回目以降は書き出したファイルを複製する。
+    """
+
+    MANIFEST_NAME = "export_manifest.jsonl"
+
+    def __init__(self, output_dir: str, rows: Iterable[Dict], synthesize: Callable,
+                 model_id: Optional[str] = None, total: Optional[int] = None, scheduler=None):
+        self.output_dir = output_dir
+        self.rows = rows
+        self.synthesize = synthesize  # synthesize(text, **parameters) -> (sr, audio)
+        # スケジューラを渡すと、合成が必要な行を先にまとめて投入する（書き出しは台本順のまま）。
+        # 行ごとのモデル指定（row['model_id']）は ModelGroupedScheduler を渡したときだけ効く
+        self.scheduler = scheduler
+        self.model_id = model_id
+        self.total = total
+        self.manifest_path = os.path.join(output_dir, self.MANIFEST_NAME)
+        self.completed: Dict[str, str] = {}  # 行キー -> ファイル名
+        self._owners: Dict[str, str] = {}  # ファイル名 -> 今の中身の行キー
+        self._read_manifest()
+        # 合成キー -> この実行で書き出した（または済みと確かめた）ファイル名（重複行の複製元）。
+        # 前回のマニフェストのファイルは、この実行の前の行で書き直されているかもしれないので使わない
+        self.written: Dict[str, str] = {}
+        self.summary = {'total': 0, 'rendered': 0, 'deduplicated': 0, 'skipped': 0}
+
+    def _read_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 書き込み途中で落ちた行
+                    self._record(record['key'], record['file'])
+
+    def _record(self, key: Optional[str], filename: str):
+        """filename の中身を key の行にする（key=None は中身が不定）。同じファイルの前の行キーは外す"""
+        old = self._owners.pop(filename, None)
+        if old is not None:
+            self.completed.pop(old, None)
+        if key is not None:
+            self.completed[key] = filename
+            self._owners[filename] = key
+
+    def _checkpoint(self, key: Optional[str], filename: str):
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'file': filename}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._record(key, filename)
+
+    def _release(self, filename: str):
+        """別の行の中身が入っているファイルを書き直す前に、その記録を外す
+        （書き直しの途中で落ちても、古い行として飛ばさないように）"""
+        if filename in self._owners:
+            self._checkpoint(None, filename)
+
+    def is_done(self, key: str) -> bool:
+        filename = self.completed.get(key)
+        return filename is not None and os.path.exists(os.path.join(self.output_dir, filename))
+
+    def write_audio(self, filename: str, audio: np.ndarray, sr: int):
+        """一時ファイルに書いてから置き換える（途中で落ちても壊れたWAVを残さない）"""
+        import soundfile as sf
+        path = os.path.join(self.output_dir, filename)
+        tmp_path = path + ".part"
+        try:
+            sf.write(tmp_path, audio, sr, format='WAV')
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def copy_audio(self, source: str, filename: str):
+        """書き出し済みの同一内容ファイルを複製"""
+        path = os.path.join(self.output_dir, filename)
+        tmp_path = path + ".part"
+        try:
+            shutil.copyfile(os.path.join(self.output_dir, source), tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _content_key(self, row: Dict) -> str:
+        # 行ごとにモデルが指定されていればそれを、無ければジョブのモデルを使う
+        return synthesis_key(row['text'], row['parameters'], row.get('model_id') or self.model_id)
+
+    def _submit_pending(self, rows: List[Dict], token=None) -> Dict[int, Future]:
+        """合成が必要な行（未書き出しで、同じ内容の先行行が無いもの）をスケジューラに投入"""
+        numbers = []
+        seen = set()  # この実行で音声が手に入る合成キー（書き出し済みの行・投入した行）
+        for number, row in enumerate(rows, 1):
+            content_key = self._content_key(row)
+            if content_key in seen:
+                continue
+            seen.add(content_key)
+            if not self.is_done(row_key(number, content_key)):
+                numbers.append(number)
+        futures = self.scheduler.submit([
+            (rows[n - 1]['text'], rows[n - 1]['parameters'], rows[n - 1].get('model_id') or "") for n in numbers
+        ], token=token)
+        return dict(zip(numbers, futures))
+
+    def run(self, progress: Optional[Callable[[int, Optional[int], float], None]] = None, token=None) -> Dict:
+        """全行を書き出し、集計を返す
+
+        集計: total / rendered（合成した行）/ deduplicated（複製で済ませた行）/
+        skipped（前回までに書き出し済み）/ dedup_ratio（書き出した行のうち複製の割合）
+        progress(行番号, 総行数, 合成した音声の秒数) は1行ごとに呼ぶ（合成しなかった行は 0 秒）。
+        token（CancelToken）が取り消されると行と行の間で JobCancelled を投げて止まる。
+        書きかけのファイルは残らず、マニフェストに記録済みの行は次回の実行で飛ばされる。
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        width = max(2, len(str(self.total))) if self.total else 2
+        rows = self.rows
+        pending: Dict[int, Future] = {}
+        if self.scheduler is not None:
+            rows = list(rows)
+            pending = self._submit_pending(rows, token)
+        try:
+            self._run_rows(rows, width, pending, progress, token)
+        finally:
+            for future in pending.values():
+                future.cancel()
+        produced = self.summary['rendered'] + self.summary['deduplicated']
+        self.summary['dedup_ratio'] = self.summary['deduplicated'] / produced if produced else 0.0
+        return dict(self.summary)
+
+    def _run_rows(self, rows: Iterable[Dict], width: int, pending: Dict[int, Future], progress, token):
+        for number, row in enumerate(rows, 1):
+            if token is not None:
+                token.check()
+            seconds = 0.0
+            text = row['text']
+            parameters = row['parameters']
+            content_key = self._content_key(row)
+            key = row_key(number, content_key)
+            self.summary['total'] += 1
+            if self.is_done(key):
+                self.summary['skipped'] += 1
+                # 中身が今の行と一致するファイルなので、後の重複行の複製元に使える
+                self.written.setdefault(content_key, self.completed[key])
+            else:
+                filename = output_filename(number, text, width)
+                self._release(filename)
+                source = self.written.get(content_key)
+                if source and os.path.exists(os.path.join(self.output_dir, source)):
+                    self.copy_audio(source, filename)
+                    self.summary['deduplicated'] += 1
+                else:
+                    future = pending.pop(number, None)
+                    if future is not None:
+                        sr, audio = future.result()
+                    else:
+                        sr, audio = self.synthesize(text, **parameters)
+                    self.write_audio(filename, audio, sr)
+                    self.written[content_key] = filename
+                    seconds = len(audio) / sr
+                    self.summary['rendered'] += 1
+                self._checkpoint(key, filename)
+            if progress:
+                progress(number, self.total, seconds)
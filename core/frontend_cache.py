@@ -0,0 +1,106 @@
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from utils.file_utils import atomic_write_json, read_json
+
+# clean_text の戻り値: (norm_text, phones, tones, word2ph)
+FrontendResult = Tuple[str, list, list, list]
+
+
+class FrontendCache:
+    """テキストフロントエンド（正規化・g2p・アクセント）結果のLRUキャッシュ
+
+    結果はテキストのみに依存し、スタイルや韻律スライダーには依存しないため、
+    同じ行でパラメータだけを変えて合成し直す場合は pyopenjtalk を再実行しない。
+    """
+
+    def __init__(self, max_entries: int = 2048, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, FrontendResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            self.load()
+
+    @staticmethod
+    def make_key(text: str, language, use_jp_extra: bool = True) -> str:
+        """正規化済みテキストからキーを作成"""
+        # NFKC は normalize_text の最初の処理と同じなので、結果を変えずに表記揺れを吸収できる
+        norm = unicodedata.normalize("NFKC", text)
+        lang = getattr(language, "value", language)
+        return f"{lang}|{int(bool(use_jp_extra))}|{norm}"
+
+    @staticmethod
+    def _copy(result) -> FrontendResult:
+        # 呼び出し側（get_text）が word2ph をその場で書き換えるので必ずコピーを渡す
+        norm_text, phones, tones, word2ph = result
+        return norm_text, list(phones), list(tones), list(word2ph)
+
+    def get(self, key: str) -> Optional[FrontendResult]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._copy(result)
+
+    def put(self, key: str, result) -> None:
+        with self._lock:
+            self._entries[key] = self._copy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._dirty = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    # ---------- 永続化 ----------
+    def load(self):
+        """永続化ファイルから読み込み（壊れていれば空で開始）"""
+        data = read_json(self.persist_path, default={}) or {}
+        with self._lock:
+            for key, value in data.get('entries', []):
+                try:
+                    norm_text, phones, tones, word2ph = value
+                except (TypeError, ValueError):
+                    continue
+                self._entries[key] = (norm_text, list(phones), list(tones), list(word2ph))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = False
+
+    def save(self):
+        """変更があれば永続化ファイルへ保存"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = [[k, list(v)] for k, v in self._entries.items()]
+            self._dirty = False
+        try:
+            atomic_write_json(self.persist_path, {'entries': entries})
+        except Exception as e:
+            print(f"フロントエンドキャッシュ保存エラー: {e}")
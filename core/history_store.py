@@ -0,0 +1,213 @@
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from utils.file_utils import atomic_write_json, read_json
+
+
+class HistoryStore:
+    """モデル履歴のインデックス付きストア
+
+    メモリ上は id をキーにした辞書（先頭が直近）で持ち、検索・追加は件数に依存しない。
+    ディスクはスナップショット（model_history.json）と追記専用のジャーナルで構成し、
+    変更はジャーナルに1行ずつまとめて追記する。ジャーナルが大きくなったら
+    スナップショットを一時ファイル経由で書き直して切り詰める。
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000, flush_delay: float = 0.5,
+                 compact_threshold: int = 500):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.max_entries = max_entries
+        self.flush_delay = flush_delay
+        self.compact_threshold = compact_threshold
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._by_path: Dict[str, str] = {}  # model_path -> id
+        self._pending: List[Dict] = []
+        self._torn = False  # 直前の追記が失敗した（ジャーナルの末尾が書きかけかもしれない）
+        self._journal_ops = 0
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+        self.load()
+        atexit.register(self.flush)
+
+    # ---------- 読み込み ----------
+    def load(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_path.clear()
+            data = read_json(self.path, default={}) or {}
+            for entry in reversed(data.get('models', [])):
+                if isinstance(entry, dict) and 'id' in entry:
+                    self._apply({'op': 'put', 'entry': entry})
+
+            # ジャーナルを再生（書き込み途中で落ちた最終行は読み飛ばす）
+            self._journal_ops = 0
+            self._torn = False
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        # 改行で終わらない最終行は書きかけ。次の追記はそこに続けず、改行してから書く
+                        self._torn = not line.endswith("\n")
+                        try:
+                            op = json.loads(line)
+                        except ValueError:
+                            continue
+                        self._apply(op)
+                        self._journal_ops += 1
+            self._trim()
+
+    def _apply(self, op: Dict):
+        # 壊れた・知らない形の操作は無視する（1行のために履歴全体を読めなくしない）
+        if not isinstance(op, dict):
+            return
+        kind = op.get('op')
+        if kind in ('put', 'set'):
+            entry = op.get('entry')
+            if not isinstance(entry, dict) or 'id' not in entry:
+                return
+        elif kind in ('touch', 'del') and 'id' not in op:
+            return
+        if kind == 'put':
+            entry = op['entry']
+            old = self._entries.get(entry['id'])
+            if old is not None:
+                self._unindex(old)
+            self._entries[entry['id']] = entry
+            # front=False は一括登録用（直近の履歴より後ろに並べる）
+            self._entries.move_to_end(entry['id'], last=not op.get('front', True))
+            self._by_path[entry.get('model_path', "")] = entry['id']
+        elif kind == 'set':
+            entry = op['entry']
+            old = self._entries.get(entry['id'])
+            if old is not None:
+                self._unindex(old)
+                self._entries[entry['id']] = entry
+                self._by_path[entry.get('model_path', "")] = entry['id']
+        elif kind == 'touch':
+            if op['id'] in self._entries:
+                self._entries.move_to_end(op['id'], last=False)
+        elif kind == 'del':
+            old = self._entries.pop(op['id'], None)
+            if old is not None:
+                self._unindex(old)
+        elif kind == 'clear':
+            self._entries.clear()
+            self._by_path.clear()
+
+    def _unindex(self, entry: Dict):
+        path = entry.get('model_path', "")
+        if self._by_path.get(path) == entry['id']:
+            del self._by_path[path]
+
+    # ---------- 参照 ----------
+    def get(self, model_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._entries.get(model_id)
+
+    def get_by_path(self, model_path: str) -> Optional[Dict]:
+        with self._lock:
+            model_id = self._by_path.get(model_path)
+            return self._entries.get(model_id) if model_id else None
+
+    def all(self) -> List[Dict]:
+        """全エントリ（先頭が直近）"""
+        with self._lock:
+            return list(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------- 変更 ----------
+    def put(self, entry: Dict, front: bool = True):
+        """追加・更新して先頭へ（front=False なら末尾へ。上限を超えたら最も古いものを削除）"""
+        with self._lock:
+            op = {'op': 'put', 'entry': entry}
+            if not front:
+                op['front'] = False
+            self._record(op)
+            self._trim()
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            oldest = next(reversed(self._entries))
+            self._record({'op': 'del', 'id': oldest})
+
+    def update(self, entry: Dict):
+        """並び順を変えずに既存エントリを更新"""
+        with self._lock:
+            self._record({'op': 'set', 'entry': entry})
+
+    def touch(self, model_id: str):
+        with self._lock:
+            self._record({'op': 'touch', 'id': model_id})
+
+    def remove(self, model_id: str) -> bool:
+        with self._lock:
+            if model_id not in self._entries:
+                return False
+            self._record({'op': 'del', 'id': model_id})
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._record({'op': 'clear'})
+
+    def _record(self, op: Dict):
+        self._apply(op)
+        self._pending.append(op)
+        self._schedule_flush()
+
+    # ---------- 書き込み ----------
+    def _schedule_flush(self):
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """溜まった変更をジャーナルへ追記（必要ならスナップショットを作り直す）"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            pending = self._pending
+            try:
+                lines = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in pending)
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    # 前回の追記が途中で失敗していたら、書きかけの行と混ざらないよう改行から始める
+                    f.write(("\n" if self._torn else "") + lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                # 書けなかった変更は捨てずに残し、次の flush（次の変更・終了時）で書き直す
+                self._torn = True
+                print(f"履歴保存エラー: {e}")
+                return
+            self._pending = []
+            self._torn = False
+            self._journal_ops += len(pending)
+            try:
+                if self._journal_ops >= max(self.compact_threshold, len(self._entries)):
+                    self.compact()
+            except Exception as e:
+                print(f"履歴保存エラー: {e}")
+
+    def compact(self):
+        """スナップショットを書き直してジャーナルを空にする"""
+        with self._lock:
+            atomic_write_json(self.path, {'models': list(self._entries.values())}, indent=2)
+            # スナップショットは置き換え済みなので、ここで落ちても再生は冪等
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._journal_ops = 0
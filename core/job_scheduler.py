@@ -0,0 +1,155 @@
+import math
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 合成ジョブ: (テキスト, パラメータ)。3つ目以降の要素（モデルIDなど）は無視する
+Job = Tuple[str, Dict]
+
+
+def estimate_cost(text: str) -> float:
+    """合成コストの見積もり（おおよそのモーラ数）
+
+    漢字は読みが2モーラ前後になることが多いので2、かな・英数字は1として数える。
+    空白と記号は数えない。
+    """
+    cost = 0.0
+    for ch in unicodedata.normalize("NFKC", text):
+        category = unicodedata.category(ch)
+        if category[0] in ("Z", "P", "S", "C"):
+            continue
+        cost += 2.0 if "CJK UNIFIED" in unicodedata.name(ch, "") else 1.0
+    return cost
+
+
+def bucket_of(cost: float) -> int:
+    """コストの長さバケット（2倍ごとに1段）"""
+    return int(math.log2(cost + 1))
+
+
+class LengthBucketScheduler:
+    """長さバケットで並べ替えてから合成するスケジューラ
+
+    ジョブはコストの長さバケットごとにまとめ、長いバケットから順にワーカーへ流す
+    （長い行が最後に残ってワーカーが遊ぶのを防ぐ）。結果は元の台本順の Future で返す。
+
+    Style-Bert-VITS2 の infer() は1文ずつなので、パディングを減らすバッチ推論ではなく
+    ワーカー間の負荷分散として効く。
+    executor（submit を持つもの。PriorityScheduler の窓口など）を渡すと、自前のスレッドを持たずにそこへ流す。
+    """
+
+    def __init__(self, synthesize: Callable[..., Tuple[int, np.ndarray]], workers: int = 2, executor=None):
+        self.synthesize = synthesize
+        self._owns_executor = executor is None
+        if executor is None:
+            self.workers = max(1, workers)
+            executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="synth")
+        else:
+            self.workers = max(1, getattr(executor, 'workers', workers))
+        self._executor = executor
+        self._lock = threading.Lock()
+        self.last_stats: Dict = {}
+
+    def plan(self, jobs: Sequence[Job]) -> List[int]:
+        """実行順（元のインデックスの並び）を返す。長いバケットが先、バケット内は台本順"""
+        costs = [estimate_cost(job[0]) for job in jobs]
+        return sorted(range(len(jobs)), key=lambda i: (-bucket_of(costs[i]), i))
+
+    def submit(self, jobs: Sequence[Job], reorder: bool = True, token=None) -> List[Future]:
+        """ジョブを投入し、元の順序に並んだ Future のリストを返す
+
+        token（CancelToken）が取り消されると、まだ始まっていないジョブは合成せずに JobCancelled で終わる。
+        """
+        jobs = list(jobs)
+        order = self.plan(jobs) if reorder else list(range(len(jobs)))
+        futures: List[Optional[Future]] = [None] * len(jobs)
+        stats = {
+            'jobs': len(jobs),
+            'workers': self.workers,
+            'reordered': reorder,
+            'buckets': {},
+            'cost': 0.0,
+            'busy_time': 0.0,
+            'audio_seconds': 0.0,
+            'started': time.perf_counter(),
+            'finished': None,
+        }
+        for i in order:
+            bucket = bucket_of(estimate_cost(jobs[i][0]))
+            stats['buckets'][bucket] = stats['buckets'].get(bucket, 0) + 1
+            stats['cost'] += estimate_cost(jobs[i][0])
+        remaining = [len(jobs)]
+
+        def run(text, parameters):
+            start = time.perf_counter()
+            try:
+                if token is not None:
+                    token.check()
+                sr, audio = self.synthesize(text, **parameters)
+            finally:
+                with self._lock:
+                    stats['busy_time'] += time.perf_counter() - start
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        stats['finished'] = time.perf_counter()
+            with self._lock:
+                stats['audio_seconds'] += len(audio) / sr
+            return sr, audio
+
+        self.last_stats = stats
+        for i in order:
+            text, parameters = jobs[i][0], jobs[i][1]
+            futures[i] = self._executor.submit(run, text, parameters)
+        if not jobs:
+            stats['finished'] = stats['started']
+        return futures
+
+    def map(self, jobs: Sequence[Job], reorder: bool = True, token=None) -> Iterator[Tuple[int, np.ndarray]]:
+        """結果を元の順序で返す（先頭から順に、揃い次第）"""
+        futures = self.submit(jobs, reorder=reorder, token=token)
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def stats(self) -> Dict:
+        """直近の投入分の計測値（経過時間・ワーカー稼働率・スループット）"""
+        with self._lock:
+            stats = dict(self.last_stats)
+        if not stats:
+            return {}
+        end = stats.pop('finished') or time.perf_counter()
+        wall = max(end - stats.pop('started'), 1e-9)
+        stats['wall_time'] = wall
+        stats['utilization'] = stats['busy_time'] / (wall * self.workers)
+        stats['jobs_per_sec'] = stats['jobs'] / wall
+        stats['cost_per_sec'] = stats['cost'] / wall
+        stats['realtime_factor'] = wall / stats['audio_seconds'] if stats['audio_seconds'] else 0.0
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def benchmark_scheduling(synthesize: Callable[..., Tuple[int, np.ndarray]], jobs: Sequence[Job],
+                         workers: int = 2) -> Dict:
+    """台本順と長さバケット順で同じジョブを合成し、スループットを比較する"""
+    results = {}
+    for label, reorder in (('script_order', False), ('bucketed', True)):
+        scheduler = LengthBucketScheduler(synthesize, workers=workers)
+        try:
+            for _ in scheduler.map(jobs, reorder=reorder):
+                pass
+            results[label] = scheduler.stats()
+        finally:
+            scheduler.shutdown()
+    base = results['script_order']['wall_time']
+    results['speedup'] = base / results['bucketed']['wall_time'] if results['bucketed']['wall_time'] else 0.0
+    return results
@@ -0,0 +1,113 @@
+import bisect
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 口の動きを更新するフレームレート
+FPS = 60
+
+# 母音クラス（g2p の音素から）。N（撥音）は口を閉じる
+VOWELS = ('a', 'i', 'u', 'e', 'o', 'N')
+_VOWEL_INDEX = {v: i for i, v in enumerate(VOWELS)}
+NO_VOWEL = 255
+
+# 口の開き 0〜1 に割り当てる音量の範囲（dBFS）
+FLOOR_DB = -45.0
+CEIL_DB = -12.0
+
+
+def mouth_envelope(audio: np.ndarray, sr: int, fps: int = FPS) -> np.ndarray:
+    """フレームごとのRMSから口の開き（0〜1, float32）を求める
+
+    音声を1フレーム分ずつの行に並べ替えてまとめて計算するので、Pythonのループは回らない。
+    """
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        audio = audio.astype(np.float32) / 32768.0
+    else:
+        audio = audio.astype(np.float32, copy=False)
+    hop = max(int(round(sr / fps)), 1)
+    frames = -(-len(audio) // hop)
+    if frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    padded = np.zeros(frames * hop, dtype=np.float32)
+    padded[:len(audio)] = audio
+    rms = np.sqrt(np.mean(np.square(padded.reshape(frames, hop)), axis=1))
+    db = 20.0 * np.log10(rms + 1e-8)
+    mouth = np.clip((db - FLOOR_DB) / (CEIL_DB - FLOOR_DB), 0.0, 1.0)
+    # 1フレームだけのばたつきを抑える（3フレームの移動平均）
+    if frames >= 3:
+        mouth = np.convolve(mouth, np.ones(3) / 3.0, mode='same')
+    return mouth.astype(np.float32)
+
+
+def vowel_track(phones: Sequence[str], mouth: np.ndarray, threshold: float = 0.15) -> np.ndarray:
+    """音素列の母音を、口が開いているフレームに順番に均等に割り当てる
+
+    Style-Bert-VITS2 は音素ごとの長さを返さないので、声の出ている区間を母音の数で等分した近似。
+    """
+    vowels = np.array([_VOWEL_INDEX[p] for p in phones if p in _VOWEL_INDEX], dtype=np.uint8)
+    track = np.full(len(mouth), NO_VOWEL, dtype=np.uint8)
+    voiced = np.flatnonzero(mouth > threshold)
+    if len(vowels) and len(voiced):
+        track[voiced] = vowels[(np.arange(len(voiced)) * len(vowels)) // len(voiced)]
+    return track
+
+
+class LipSyncTrack:
+    """1区間分のリップシンク特徴量（口の開きと母音クラス）"""
+
+    def __init__(self, mouth: np.ndarray, vowels: Optional[np.ndarray] = None, fps: int = FPS):
+        self.mouth = mouth
+        self.vowels = vowels
+        self.fps = fps
+
+    @classmethod
+    def from_audio(cls, audio: np.ndarray, sr: int, phones: Optional[Sequence[str]] = None, fps: int = FPS):
+        mouth = mouth_envelope(audio, sr, fps)
+        vowels = vowel_track(phones, mouth) if phones else None
+        return cls(mouth, vowels, fps)
+
+    @property
+    def duration(self) -> float:
+        return len(self.mouth) / self.fps
+
+    def at(self, t: float) -> Tuple[float, Optional[str]]:
+        """区間先頭からの時刻 t（秒）の (口の開き, 母音)"""
+        i = int(t * self.fps)
+        if not 0 <= i < len(self.mouth):
+            return 0.0, None
+        vowel = None
+        if self.vowels is not None and self.vowels[i] != NO_VOWEL:
+            vowel = VOWELS[self.vowels[i]]
+        return float(self.mouth[i]), vowel
+
+
+class LipSyncTimeline:
+    """再生タイムライン上に並べたリップシンク特徴量（AudioEngine の区間と同じ開始時刻で積む）"""
+
+    def __init__(self):
+        self._starts: List[float] = []
+        self._tracks: List[LipSyncTrack] = []
+        self._lock = threading.Lock()
+
+    def add(self, start: float, track: LipSyncTrack):
+        with self._lock:
+            i = bisect.bisect_right(self._starts, start)
+            self._starts.insert(i, start)
+            self._tracks.insert(i, track)
+
+    def clear(self):
+        with self._lock:
+            self._starts = []
+            self._tracks = []
+
+    def sample(self, t: float) -> Tuple[float, Optional[str]]:
+        """再生位置 t（秒）の (口の開き, 母音)"""
+        with self._lock:
+            i = bisect.bisect_right(self._starts, t) - 1
+            if i < 0:
+                return 0.0, None
+            start, track = self._starts[i], self._tracks[i]
+        return track.at(t - start)
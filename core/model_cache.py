@@ -0,0 +1,75 @@
+import os
+import shutil
+import time
+from typing import Dict, Optional
+
+from utils.file_utils import atomic_write_json, read_json, content_fingerprint, is_remote_path
+
+
+class ModelCache:
+    """ネットワーク上のモデルフォルダをローカルへコピーして再読み込みを速くするキャッシュ
+
+    キーは3ファイルの内容ハッシュなので、同じ重みなら置き場所が違っても共有され、
+    再学習で中身が変われば別エントリになる。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 8 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def should_cache(self, model_path: str) -> bool:
+        return is_remote_path(model_path)
+
+    def resolve(self, model_path: str, config_path: str, style_path: str,
+                key: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """ローカルコピーのパスを返す（無ければコピーを作成）。失敗時は None
+
+        key にはモデルの指紋（ModelManager.get_fingerprint）を渡せる。省略時はここで計算する。
+        """
+        try:
+            key = key or content_fingerprint((model_path, config_path, style_path))
+            entry_dir = os.path.join(self.cache_dir, key)
+            local = {
+                'model_path': os.path.join(entry_dir, os.path.basename(model_path)),
+                'config_path': os.path.join(entry_dir, "config.json"),
+                'style_path': os.path.join(entry_dir, "style_vectors.npy"),
+            }
+            meta_path = os.path.join(entry_dir, "meta.json")
+            if read_json(meta_path) is None:
+                os.makedirs(entry_dir, exist_ok=True)
+                for src, key_name in ((model_path, 'model_path'), (config_path, 'config_path'), (style_path, 'style_path')):
+                    tmp = local[key_name] + ".part"
+                    shutil.copyfile(src, tmp)
+                    os.replace(tmp, local[key_name])
+                # meta.json が最後に書かれるので、存在すればコピーは完了している
+                atomic_write_json(meta_path, {
+                    'source_model_path': model_path,
+                    'created': time.time(),
+                })
+                self._evict(keep=key)
+            os.utime(meta_path)  # 最終使用時刻（LRU用）
+            return local
+        except Exception as e:
+            print(f"モデルキャッシュエラー: {e}")
+            return None
+
+    def _evict(self, keep: str):
+        """合計サイズが上限を超えたら古いエントリから削除"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(entry_dir):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(entry_dir) if e.is_file())
+            meta_path = os.path.join(entry_dir, "meta.json")
+            used = os.path.getmtime(meta_path) if os.path.exists(meta_path) else 0
+            entries.append((used, name, size))
+            total += size
+        for used, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            total -= size
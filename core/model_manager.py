@@ -1,15 +1,33 @@
+import hashlib
 import os
-import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from utils.file_utils import file_signature, content_fingerprint
+from .history_store import HistoryStore
+from .path_checker import PathChecker
 
 class ModelManager:
-    def __init__(self, config_file="model_history.json"):
+    def __init__(self, config_file="model_history.json", max_history: int = 1000, flush_delay: float = 0.5):
         self.config_file = config_file
-        self.models: List[Dict] = []
+        self.max_history = max_history
+        self.flush_delay = flush_delay
+        self.store: Optional[HistoryStore] = None
+        # (model, config, style) のパス -> (stat情報, 指紋)
+        self._fingerprint_memo: Dict[Tuple[str, str, str], Tuple[list, str]] = {}
+        # ファイル存在確認（バックグラウンド実行＋短時間キャッシュ）
+        self.path_checker = PathChecker(ttl=5.0)
+        # 指紋の計算（重みファイルの一部を読む）もネットワーク共有では遅いので GUI スレッドではやらない
+        self._fingerprint_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fingerprint")
         self.load_history()
 
+    @property
+    def models(self) -> List[Dict]:
+        """履歴一覧（先頭が直近）"""
+        return self.store.all()
+
     # ---------- 内部ユーティリティ ----------
     def _pretty_default_name(self, model_path: str) -> str:
         """既定表示名：親フォルダ名。無ければファイル名から学習トークンを除去。"""
@@ -21,121 +39,223 @@ class ModelManager:
         stem = re.sub(r'([_-]?e\d+([_-]?s\d+)?)$', "", stem, flags=re.IGNORECASE).strip("_- ")
         return stem or "model"
 
-    def _generate_model_id(self, model_path: str) -> str:
-        """モデルパスからユニークIDを生成"""
-        import hashlib
+    def _generate_model_id(self, model_path: str, config_path: str, style_path: str) -> str:
+        """3ファイルの内容からモデルIDを生成（同じ重みなら置き場所に関係なく同じID）"""
+        return self.get_fingerprint(model_path, config_path, style_path)
+
+    @staticmethod
+    def _path_id(model_path: str) -> str:
+        """パスから作る旧形式のID（ファイルが読めず内容指紋を作れないとき）"""
         return hashlib.md5(model_path.encode()).hexdigest()[:12]
 
+    def get_fingerprint(self, model_path: str, config_path: str, style_path: str) -> str:
+        """モデルの内容指紋を取得。stat 情報が変わっていなければハッシュを再計算しない
+
+        ファイルが見つからない・読めないときはパスから作ったIDを返す（記録はする）。
+        ネットワーク共有では時間がかかるので、GUIスレッドからは get_fingerprint_async を使う。
+        """
+        paths = (model_path, config_path, style_path)
+        try:
+            stat = [file_signature(p) for p in paths]
+        except OSError:
+            self._fingerprint_memo.pop(paths, None)
+            return self._path_id(model_path)
+
+        memo = self._fingerprint_memo.get(paths)
+        if memo and memo[0] == stat:
+            return memo[1]
+        # 履歴ファイルに記録済みの stat と一致すればその指紋を使う
+        m = self.store.get_by_path(model_path)
+        if m and (m.get('config_path'), m.get('style_path')) == paths[1:] and m.get('stat') == stat:
+            self._fingerprint_memo[paths] = (stat, m['id'])
+            return m['id']
+
+        try:
+            fingerprint = content_fingerprint(paths)
+        except OSError:
+            self._fingerprint_memo.pop(paths, None)
+            return self._path_id(model_path)
+        self._fingerprint_memo[paths] = (stat, fingerprint)
+        return fingerprint
+
+    def get_fingerprint_async(self, model_path: str, config_path: str, style_path: str, callback):
+        """非同期版。callback(指紋) は別スレッドから呼ばれる"""
+        future = self._fingerprint_pool.submit(self.get_fingerprint, model_path, config_path, style_path)
+        future.add_done_callback(lambda f: callback(f.result()))
+
     def _normalize_names(self) -> bool:
         """既存履歴の名前や欠落フィールドを正規化。変更があれば True。"""
         changed = False
-        for m in self.models:
+        for m in self.store.all():
             desired = self._pretty_default_name(m.get("model_path", ""))
             current = (m.get("name") or "").strip()
             # ファイル名に学習トークンが残ってたら除去
             cleaned = re.sub(r'([_-]?e\d+([_-]?s\d+)?)$', "", current, flags=re.IGNORECASE).strip("_- ")
             candidate = (os.path.basename(os.path.dirname(m.get("model_path",""))) or "").strip() or cleaned
             candidate = candidate or desired
+            entry_changed = False
             if candidate and candidate != current:
                 m["name"] = candidate
-                changed = True
+                entry_changed = True
             # note が無ければ初期化
             if "note" not in m:
                 m["note"] = ""
+                entry_changed = True
+            if entry_changed:
+                self.store.update(m)
                 changed = True
         return changed
 
     # ---------- I/O ----------
     def load_history(self):
-        """履歴ファイルから読み込み"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.models = data.get('models', [])
-            except Exception:
-                self.models = []
-        else:
-            self.models = []
+        """履歴ファイル（スナップショット＋ジャーナル）から読み込み"""
+        if self.store is not None:
+            self.store.flush()
+        self.store = HistoryStore(self.config_file, max_entries=self.max_history, flush_delay=self.flush_delay)
 
-        # 1回だけ正規化（必要時のみ保存）
-        if self._normalize_names():
-            self.save_history(quiet=True)
+        # 1回だけ正規化（変更はジャーナル経由で保存される）
+        self._normalize_names()
 
     def save_history(self, quiet: bool = True):
-        """履歴ファイルに保存（quiet=True でログ抑制）"""
-        try:
-            data = {'models': self.models}
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            if not quiet:
-                pass
-        except Exception as e:
-            print(f"履歴保存エラー: {e}")
+        """溜まっている変更を直ちに書き込む（通常は自動でまとめて書き込まれる）"""
+        self.store.flush()
 
     # ---------- CRUD ----------
-    def add_model(self, model_path: str, config_path: str, style_path: str, custom_name: Optional[str] = None) -> str:
-        """新しいモデルを履歴に追加（既存なら先頭に移動のみ）"""
-        model_id = self._generate_model_id(model_path)
+    def add_model(self, model_path: str, config_path: str, style_path: str, custom_name: Optional[str] = None,
+                  model_id: Optional[str] = None) -> str:
+        """新しいモデルを履歴に追加（既存なら先頭に移動のみ）
+
+        model_id に get_fingerprint(_async) で計算済みの指紋を渡すと、ファイルに触らずに登録する。
+        """
+        paths = (model_path, config_path, style_path)
+        memo = self._fingerprint_memo.get(paths)
+        if model_id is None or (memo is not None and memo[1] != model_id):
+            model_id = self._generate_model_id(model_path, config_path, style_path)
+            memo = self._fingerprint_memo.get(paths)
+        # ファイルが読めなかった（パスから作ったID）ときは stat 無しで記録する
+        stat = memo[0] if memo else None
+
+        # 同じパスで中身が変わった（再学習した）エントリは新しい指紋で置き換える（名前とメモは引き継ぐ）
+        replaced = self.store.get_by_path(model_path)
+        if replaced and replaced['id'] != model_id:
+            self.store.remove(replaced['id'])
+        else:
+            replaced = None
+
         existing = self.get_model_by_id(model_id)
         if existing:
-            # 既存を先頭に持ってくるだけ
-            self.models.remove(existing)
-            self.models.insert(0, existing)
-            self.save_history(quiet=True)
+            # 既存を先頭に持ってくる（別の場所にある同じ重みなら最新のパスに更新）
+            if (existing.get('model_path'), existing.get('config_path'), existing.get('style_path'),
+                    existing.get('stat')) == (model_path, config_path, style_path, stat):
+                self.store.touch(model_id)
+            else:
+                existing = dict(existing, model_path=model_path, config_path=config_path,
+                                style_path=style_path, stat=stat)
+                self.store.put(existing)
             return model_id
 
-        model_name = custom_name or self._pretty_default_name(model_path)
+        model_name = custom_name or (replaced or {}).get('name') or self._pretty_default_name(model_path)
         entry = {
             'id': model_id,
             'name': model_name,
-            'note': "",
+            'note': (replaced or {}).get('note', ""),
             'model_path': model_path,
             'config_path': config_path,
             'style_path': style_path,
+            'stat': stat,
         }
-        # 最新を先頭に
-        self.models.insert(0, entry)
-        # 最大20件
-        if len(self.models) > 20:
-            self.models = self.models[:20]
-        self.save_history(quiet=True)
+        # 最新を先頭に（上限 max_history 件）
+        self.store.put(entry)
         return model_id
 
+    def import_models(self, entries: List[Dict]) -> int:
+        """ライブラリスキャン結果（ModelLibraryScanner.scan）を履歴に一括登録。追加件数を返す
+
+        既に登録済みのモデルは並び順を変えない。新規分は直近の履歴より後ろに並べる。
+        """
+        added = 0
+        folder_counts: Dict[str, int] = {}
+        for e in entries:
+            folder_counts[e['folder']] = folder_counts.get(e['folder'], 0) + 1
+        for e in entries:
+            paths = (e['model_path'], e['config_path'], e['style_path'])
+            # スキャナが計算済みの指紋を使う（ハッシュを再計算しない）
+            if 'fingerprint' in e and 'stat' in e:
+                self._fingerprint_memo[paths] = (e['stat'], e['fingerprint'])
+                model_id = e['fingerprint']
+            else:
+                model_id = self.get_fingerprint(*paths)
+            if self.store.get(model_id):
+                continue
+            # 同じフォルダに複数のチェックポイントがあればメモで区別する
+            note = Path(e['model_path']).stem if folder_counts[e['folder']] > 1 else ""
+            self.store.put({
+                'id': model_id,
+                'name': self._pretty_default_name(e['model_path']),
+                'note': note,
+                'model_path': e['model_path'],
+                'config_path': e['config_path'],
+                'style_path': e['style_path'],
+                'stat': self._fingerprint_memo.get(paths, (None,))[0],
+            }, front=False)
+            added += 1
+        return added
+
     def get_model_by_id(self, model_id: str) -> Optional[Dict]:
-        for m in self.models:
-            if m['id'] == model_id:
+        return self.store.get(model_id)
+
+    def find_model(self, ref: str) -> Optional[Dict]:
+        """IDまたは履歴上の名前でモデルを探す（台本ファイルのモデル列用）"""
+        if not ref:
+            return None
+        m = self.get_model_by_id(ref)
+        if m:
+            return m
+        for m in self.store.all():
+            if m.get('name') == ref:
                 return m
         return None
 
     def get_all_models(self) -> List[Dict]:
-        return self.models.copy()
+        return self.store.all()
 
     def update_model_name(self, model_id: str, new_name: str) -> bool:
         m = self.get_model_by_id(model_id)
         if not m:
             return False
-        m['name'] = new_name
-        self.save_history(quiet=True)
+        self.store.update(dict(m, name=new_name))
         return True
 
     def update_note(self, model_id: str, note: str) -> bool:
         m = self.get_model_by_id(model_id)
         if not m:
             return False
-        m['note'] = note
-        self.save_history(quiet=True)
+        self.store.update(dict(m, note=note))
         return True
 
     def remove_model(self, model_id: str) -> bool:
-        before = len(self.models)
-        self.models = [m for m in self.models if m['id'] != model_id]
-        changed = len(self.models) != before
-        if changed:
-            self.save_history(quiet=True)
-        return changed
+        return self.store.remove(model_id)
+
+    def clear_history(self):
+        self.store.clear()
 
     # ---------- ユーティリティ ----------
-    def validate_model_files(self, model_entry: Dict) -> bool:
-        paths = [model_entry['model_path'], model_entry['config_path'], model_entry['style_path']]
-        return all(os.path.exists(p) for p in paths)
+    def _entry_paths(self, model_entry: Dict) -> List[str]:
+        return [model_entry['model_path'], model_entry['config_path'], model_entry['style_path']]
+
+    def validate_model_files(self, model_entry: Dict, timeout: float = 3.0) -> bool:
+        """3ファイルが揃っているか（timeout 以内に応答がなければ False）。GUIスレッドでは async 版を使う"""
+        return bool(self.path_checker.check(self._entry_paths(model_entry), timeout))
+
+    def validate_model_files_async(self, model_entry: Dict, callback, timeout: float = 3.0):
+        """非同期版。callback(True/False/None) は別スレッドから呼ばれる（None は応答なし）"""
+        self.path_checker.check_async(self._entry_paths(model_entry), callback, timeout)
+
+    def cached_availability(self, model_entry: Dict) -> Optional[bool]:
+        """キャッシュ済みの確認結果（I/O なし）。未確認・期限切れなら None"""
+        results = [self.path_checker.cached(p) for p in self._entry_paths(model_entry)]
+        if any(r is False for r in results):
+            return False
+        if all(r is True for r in results):
+            return True
+        return None
@@ -0,0 +1,166 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from utils.file_utils import atomic_write_json, read_json, file_signature, content_fingerprint
+
+# 学習途中のチェックポイント名（例: honoka_model_e50_s2050）
+CHECKPOINT_RE = re.compile(r'e(\d+)[_-]?s(\d+)$', re.IGNORECASE)
+
+
+def checkpoint_order(model_path: str):
+    """チェックポイントの並び順キー（ステップ数が大きいほど新しい）"""
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    m = CHECKPOINT_RE.search(stem)
+    if m:
+        return int(m.group(2)), int(m.group(1)), stem
+    return -1, -1, stem
+
+
+def scan_folder(folder: str) -> List[Dict]:
+    """1フォルダ内の (model, config, style) の組をすべて返す（新しいチェックポイントが先頭）"""
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return []
+    return _entries_for(folder, names)
+
+
+def _entries_for(folder: str, names) -> List[Dict]:
+    names = set(names)
+    if "config.json" not in names or "style_vectors.npy" not in names:
+        return []
+    checkpoints = sorted(
+        (os.path.join(folder, n) for n in names if n.endswith(".safetensors")),
+        key=checkpoint_order, reverse=True,
+    )
+    return [{
+        'folder': folder,
+        'model_path': path,
+        'config_path': os.path.join(folder, "config.json"),
+        'style_path': os.path.join(folder, "style_vectors.npy"),
+    } for path in checkpoints]
+
+
+class ModelLibraryScanner:
+    """モデルライブラリ（多数のボイスフォルダ）をスレッドプールで走査する
+
+    フォルダごとの更新時刻と内容指紋をインデックスに保存し、再スキャン時は
+    更新時刻が変わっていないフォルダの一覧取得と指紋計算を省略する。
+    """
+
+    def __init__(self, index_path: Optional[str] = None, max_workers: int = 8):
+        self.index_path = index_path
+        self.max_workers = max_workers
+        self._index: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if index_path:
+            self._index = (read_json(index_path, default={}) or {}).get('folders', {})
+        self.last_stats = {}
+
+    def scan(self, root: str) -> List[Dict]:
+        """root 以下を走査し、見つかったモデルの一覧（チェックポイントごと）を返す"""
+        results: List[Dict] = []
+        seen = set()
+        stats = {'folders': 0, 'listed': 0, 'reused': 0, 'hashed': 0}
+        pending = []
+        done = threading.Condition()
+
+        def visit(folder):
+            try:
+                entries, subdirs = self._visit(folder, stats)
+                with done:
+                    results.extend(entries)
+                    seen.add(folder)
+                    for sub in subdirs:
+                        pending.append(pool.submit(visit, sub))
+            finally:
+                with done:
+                    done.notify_all()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            with done:
+                pending.append(pool.submit(visit, os.path.abspath(root)))
+                # サブフォルダの投入が止まるまで待つ
+                while not all(f.done() for f in pending):
+                    done.wait(0.1)
+
+        with self._lock:
+            # 消えたフォルダをインデックスから除去
+            prefix = os.path.abspath(root)
+            for folder in [f for f in self._index if f == prefix or f.startswith(prefix + os.sep)]:
+                if folder not in seen:
+                    del self._index[folder]
+        self.save_index()
+        stats['models'] = len(results)
+        self.last_stats = stats
+        results.sort(key=lambda e: (e['folder'], [-x for x in checkpoint_order(e['model_path'])[:2]]))
+        return results
+
+    def _visit(self, folder: str, stats: Dict):
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            return [], []
+        with self._lock:
+            stats['folders'] += 1
+            cached = self._index.get(folder)
+
+        if cached and cached.get('mtime_ns') == mtime:
+            names, subdirs = cached['files'], cached['subdirs']
+            with self._lock:
+                stats['reused'] += 1
+        else:
+            names, subdirs = [], []
+            try:
+                with os.scandir(folder) as it:
+                    for e in it:
+                        if e.is_dir(follow_symlinks=False):
+                            subdirs.append(e.path)
+                        elif e.name.endswith(".safetensors") or e.name in ("config.json", "style_vectors.npy"):
+                            names.append(e.name)
+            except OSError:
+                return [], []
+            cached = {'mtime_ns': mtime, 'files': names, 'subdirs': subdirs, 'fingerprints': {}}
+            with self._lock:
+                stats['listed'] += 1
+
+        entries = _entries_for(folder, names)
+        fingerprints = cached.setdefault('fingerprints', {})
+        for entry in entries:
+            paths = (entry['model_path'], entry['config_path'], entry['style_path'])
+            try:
+                stat = [file_signature(p) for p in paths]
+            except OSError:
+                continue
+            known = fingerprints.get(entry['model_path'])
+            if not known or known['stat'] != stat:
+                try:
+                    fingerprint = content_fingerprint(paths)
+                except OSError:
+                    continue  # 走査中に消えた・ロックされたファイルはこのモデルだけ飛ばす
+                known = {'stat': stat, 'id': fingerprint}
+                fingerprints[entry['model_path']] = known
+                with self._lock:
+                    stats['hashed'] += 1
+            entry['stat'] = known['stat']
+            entry['fingerprint'] = known['id']
+        # 消えたチェックポイントの指紋は捨てる
+        for path in [p for p in fingerprints if p not in {e['model_path'] for e in entries}]:
+            del fingerprints[path]
+
+        with self._lock:
+            self._index[folder] = cached
+        return [e for e in entries if 'fingerprint' in e], subdirs
+
+    def save_index(self):
+        if not self.index_path:
+            return
+        with self._lock:
+            data = {'folders': dict(self._index)}
+            try:
+                atomic_write_json(self.index_path, data)
+            except Exception as e:
+                print(f"ライブラリインデックス保存エラー: {e}")
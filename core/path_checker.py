@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+def path_host(path: str) -> str:
+    """確認をまとめる単位（UNC はサーバ名、Windows はドライブ。それ以外のローカルパスは空文字）"""
+    path = str(path)
+    if path.startswith("\\\\") or path.startswith("//"):
+        return path.replace("\\", "/").lstrip("/").split("/", 1)[0].lower()
+    drive = os.path.splitdrive(path)[0]
+    return drive.upper()
+
+
+class PathChecker:
+    """ファイルの存在確認をバックグラウンドで行い、結果を短時間キャッシュする
+
+    ネットワーク共有では stat が数秒かかったり、オフライン時に戻ってこなかったり
+    するため、GUIスレッドからは直接 os.path.exists を呼ばない。
+    同じパスへの確認が実行中なら、その結果を待つ（二重に stat しない）。
+    stat はホスト（共有のサーバ・ドライブ）ごとに max_per_host 本までのスレッドで行うので、
+    落ちた共有で固まったスレッドが他のホストの確認を止めることはない。
+    timeout までに戻らなかったパスは「無し」として記録し、backoff 秒（連続するたびに倍）は stat し直さない。
+    固まったスレッドは数に入れなくなる（見捨てる）ので、そのホストの確認も次のスレッドで続けられる。
+    """
+
+    def __init__(self, ttl: float = 5.0, max_per_host: int = 2, backoff: float = 10.0,
+                 max_backoff: float = 300.0):
+        self.ttl = ttl
+        self.max_per_host = max(1, max_per_host)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._cache: Dict[str, Tuple[float, bool]] = {}  # path -> (有効期限, 存在するか)
+        self._inflight: Dict[str, Future] = {}
+        self._backoffs: Dict[str, float] = {}  # path -> 直近のバックオフ秒数
+        self._running: Dict[str, int] = {}  # host -> 実行中のスレッド数（見捨てたものは除く）
+        self._workers: Dict[Future, str] = {}  # 実行中の確認 -> host
+        self._waiting: Dict[str, deque] = {}  # host -> 空きを待っている (path, future)
+        self._lock = threading.Lock()
+
+    def cached(self, path: str) -> Optional[bool]:
+        """キャッシュ済みの結果（期限切れ・未確認なら None）"""
+        with self._lock:
+            hit = self._cache.get(path)
+        if hit and time.monotonic() < hit[0]:
+            return hit[1]
+        return None
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+                self._backoffs.clear()
+            else:
+                self._cache.pop(path, None)
+                self._backoffs.pop(path, None)
+
+    def _exists(self, path: str, future: Future):
+        try:
+            result = os.path.exists(path)
+        except Exception:
+            result = False
+        with self._lock:
+            # 打ち切られた後に戻ってきた結果も、その時点では正しいので記録する
+            self._cache[path] = (time.monotonic() + self.ttl, result)
+            self._backoffs.pop(path, None)
+            if self._inflight.get(path) is future:
+                del self._inflight[path]
+            self._release(future)
+        self._resolve(future, result)
+
+    @staticmethod
+    def _resolve(future: Future, result: bool):
+        # 打ち切りと stat の完了が同時に来たら先に来た方を使う
+        try:
+            future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def _start(self, path: str, host: str, future: Future):
+        """ロックを持った状態で呼ぶ"""
+        self._running[host] = self._running.get(host, 0) + 1
+        self._workers[future] = host
+        threading.Thread(target=self._exists, args=(path, future),
+                         name=f"path-check-{host or 'local'}", daemon=True).start()
+
+    def _release(self, future: Future):
+        """ロックを持った状態で呼ぶ。確認のスレッドを数から外し、空いた分で待っている確認を始める"""
+        host = self._workers.pop(future, None)
+        if host is not None:
+            self._running[host] -= 1
+            self._start_waiting(host)
+
+    def _start_waiting(self, host: str):
+        """ロックを持った状態で呼ぶ。空きがあれば待っている確認を始める"""
+        waiting = self._waiting.get(host)
+        while waiting and self._running.get(host, 0) < self.max_per_host:
+            path, future = waiting.popleft()
+            if not future.done():
+                self._start(path, host, future)
+
+    def _submit(self, path: str) -> Future:
+        value = self.cached(path)
+        if value is not None:
+            future = Future()
+            future.set_result(value)
+            return future
+        host = path_host(path)
+        with self._lock:
+            future = self._inflight.get(path)
+            if future is None:
+                future = Future()
+                self._inflight[path] = future
+                if self._running.get(host, 0) < self.max_per_host:
+                    self._start(path, host, future)
+                else:
+                    self._waiting.setdefault(host, deque()).append((path, future))
+            return future
+
+    def _timed_out(self, paths, futures):
+        """timeout までに戻らなかったパスを「無し」として記録し、しばらく stat し直さない"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for path, future in zip(paths, futures):
+                if future.done():
+                    continue
+                expired.append(future)
+                if self._inflight.get(path) is future:
+                    del self._inflight[path]
+                backoff = min(self._backoffs.get(path, self.backoff / 2) * 2, self.max_backoff)
+                self._backoffs[path] = backoff
+                self._cache[path] = (now + backoff, False)
+                # stat が戻らないスレッドは見捨て、このホストの次の確認に枠を譲る
+                self._release(future)
+        # 完了の通知（コールバック）はロックの外で
+        for future in expired:
+            self._resolve(future, False)
+
+    def check_async(self, paths: Iterable[str], callback: Callable[[Optional[bool]], None],
+                    timeout: float = 3.0):
+        """全パスが存在するかを確認し、callback(True/False/None) を呼ぶ
+
+        timeout 秒以内に確認できなければ None（応答なし）。callback は別スレッドから呼ばれる。
+        """
+        paths = list(paths)
+        futures = [self._submit(p) for p in paths]
+        state = {'fired': False}
+        lock = threading.Lock()
+
+        def fire(result):
+            with lock:
+                if state['fired']:
+                    return
+                state['fired'] = True
+            timer.cancel()
+            callback(result)
+
+        def on_done(_):
+            if not all(f.done() for f in futures):
+                return
+            try:
+                fire(all(f.result() for f in futures))
+            except Exception:
+                fire(False)
+
+        def on_timeout():
+            fire(None)
+            self._timed_out(paths, futures)
+
+        timer = threading.Timer(timeout, on_timeout)
+        timer.daemon = True
+        timer.start()
+        for f in futures:
+            f.add_done_callback(on_done)
+
+    def check(self, paths: Iterable[str], timeout: float = 3.0) -> Optional[bool]:
+        """同期版（GUIスレッド以外から使う）。timeout 以内に確認できなければ None"""
+        done = threading.Event()
+        box = {}
+
+        def callback(result):
+            box['result'] = result
+            done.set()
+
+        self.check_async(paths, callback, timeout)
+        done.wait()
+        return box['result']
@@ -0,0 +1,163 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
+from typing import Dict
+
+from .priority_scheduler import SPECULATIVE, CancelToken, JobCancelled
+
+
+class Prefetcher:
+    """編集が落ち着いた行を、空き時間に先に合成しておく
+
+    行が編集されてから debounce 秒変更が無ければ、合成結果キャッシュに入れておく。
+    ▶ を押したときにはキャッシュから返るだけになる。
+    合成は1行ずつ、cpu_budget の割合の時間だけ行う。例えば 0.5 なら、合成にかかった時間と同じだけ休む。
+    0 にすると先読みしない。再生・書き出しの最中（foreground）は先読みを止める。
+    読み込まれていないモデルの行は、先読みのためにモデルを読み込むことはしない。
+    scheduler（PriorityScheduler）を渡すと、合成はそこに最も低い優先度（SPECULATIVE）で投入する。
+    ▶ や書き出しと同じワーカーを取り合わず、再生・書き出しが始まるとまだ始まっていない先読みは取り消す。
+    """
+
+    def __init__(self, pool, debounce: float = 0.8, cpu_budget: float = 0.5, scheduler=None):
+        self.pool = pool
+        self.scheduler = scheduler
+        self._token = CancelToken()  # 投入中の先読みの取り消し
+        self.debounce = debounce
+        self.cpu_budget = cpu_budget
+        self._pending: Dict[str, tuple] = {}  # row_id -> (編集時刻, text, parameters, model_id)
+        self._prefetched = set()  # 先読みで作った合成キー
+        self._foreground = 0
+        self._cond = threading.Condition()
+        self._running = True
+        self.stats_counters = {
+            'scheduled': 0,     # 先読みを予約した回数（編集ごと）
+            'rendered': 0,      # 実際に先読みで合成した行
+            'already_cached': 0,
+            'busy_time': 0.0,
+            'play_requests': 0,
+            'play_hits': 0,     # ▶ のときに先読み済みだった回数
+            'cancelled': 0,     # 再生・書き出しが始まって取り消した先読み
+        }
+        self._thread = threading.Thread(target=self._loop, name="prefetcher", daemon=True)
+        self._thread.start()
+
+    # ---------- 入力 ----------
+    def touch(self, row_id: str, text: str, parameters: Dict, model_id: str = ""):
+        """行が編集された（最後の編集から debounce 秒たったら先読み）"""
+        with self._cond:
+            if text:
+                self._pending[row_id] = (time.monotonic(), text, dict(parameters), model_id or "")
+                self.stats_counters['scheduled'] += 1
+            else:
+                self._pending.pop(row_id, None)
+            self._cond.notify()
+
+    def forget(self, row_id: str):
+        with self._cond:
+            self._pending.pop(row_id, None)
+
+    def set_cpu_budget(self, budget: float):
+        with self._cond:
+            self.cpu_budget = min(max(budget, 0.0), 1.0)
+            self._cond.notify()
+
+    @contextmanager
+    def foreground(self):
+        """再生・書き出しの間は先読みを止める"""
+        with self._cond:
+            self._foreground += 1
+            self._token.cancel()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._foreground -= 1
+                self._cond.notify()
+
+    def note_play(self, key: str, cached: bool):
+        """▶ での合成要求（cached: 要求時点でキャッシュにあったか）"""
+        with self._cond:
+            self.stats_counters['play_requests'] += 1
+            if cached and key in self._prefetched:
+                self.stats_counters['play_hits'] += 1
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self.stats_counters)
+            stats['pending'] = len(self._pending)
+        stats['hit_rate'] = stats['play_hits'] / stats['play_requests'] if stats['play_requests'] else 0.0
+        return stats
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._token.cancel()
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+
+    # ---------- スレッド ----------
+    def _next_due(self) -> tuple:
+        """debounce 秒以上変更の無い行のうち最も古いもの。無ければ次に見る時刻までの秒数"""
+        now = time.monotonic()
+        row_id, item = min(self._pending.items(), key=lambda kv: kv[1][0])
+        wait = item[0] + self.debounce - now
+        if wait > 0:
+            return None, wait
+        del self._pending[row_id]
+        return item, 0.0
+
+    def _render(self, engine, text, parameters):
+        if self.scheduler is None:
+            engine.synthesize_cached(text, **parameters)
+            return
+        with self._cond:
+            if self._foreground or not self._running:
+                raise JobCancelled("取り消されました")
+            token = self._token = CancelToken()
+        self.scheduler.submit(engine.synthesize_cached, text, priority=SPECULATIVE, token=token,
+                              **parameters).result()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._pending or self._foreground or self.cpu_budget <= 0):
+                    self._cond.wait()
+                if not self._running:
+                    return
+                item, wait = self._next_due()
+                if item is None:
+                    self._cond.wait(timeout=wait)
+                    continue
+            _, text, parameters, model_id = item
+            engine = self.pool.peek(model_id)
+            if engine is None or not engine.is_loaded:
+                continue
+            try:
+                key = engine.synthesis_key(text, **parameters)
+                if key in engine.synthesis_cache:
+                    with self._cond:
+                        self.stats_counters['already_cached'] += 1
+                    continue
+                start = time.perf_counter()
+                self._render(engine, text, parameters)
+                elapsed = time.perf_counter() - start
+            except (CancelledError, JobCancelled):
+                with self._cond:
+                    self.stats_counters['cancelled'] += 1
+                continue
+            except Exception as e:
+                print(f"先読みエラー: {e}")
+                continue
+            with self._cond:
+                if len(self._prefetched) > 65536:
+                    self._prefetched.clear()
+                self._prefetched.add(key)
+                self.stats_counters['rendered'] += 1
+                self.stats_counters['busy_time'] += elapsed
+                # CPU予算: 合成時間 × (1 - b) / b だけ休む
+                budget = self.cpu_budget
+                if 0 < budget < 1:
+                    deadline = time.monotonic() + elapsed * (1 - budget) / budget
+                    while self._running and time.monotonic() < deadline:
+                        self._cond.wait(timeout=deadline - time.monotonic())
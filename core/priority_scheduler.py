@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+# 優先度クラス（数字が小さいほど先）
+INTERACTIVE = 0  # ▶ での1行再生
+BATCH = 1        # 連続再生・書き出し
+SPECULATIVE = 2  # 先読み（他に待っているジョブが無いときだけ）
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch', SPECULATIVE: 'speculative'}
+
+
+class JobCancelled(Exception):
+    """取り消されたジョブ・要求"""
+
+
+class CancelToken:
+    """要求の取り消し（新しい ▶ が押されたら、まだ始まっていない古い要求を捨てる）"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """取り消されていれば JobCancelled を投げる（行と行の間で呼ぶ）"""
+        if self._event.is_set():
+            raise JobCancelled("取り消されました")
+
+
+class PriorityScheduler:
+    """優先度つきの合成キュー（対話 > 一括）
+
+    空いたワーカーは対話のキューから先に取るので、▶ は大きな書き出しの後ろに並ばない。
+    ワーカーが2つ以上なら reserved 個は一括に使わず空けておき、
+    実行中の一括ジョブ（infer は途中で止められない）が終わるのを待たずに ▶ を始められるようにする。
+    一括が止まりきらないよう、一括が待っている間に対話が batch_every 件続いたら一括を1件流す。
+    先読みは対話も一括も待っていないときだけ、一括と同じ枠（reserved 以外）で流す。
+    実行前に CancelToken が取り消されたジョブは実行せずに捨てる。
+    """
+
+    def __init__(self, workers: int = 3, reserved: int = 1, batch_every: int = 4):
+        self.workers = max(1, workers)
+        self.batch_slots = max(1, self.workers - reserved)
+        self.batch_every = batch_every
+        self._queues = {priority: deque() for priority in PRIORITY_NAMES}
+        self._cond = threading.Condition()
+        self._running_batch = 0  # 実行中の一括・先読み（reserved 以外の枠を使うもの）
+        self._streak = 0  # 一括を待たせたまま続けて流した対話の数
+        self._closed = False
+        self._metrics = {
+            priority: {'submitted': 0, 'started': 0, 'completed': 0, 'cancelled': 0,
+                       'wait_total': 0.0, 'wait_max': 0.0}
+            for priority in PRIORITY_NAMES
+        }
+        self._threads = [threading.Thread(target=self._worker, name=f"synth-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable, *args, priority: int = BATCH, token: Optional[CancelToken] = None,
+               **kwargs) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("合成キューは停止しています")
+            self._queues[priority].append((time.perf_counter(), future, token, fn, args, kwargs))
+            self._metrics[priority]['submitted'] += 1
+            self._cond.notify_all()
+        return future
+
+    def executor(self, priority: int = BATCH, token: Optional[CancelToken] = None) -> "PriorityExecutor":
+        """submit(fn, *args) だけを持つ、指定の優先度で投入する窓口（LengthBucketScheduler に渡す用）"""
+        return PriorityExecutor(self, priority, token)
+
+    def stats(self) -> Dict:
+        """優先度クラスごとの件数とキュー待ち時間"""
+        with self._cond:
+            stats = {}
+            for priority, name in PRIORITY_NAMES.items():
+                metrics = dict(self._metrics[priority])
+                metrics['queued'] = len(self._queues[priority])
+                metrics['wait_avg'] = metrics['wait_total'] / metrics['started'] if metrics['started'] else 0.0
+                stats[name] = metrics
+            stats['running_batch'] = self._running_batch
+        return stats
+
+    def shutdown(self):
+        """待っているジョブを取り消してワーカーを止める（実行中のジョブは最後まで走る）"""
+        with self._cond:
+            self._closed = True
+            for queue in self._queues.values():
+                while queue:
+                    queue.popleft()[1].cancel()
+            self._cond.notify_all()
+
+    # ---------- ワーカー ----------
+    def _take(self):
+        """次に実行するジョブ（ロックを持った状態で呼ぶ）。無ければ None"""
+        interactive, batch = self._queues[INTERACTIVE], self._queues[BATCH]
+        batch_ready = batch and self._running_batch < self.batch_slots
+        if batch_ready and (not interactive or self._streak >= self.batch_every):
+            self._streak = 0
+            return BATCH, batch.popleft()
+        if interactive:
+            self._streak = self._streak + 1 if batch else 0
+            return INTERACTIVE, interactive.popleft()
+        speculative = self._queues[SPECULATIVE]
+        # 取り消された先読みは枠が空くのを待たずに捨てる（待っている先読み側がすぐ戻れるように）
+        while speculative and speculative[0][2] is not None and speculative[0][2].cancelled:
+            speculative.popleft()[1].cancel()
+            self._metrics[SPECULATIVE]['cancelled'] += 1
+        if speculative and self._running_batch < self.batch_slots:
+            return SPECULATIVE, speculative.popleft()
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                item = None
+                while not self._closed and item is None:
+                    item = self._take()
+                    if item is None:
+                        self._cond.wait()
+                if item is None:
+                    return
+                priority, (queued, future, token, fn, args, kwargs) = item
+                metrics = self._metrics[priority]
+                if token is not None and token.cancelled:
+                    future.cancel()
+                    metrics['cancelled'] += 1
+                    continue
+                if not future.set_running_or_notify_cancel():
+                    metrics['cancelled'] += 1
+                    continue
+                wait = time.perf_counter() - queued
+                metrics['started'] += 1
+                metrics['wait_total'] += wait
+                metrics['wait_max'] = max(metrics['wait_max'], wait)
+                if priority != INTERACTIVE:
+                    self._running_batch += 1
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                with self._cond:
+                    metrics['completed'] += 1
+                    if priority != INTERACTIVE:
+                        self._running_batch -= 1
+                    self._cond.notify_all()
+
+
+class PriorityExecutor:
+    """PriorityScheduler に決まった優先度で投入する窓口"""
+
+    def __init__(self, scheduler: PriorityScheduler, priority: int, token: Optional[CancelToken] = None):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.token = token
+
+    @property
+    def workers(self) -> int:
+        if self.priority == BATCH:
+            return self.scheduler.batch_slots
+        return self.scheduler.workers
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        return self.scheduler.submit(fn, *args, priority=self.priority, token=self.token, **kwargs)
@@ -0,0 +1,80 @@
+"""Style-Bert-VITS2 内部関数へのフック
+
+infer.get_text などはモジュール属性経由で関数を呼ぶため、その属性を
+キャッシュ付きの関数に差し替えることで、ライブラリ本体を改変せずに処理を挟む。
+"""
+
+# (モジュール名, 属性名) -> 差し替え前の関数
+_originals = {}
+
+
+def _install(module, attr, make_wrapper):
+    """module.attr を make_wrapper(original) で差し替える（再インストール時も二重ラップしない）"""
+    key = (module.__name__, attr)
+    if key not in _originals:
+        original = getattr(module, attr, None)
+        if original is None:
+            return False
+        _originals[key] = original
+    setattr(module, attr, make_wrapper(_originals[key]))
+    return True
+
+
+def install_frontend_cache(cache):
+    """clean_text（正規化・g2p・アクセント）をキャッシュ経由にする"""
+    try:
+        from style_bert_vits2.models import infer as sbv2_infer
+    except ImportError:
+        return False
+
+    def make_wrapper(original):
+        def cached_clean_text(text, language, use_jp_extra=True, raise_yomi_error=False):
+            key = cache.make_key(text, language, use_jp_extra)
+            result = cache.get(key)
+            if result is not None:
+                return result
+            result = original(text, language, use_jp_extra=use_jp_extra, raise_yomi_error=raise_yomi_error)
+            cache.put(key, result)
+            return result
+        return cached_clean_text
+
+    return _install(sbv2_infer, "clean_text", make_wrapper)
+
+
+def install_bert_cache(cache):
+    """extract_bert_feature（deberta の forward）をキャッシュ経由にする"""
+    try:
+        from style_bert_vits2.models import infer as sbv2_infer
+    except ImportError:
+        return False
+
+    def make_wrapper(original):
+        def cached_extract_bert_feature(text, word2ph, language, device, assist_text=None, assist_text_weight=0.7):
+            key = cache.make_key(text, word2ph, language, assist_text, assist_text_weight)
+            feature = cache.get(key)
+            if feature is not None:
+                return feature
+            feature = original(text, word2ph, language, device, assist_text, assist_text_weight)
+            return cache.put(key, feature)
+        return cached_extract_bert_feature
+
+    return _install(sbv2_infer, "extract_bert_feature", make_wrapper)
+
+
+def install_mmap_weight_loader():
+    """safetensors の読み込みをメモリマップ版にする（失敗時は元の関数で読み込む）"""
+    try:
+        from style_bert_vits2.models.utils import safetensors as sbv2_safetensors
+    except ImportError:
+        return False
+    from .weight_loader import load_safetensors_mmap
+
+    def make_wrapper(original):
+        def mmap_load_safetensors(checkpoint_path, model, for_infer=False, device="cpu"):
+            try:
+                return load_safetensors_mmap(checkpoint_path, model, for_infer, device)
+            except Exception:
+                return original(checkpoint_path, model, for_infer, device)
+        return mmap_load_safetensors
+
+    return _install(sbv2_safetensors, "load_safetensors", make_wrapper)
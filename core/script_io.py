@@ -0,0 +1,90 @@
+import csv
+import json
+import os
+from typing import Dict, Iterator
+
+from .script_store import DEFAULT_PARAMETERS
+
+# 台本ファイルで受け付ける列名
+TEXT_KEYS = ('text', 'テキスト')
+MODEL_KEYS = ('model', 'model_id', 'モデル')  # モデルのIDまたは履歴上の名前
+PARAM_KEYS = tuple(DEFAULT_PARAMETERS)
+
+
+def _parse_row(record: Dict) -> Dict:
+    """1行分のレコードを {'text', 'parameters', 'model'} に変換（不正な値の列は無視）"""
+    text = ""
+    for key in TEXT_KEYS:
+        if record.get(key):
+            text = str(record[key]).strip()
+            break
+    params = {}
+    for key in PARAM_KEYS:
+        value = record.get(key)
+        if value in (None, ""):
+            continue
+        if key == 'style':
+            params[key] = str(value).strip()
+        else:
+            try:
+                params[key] = float(value)
+            except (TypeError, ValueError):
+                continue
+    model = ""
+    for key in MODEL_KEYS:
+        if record.get(key):
+            model = str(record[key]).strip()
+            break
+    return {'text': text, 'parameters': params, 'model': model}
+
+
+def _iter_delimited(path: str, delimiter: str) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [h.strip() for h in header]
+        if not any(h in TEXT_KEYS for h in header):
+            # ヘッダーなし：1列目をテキストとして扱う
+            if header and header[0]:
+                yield {'text': header[0], 'parameters': {}}
+            for row in reader:
+                if row and row[0].strip():
+                    yield {'text': row[0].strip(), 'parameters': {}}
+            return
+        for row in reader:
+            parsed = _parse_row(dict(zip(header, row)))
+            if parsed['text']:
+                yield parsed
+
+
+def _iter_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, str):
+                record = {'text': record}
+            if isinstance(record, dict):
+                # パラメータが入れ子でも平坦でも受け付ける
+                merged = dict(record.get('parameters') or {})
+                merged.update(record)
+                parsed = _parse_row(merged)
+                if parsed['text']:
+                    yield parsed
+
+
+def iter_script_rows(path: str) -> Iterator[Dict]:
+    """CSV / TSV / JSONL の台本を1行ずつ読み出す（全体をメモリに読み込まない）"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.jsonl', '.ndjson'):
+        return _iter_jsonl(path)
+    if ext in ('.tsv', '.tab'):
+        return _iter_delimited(path, '\t')
+    return _iter_delimited(path, ',')
@@ -0,0 +1,187 @@
+import uuid
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+# 既定の合成パラメータ（行ごとに上書き）
+DEFAULT_PARAMETERS = {
+    'style': 'Neutral',
+    'style_weight': 1.0,
+    'length_scale': 0.85,
+    'pitch_scale': 1.0,
+    'intonation_scale': 1.0,
+    'sdp_ratio': 0.25,
+    'noise': 0.35,
+}
+
+# 数値パラメータ（列ごとに float32 の配列で持つ）
+NUMERIC_KEYS = ('style_weight', 'length_scale', 'pitch_scale', 'intonation_scale', 'sdp_ratio', 'noise')
+
+
+def _round(value: float) -> float:
+    # float32 に格納するので、UIの刻み（0.01）に丸めて元の値に戻す
+    return round(float(value), 4)
+
+
+class ScriptStore:
+    """台本の行データを列ごとにまとめて持つストア
+
+    行ごとにウィジェットや辞書を作らず、テキストはリスト、数値パラメータは
+    array('f')、スタイルとモデルは名前表へのインデックス（array('H')）で保持する。
+    1万行以上でもメモリと走査コストが小さい。
+
+    モデルは ModelManager のID。空文字は「読み込み中のモデル」を表す。
+    行ごとに版番号（revisions）を持ち、テキスト・パラメータ・モデルが変わるたびに進める。
+    """
+
+    def __init__(self):
+        self.row_ids: List[str] = []
+        self.texts: List[str] = []
+        self.styles: List[str] = []  # スタイル名表
+        self._style_ids: Dict[str, int] = {}
+        self.style_index = array('H')
+        self.models: List[str] = [""]  # モデルID表（0 は読み込み中のモデル）
+        self._model_ids: Dict[str, int] = {"": 0}
+        self.model_index = array('H')
+        self.columns = {key: array('f') for key in NUMERIC_KEYS}
+        self.revisions = array('L')
+        self._index: Optional[Dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    # ---------- 参照 ----------
+    def index_of(self, row_id: str) -> int:
+        """行IDから行番号（0始まり）。無ければ -1"""
+        if self._index is None:
+            self._index = {rid: i for i, rid in enumerate(self.row_ids)}
+        return self._index.get(row_id, -1)
+
+    def row_id_at(self, index: int) -> str:
+        return self.row_ids[index]
+
+    def text(self, index: int) -> str:
+        return self.texts[index]
+
+    def style(self, index: int) -> str:
+        return self.styles[self.style_index[index]]
+
+    def model_id(self, index: int) -> str:
+        return self.models[self.model_index[index]]
+
+    def used_models(self) -> List[str]:
+        """台本で使われているモデルID（出現順）"""
+        seen = {}
+        for mid in self.model_index:
+            seen.setdefault(mid, None)
+        return [self.models[mid] for mid in seen]
+
+    def revision(self, index: int) -> int:
+        return self.revisions[index]
+
+    def snapshot(self) -> Dict[str, int]:
+        """全行の版番号（row_id -> 版）。あとで changed_since に渡して変わった行を調べる"""
+        return dict(zip(self.row_ids, self.revisions))
+
+    def changed_since(self, snapshot: Dict[str, int]) -> List[str]:
+        """snapshot 以降に追加・変更された行のID"""
+        return [rid for rid, rev in zip(self.row_ids, self.revisions) if snapshot.get(rid) != rev]
+
+    def value(self, index: int, key: str):
+        if key == 'style':
+            return self.style(index)
+        return _round(self.columns[key][index])
+
+    def parameters(self, index: int) -> Dict:
+        params = {'style': self.style(index)}
+        for key in NUMERIC_KEYS:
+            params[key] = _round(self.columns[key][index])
+        return params
+
+    def rows(self) -> Iterator[Dict]:
+        """全行を {'row_id', 'text', 'parameters', 'model_id'} として順に返す"""
+        for i in range(len(self.row_ids)):
+            yield {'row_id': self.row_ids[i], 'text': self.texts[i], 'parameters': self.parameters(i),
+                   'model_id': self.model_id(i)}
+
+    # ---------- 変更 ----------
+    def _style_id(self, name: str) -> int:
+        sid = self._style_ids.get(name)
+        if sid is None:
+            sid = len(self.styles)
+            self.styles.append(name)
+            self._style_ids[name] = sid
+        return sid
+
+    def _model_table_id(self, model_id: str) -> int:
+        mid = self._model_ids.get(model_id)
+        if mid is None:
+            mid = len(self.models)
+            self.models.append(model_id)
+            self._model_ids[model_id] = mid
+        return mid
+
+    def insert_row(self, index: Optional[int] = None, text: str = "", parameters: Optional[Dict] = None,
+                   row_id: Optional[str] = None, model_id: str = "") -> str:
+        """行を挿入（index 省略時は末尾）して行IDを返す"""
+        params = dict(DEFAULT_PARAMETERS)
+        if parameters:
+            params.update(parameters)
+        row_id = row_id or uuid.uuid4().hex[:8]
+        if index is None or index >= len(self.row_ids):
+            index = len(self.row_ids)
+            if self._index is not None:
+                self._index[row_id] = index
+        else:
+            self._index = None  # 途中挿入は行番号がずれるので作り直す
+        self.row_ids.insert(index, row_id)
+        self.texts.insert(index, text)
+        self.style_index.insert(index, self._style_id(params['style']))
+        self.model_index.insert(index, self._model_table_id(model_id or ""))
+        self.revisions.insert(index, 0)
+        for key in NUMERIC_KEYS:
+            self.columns[key].insert(index, float(params[key]))
+        return row_id
+
+    def remove_row(self, index: int):
+        del self.row_ids[index]
+        del self.texts[index]
+        del self.style_index[index]
+        del self.model_index[index]
+        del self.revisions[index]
+        for key in NUMERIC_KEYS:
+            del self.columns[key][index]
+        self._index = None
+
+    def set_text(self, index: int, text: str):
+        if text != self.texts[index]:
+            self.texts[index] = text
+            self.revisions[index] += 1
+
+    def set_model(self, index: int, model_id: str):
+        mid = self._model_table_id(model_id or "")
+        if mid != self.model_index[index]:
+            self.model_index[index] = mid
+            self.revisions[index] += 1
+
+    def set_value(self, index: int, key: str, value):
+        if key == 'style':
+            sid = self._style_id(value)
+            if sid != self.style_index[index]:
+                self.style_index[index] = sid
+                self.revisions[index] += 1
+        elif key in self.columns and _round(value) != _round(self.columns[key][index]):
+            self.columns[key][index] = float(value)
+            self.revisions[index] += 1
+
+    def set_parameters(self, index: int, parameters: Dict):
+        for key, value in parameters.items():
+            self.set_value(index, key, value)
+
+    def clear(self):
+        self.row_ids.clear()
+        self.texts.clear()
+        self.style_index = array('H')
+        self.model_index = array('H')
+        self.columns = {key: array('f') for key in NUMERIC_KEYS}
+        self.revisions = array('L')
+        self._index = {}
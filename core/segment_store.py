@@ -0,0 +1,97 @@
+import io
+import os
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from utils.file_utils import atomic_write_bytes
+
+
+class SegmentStore:
+    """合成済みの行の音声をディスクに残すストア（合成キーごとに1ファイル）
+
+    合成結果キャッシュ（メモリ）の後ろに置き、前回の書き出しやアプリの再起動をまたいで
+    変わっていない行の音声を使い回す。合成にかかった時間も一緒に記録し、節約できた時間の集計に使う。
+    合計サイズが上限を超えたら、最後に使ってから長いものから削除する。
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None  # 合計サイズ（初回の書き込み時に数える）
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[Tuple[int, np.ndarray, float]]:
+        """(サンプルレート, 音声, 合成にかかった秒数)。無ければ None"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                result = int(data['sr']), data['audio'], float(data['seconds'])
+            os.utime(path)  # 最終使用時刻（LRU用）
+            return result
+        except Exception as e:
+            print(f"音声キャッシュ読み込みエラー: {e}")
+            return None
+
+    def render_seconds(self, key: str) -> Optional[float]:
+        """記録されている合成時間（音声は読まない）"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return float(data['seconds'])
+        except Exception:
+            return None
+
+    def put(self, key: str, sr: int, audio: np.ndarray, seconds: float):
+        buf = io.BytesIO()
+        np.savez(buf, audio=audio, sr=np.int64(sr), seconds=np.float64(seconds))
+        data = buf.getvalue()
+        path = self._path(key)
+        try:
+            old_size = os.path.getsize(path)  # 上書きなら前のファイルの分を差し引く
+        except OSError:
+            old_size = 0
+        try:
+            atomic_write_bytes(path, data, suffix=".npz")
+        except OSError as e:
+            print(f"音声キャッシュ保存エラー: {e}")
+            return
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan_total()
+            else:
+                self._total += len(data) - old_size
+            if self._total > self.max_bytes:
+                self._evict(keep=key)
+
+    def _scan_total(self) -> int:
+        return sum(e.stat().st_size for e in os.scandir(self.directory) if e.is_file())
+
+    def _evict(self, keep: str):
+        """合計サイズが上限の8割になるまで古いファイルから削除"""
+        entries = sorted(
+            (e.stat().st_mtime, e.path, e.stat().st_size)
+            for e in os.scandir(self.directory) if e.is_file() and e.name.endswith(".npz")
+        )
+        keep_path = self._path(keep)
+        for _, path, size in entries:
+            if self._total <= self.max_bytes * 0.8:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+                self._total -= size
+            except OSError:
+                pass
@@ -0,0 +1,199 @@
+import ctypes
+import threading
+import time
+import weakref
+from collections import deque
+from multiprocessing import Pipe, shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 割り当ての単位（キャッシュラインに揃える）
+ALIGN = 64
+
+
+def _attach(name: str, untrack: bool = True) -> shared_memory.SharedMemory:
+    """既存の共有メモリを開く（作った側が片付けるので、このプロセスの resource_tracker には登録しない）"""
+    shm = shared_memory.SharedMemory(name=name)
+    if not untrack:
+        return shm
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+class ArenaAllocator:
+    """共有メモリ上の領域の割り当て（先頭から空きを探す。解放時に隣の空きとまとめる）"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._free: List[Tuple[int, int]] = [(0, size)]  # (オフセット, 長さ) をオフセット順に
+        self._used: Dict[int, int] = {}
+
+    def alloc(self, nbytes: int) -> Optional[int]:
+        nbytes = max(-(-nbytes // ALIGN) * ALIGN, ALIGN)
+        for i, (offset, length) in enumerate(self._free):
+            if length >= nbytes:
+                if length == nbytes:
+                    del self._free[i]
+                else:
+                    self._free[i] = (offset + nbytes, length - nbytes)
+                self._used[offset] = nbytes
+                return offset
+        return None
+
+    def release(self, offset: int):
+        nbytes = self._used.pop(offset, None)
+        if nbytes is None:
+            return
+        free = self._free
+        i = 0
+        while i < len(free) and free[i][0] < offset:
+            i += 1
+        free.insert(i, (offset, nbytes))
+        # 後ろ、前の順に隣の空きとまとめる
+        if i + 1 < len(free) and offset + nbytes == free[i + 1][0]:
+            free[i] = (offset, nbytes + free.pop(i + 1)[1])
+        if i > 0 and free[i - 1][0] + free[i - 1][1] == free[i][0]:
+            free[i - 1] = (free[i - 1][0], free[i - 1][1] + free.pop(i)[1])
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(self._used.values())
+
+
+class ArenaWriter:
+    """デーモン側: クライアントが作った共有メモリを開き、合成結果を書き込む"""
+
+    def __init__(self, name: str, size: int, untrack: bool = True):
+        # untrack=False は同じプロセスで作った共有メモリを開くとき（ベンチマーク）
+        self.shm = _attach(name, untrack)
+        self.allocator = ArenaAllocator(min(size, self.shm.size))
+        self._lock = threading.Lock()
+        self.refs = 0  # この共有メモリを使っている接続の数
+
+    def write(self, audio: np.ndarray, freed: Sequence[int] = ()) -> Optional[Tuple[int, str, tuple]]:
+        """audio を書き込み (オフセット, dtype, shape) を返す。空きが無ければ None（呼び出し側で pickle に戻す）"""
+        audio = np.ascontiguousarray(audio)
+        with self._lock:
+            for offset in freed:
+                self.allocator.release(offset)
+            offset = self.allocator.alloc(audio.nbytes)
+        if offset is None:
+            return None
+        target = np.ndarray(audio.shape, dtype=audio.dtype, buffer=self.shm.buf, offset=offset)
+        target[...] = audio
+        del target
+        return offset, audio.dtype.str, audio.shape
+
+    def release(self, freed: Sequence[int]):
+        with self._lock:
+            for offset in freed:
+                self.allocator.release(offset)
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+
+
+class ArenaReader:
+    """クライアント側: 共有メモリを作り、書き込まれた音声をコピーせずに NumPy のビューとして返す
+
+    返した配列（とそこから作ったビュー）がすべて参照されなくなると、その領域を解放待ちに積む。
+    解放待ちのオフセットは次の要求と一緒にデーモンへ送り、デーモンが再利用する。
+    """
+
+    def __init__(self, size: int = 256 * 1024 * 1024):
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.size = size
+        self._freed = deque()  # GC から積まれる（ロックを取らない）
+        self._unlinked = False
+        self.stats = {'views': 0, 'bytes': 0}
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def attached(self):
+        """デーモンが開いたら名前を消す（以後はどちらかが落ちても OS が片付ける）"""
+        if not self._unlinked:
+            self._unlinked = True
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def take_freed(self) -> List[int]:
+        freed = []
+        while self._freed:
+            freed.append(self._freed.popleft())
+        return freed
+
+    def view(self, offset: int, dtype: str, shape: tuple) -> np.ndarray:
+        """書き込まれた領域の読み取り専用ビュー"""
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        lease = (ctypes.c_char * max(nbytes, 1)).from_buffer(self.shm.buf, offset)
+        weakref.finalize(lease, self._freed.append, offset)
+        array = np.frombuffer(lease, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+        array.flags.writeable = False
+        self.stats['views'] += 1
+        self.stats['bytes'] += nbytes
+        return array
+
+    def close(self):
+        self.attached()
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # まだビューが残っている（プロセス終了時に OS が片付ける）
+
+
+def benchmark_transport(durations: Sequence[float] = (1, 5, 20, 60), sr: int = 44100,
+                        repeat: int = 5) -> Dict:
+    """pickle（Pipe で配列ごと送る）と共有メモリ（書き込んで位置だけ送る）の往復時間を比べる
+
+    音声の長さ（秒）ごとに、送り側が配列を渡してから受け側が NumPy 配列を手にするまでの時間（ミリ秒）を返す。
+    """
+    results = {}
+    reader = ArenaReader(size=int(max(durations) * sr * 4 * 2) + ALIGN)
+    writer = ArenaWriter(reader.name, reader.size, untrack=False)
+    reader.attached()
+    try:
+        for seconds in durations:
+            audio = np.random.default_rng(0).standard_normal(int(seconds * sr)).astype(np.float32)
+            timings = {'pickle': [], 'shared_memory': []}
+            for _ in range(repeat):
+                for label in timings:
+                    sender, receiver = Pipe()
+
+                    def send():
+                        if label == 'pickle':
+                            sender.send(audio)
+                        else:
+                            sender.send(writer.write(audio, reader.take_freed()))
+
+                    start = time.perf_counter()
+                    thread = threading.Thread(target=send)
+                    thread.start()
+                    message = receiver.recv()
+                    received = message if label == 'pickle' else reader.view(*message)
+                    timings[label].append(time.perf_counter() - start)
+                    thread.join()
+                    assert received.shape == audio.shape
+                    del received
+                    sender.close()
+                    receiver.close()
+            pickle_ms = min(timings['pickle']) * 1000
+            shm_ms = min(timings['shared_memory']) * 1000
+            results[seconds] = {'pickle_ms': pickle_ms, 'shared_memory_ms': shm_ms,
+                                'speedup': pickle_ms / shm_ms if shm_ms else 0.0}
+    finally:
+        writer.close()
+        reader.close()
+    return results
@@ -0,0 +1,53 @@
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class StyleTable:
+    """モデルごとのスタイル表（名前・ID・平均スタイルベクトル）
+
+    読み込み時に一度だけ作成する。style_vectors.npy はメモリマップで開くので、
+    実際に参照された行だけがディスクから読まれる。
+    """
+
+    def __init__(self, config_path: str, style_path: str):
+        self.config_path = config_path
+        self.style_path = style_path
+        self.style2id: Dict[str, int] = self._read_style2id(config_path)
+        self.vectors = np.load(style_path, mmap_mode='r')
+
+        # ベクトル数を超えるIDは使えないので除外
+        num_vectors = self.vectors.shape[0] if self.vectors.ndim > 1 else 0
+        self.style2id = {name: sid for name, sid in self.style2id.items() if 0 <= sid < num_vectors}
+        if not self.style2id and num_vectors:
+            self.style2id = {"Neutral": 0}
+        self.names: List[str] = sorted(self.style2id, key=self.style2id.get)
+
+    @staticmethod
+    def _read_style2id(config_path: str) -> Dict[str, int]:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        data = config.get('data', {})
+        style2id = data.get('style2id')
+        if isinstance(style2id, dict) and style2id:
+            return {str(name): int(sid) for name, sid in style2id.items()}
+        # 旧形式: 感情名のリストのみ
+        emotions = data.get('emotions') or config.get('emotions') or []
+        return {str(name): i for i, name in enumerate(emotions)}
+
+    def __contains__(self, name) -> bool:
+        return name in self.style2id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get_id(self, name: str) -> Optional[int]:
+        return self.style2id.get(name)
+
+    def get_vector(self, name: str) -> Optional[np.ndarray]:
+        """スタイルの平均ベクトル（メモリマップ上のビュー）を取得"""
+        sid = self.style2id.get(name)
+        if sid is None:
+            return None
+        return self.vectors[sid]
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+# 合成結果: (サンプルレート, 音声)
+SynthesisResult = Tuple[int, np.ndarray]
+
+
+def synthesis_key(text: str, parameters: Dict, model_id: Optional[str]) -> str:
+    """(テキスト, パラメータ, モデル) から合成ジョブのキーを作る"""
+    params = {k: (round(v, 4) if isinstance(v, float) else v) for k, v in parameters.items()}
+    payload = json.dumps([text, params, model_id], ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=10).hexdigest()
+
+
+class SynthesisCache:
+    """合成結果のキャッシュ（合計バイト数で上限管理）と実行中ジョブの共有
+
+    同じキーの合成が実行中なら、後から来た要求は新たに合成せずその結果を待つ。
+    waveforms（WaveformStore）を渡すと、格納時に波形ピラミッドも作って一緒に保存する。
+    segments（SegmentStore）を渡すと、合成した音声をディスクにも残し、メモリに無いときはそこから読む。
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, waveforms=None, segments=None):
+        self.max_bytes = max_bytes
+        self.waveforms = waveforms
+        self.segments = segments
+        self._entries: "OrderedDict[str, SynthesisResult]" = OrderedDict()
+        self._render_seconds: Dict[str, float] = {}  # キーごとの合成にかかった時間
+        self._bytes = 0
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # 実行中の合成を共有した回数
+        self.disk_hits = 0
+        self.saved_time = 0.0  # キャッシュから返したことで省けた合成時間
+
+    def get(self, key: str) -> Optional[SynthesisResult]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.segments is not None and key in self.segments
+
+    def render_seconds(self, key: str) -> Optional[float]:
+        """キャッシュにある音声の合成にかかった時間（無ければ None）"""
+        with self._lock:
+            seconds = self._render_seconds.get(key)
+        if seconds is None and self.segments is not None:
+            seconds = self.segments.render_seconds(key)
+        return seconds
+
+    def put(self, key: str, sr: int, audio: np.ndarray, seconds: Optional[float] = None,
+            persist: bool = True) -> SynthesisResult:
+        """格納する（persist=False はディスクから読んだ音声を戻すとき。波形と音声を書き直さない）"""
+        audio = np.asarray(audio)
+        audio.setflags(write=False)  # 共有するので書き換え不可にする
+        if persist:
+            if self.waveforms is not None:
+                self.waveforms.put(key, audio, sr)
+            if self.segments is not None and seconds is not None:
+                self.segments.put(key, sr, audio, seconds)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1].nbytes
+            if seconds is not None:
+                self._render_seconds[key] = seconds
+            if audio.nbytes <= self.max_bytes:
+                self._entries[key] = (sr, audio)
+                self._bytes += audio.nbytes
+                while self._bytes > self.max_bytes:
+                    evicted_key, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+                    self._render_seconds.pop(evicted_key, None)
+        return sr, audio
+
+    def get_or_compute(self, key: str, compute: Callable[[], SynthesisResult]) -> SynthesisResult:
+        """キャッシュにあれば返し、実行中なら待ち、無ければ compute() で合成して格納する"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_time += self._render_seconds.get(key, 0.0)
+                return result
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not owner:
+            return future.result()
+        try:
+            stored = self.segments.get(key) if self.segments is not None else None
+            if stored is not None:
+                sr, audio, seconds = stored
+                result = self.put(key, sr, audio, seconds, persist=False)
+                with self._lock:
+                    self.misses -= 1
+                    self.disk_hits += 1
+                    self.saved_time += seconds
+            else:
+                start = time.perf_counter()
+                sr, audio = compute()
+                result = self.put(key, sr, audio, time.perf_counter() - start)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._render_seconds.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses + self.shared
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'shared': self.shared,
+                'hit_rate': (self.hits + self.disk_hits + self.shared) / total if total else 0.0,
+                'saved_time': self.saved_time,
+            }
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from .job_scheduler import estimate_cost
+from .priority_scheduler import CancelToken, JobCancelled
+
+
+class JobProgress:
+    """行ごとの進み具合と残り時間の見積もり
+
+    残り時間 = 残りの行のコスト（モーラ数）× 1モーラあたりの音声秒数 × 直近の実時間係数（RTF）。
+    RTF は直近 window 行の「前の行が終わってからの経過時間 / 合成した音声の秒数」なので、
+    並列合成やキャッシュヒットの効き具合も含めた実測の速さになる。
+    """
+
+    def __init__(self, texts: List[str], window: int = 20):
+        self.costs = [estimate_cost(text) for text in texts]
+        self.total = len(self.costs)
+        self.done = 0
+        self.remaining_cost = sum(self.costs)
+        self.started = time.perf_counter()
+        self._last = self.started
+        self._recent = deque(maxlen=window)  # (経過時間, 音声秒数)
+        self._audio_seconds = 0.0
+        self._rendered_cost = 0.0
+
+    def advance(self, audio_seconds: float = 0.0):
+        """1行終わった（audio_seconds: 合成した音声の長さ。複製・スキップした行は 0）"""
+        now = time.perf_counter()
+        cost = self.costs[self.done] if self.done < self.total else 0.0
+        self.done += 1
+        self.remaining_cost = max(self.remaining_cost - cost, 0.0)
+        if audio_seconds > 0:
+            self._recent.append((now - self._last, audio_seconds))
+            self._audio_seconds += audio_seconds
+            self._rendered_cost += cost
+        self._last = now
+
+    @property
+    def rtf(self) -> Optional[float]:
+        audio = sum(seconds for _, seconds in self._recent)
+        return sum(wall for wall, _ in self._recent) / audio if audio else None
+
+    @property
+    def eta(self) -> Optional[float]:
+        """残り秒数（まだ1行も合成していなければ None）"""
+        rtf = self.rtf
+        if rtf is None or not self._rendered_cost:
+            return None
+        return self.remaining_cost * (self._audio_seconds / self._rendered_cost) * rtf
+
+    def snapshot(self) -> Dict:
+        return {
+            'done': self.done,
+            'total': self.total,
+            'elapsed': time.perf_counter() - self.started,
+            'rtf': self.rtf,
+            'eta': self.eta,
+        }
+
+
+class SynthesisJob:
+    """バックグラウンドで走る長い合成ジョブ（連続再生・書き出し）
+
+    run(job) を別スレッドで実行する。run は行を1つ終えるたびに job.advance() を呼び、
+    行と行の間で job.check() を呼ぶ（取り消されていれば JobCancelled を投げて抜ける）。
+    取り消しは協調的なので、実行中の infer は最後まで走り、その結果は捨てられる。
+    on_progress(snapshot) と on_done(job) はジョブのスレッドから呼ばれる。
+    """
+
+    def __init__(self, name: str, texts: List[str], run: Callable, on_progress: Optional[Callable] = None,
+                 on_done: Optional[Callable] = None):
+        self.name = name
+        self.token = CancelToken()
+        self.progress = JobProgress(texts)
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self._run = run
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._main, name=f"job-{name}", daemon=True)
+
+    def start(self) -> "SynthesisJob":
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.token.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return isinstance(self.error, JobCancelled)
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def check(self):
+        self.token.check()
+
+    def advance(self, audio_seconds: float = 0.0):
+        self.progress.advance(audio_seconds)
+        if self.on_progress:
+            snapshot = self.progress.snapshot()
+            snapshot['name'] = self.name
+            self.on_progress(snapshot)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def _main(self):
+        try:
+            self.result = self._run(self)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._finished.set()
+            if self.on_done:
+                self.on_done(self)
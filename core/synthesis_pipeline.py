@@ -0,0 +1,201 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 後段への合図（フロントエンドのワーカーが全員終わった）
+_DONE = object()
+
+
+class SynthesisPipeline:
+    """フロントエンド（g2p・BERT）と音響モデル（VITS）を別々のスレッドで流すパイプライン
+
+    前段は engine.warm_frontend() で行ごとにテキスト処理と BERT 特徴量を計算してキャッシュに入れ、
+    長さ depth の有限キューに流す。後段はキューから取って合成する（フロントエンドはキャッシュに当たり、
+    音響モデルだけが走る）。前段は後段より多くても depth 行しか先に進まないので、BERT キャッシュを押し流さない。
+    executor（PriorityScheduler の窓口など）を渡すと、後段の合成はそこで実行する（優先度がそのまま効く）。
+    合成結果キャッシュにある行は前段を素通りする（skip_cached=False で常に前段を通す）。
+    bert_batch を 2 以上にすると、前段は次の bert_batch 行の BERT 特徴量を engine.warm_frontend_batch() で
+    まとめて計算してから1行ずつ流す（deberta の forward が行数より少なくて済む）。
+    結果は元の順序に並んだ Future で返す。
+    """
+
+    def __init__(self, engine, synthesize: Optional[Callable] = None, frontend_workers: int = 1,
+                 acoustic_workers: int = 1, depth: int = 4, executor=None, skip_cached: bool = True,
+                 bert_batch: int = 1):
+        self.engine = engine
+        self.synthesize = synthesize or engine.synthesize_cached
+        self.skip_cached = skip_cached
+        self.frontend_workers = max(1, frontend_workers)
+        self.acoustic_workers = max(1, getattr(executor, 'workers', acoustic_workers) if executor else acoustic_workers)
+        self.depth = max(1, depth)
+        self.bert_batch = max(1, bert_batch) if hasattr(engine, 'warm_frontend_batch') else 1
+        self.executor = executor
+        self._lock = threading.Lock()
+        self.last_stats: Dict = {}
+
+    def submit(self, jobs: Sequence[tuple], order: Optional[Sequence[int]] = None, token=None) -> List[Future]:
+        """ジョブ (テキスト, パラメータ) を order の順に流し、元の順序に並んだ Future を返す"""
+        jobs = list(jobs)
+        futures = [Future() for _ in jobs]
+        inbox = queue.Queue()
+        for i in (order if order is not None else range(len(jobs))):
+            inbox.put(i)
+        ready = queue.Queue(maxsize=self.depth)
+        stats = {
+            'jobs': len(jobs),
+            'depth': self.depth,
+            'frontend_workers': self.frontend_workers,
+            'acoustic_workers': self.acoustic_workers,
+            'frontend_busy': 0.0,
+            'frontend_blocked': 0.0,  # キューが満杯で後段を待った時間
+            'acoustic_busy': 0.0,
+            'acoustic_starved': 0.0,  # キューが空で前段を待った時間
+            'warmed': 0,
+            'batched': 0,  # まとめて BERT を計算した行
+            'started': time.perf_counter(),
+            'finished': None,
+        }
+        remaining = [len(jobs), self.frontend_workers]
+
+        def add(key, value):
+            with self._lock:
+                stats[key] += value
+
+        def needs_frontend(i):
+            return not (self.skip_cached and
+                        self.engine.synthesis_key(jobs[i][0], **jobs[i][1]) in self.engine.synthesis_cache)
+
+        def frontend():
+            while True:
+                batch = []
+                while len(batch) < self.bert_batch:
+                    try:
+                        batch.append(inbox.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+                todo = []
+                if token is None or not token.cancelled:
+                    start = time.perf_counter()
+                    todo = [i for i in batch if needs_frontend(i)]
+                    if len(todo) > 1:
+                        add('batched', self.engine.warm_frontend_batch([jobs[i][0] for i in todo]))
+                    add('frontend_busy', time.perf_counter() - start)
+                for i in batch:
+                    if token is None or not token.cancelled:
+                        start = time.perf_counter()
+                        # まとめて計算した行は BERT がキャッシュに当たり、g2p だけ（これもキャッシュ済み）になる
+                        if i in todo and self.engine.warm_frontend(jobs[i][0]):
+                            add('warmed', 1)
+                        add('frontend_busy', time.perf_counter() - start)
+                    start = time.perf_counter()
+                    ready.put(i)
+                    add('frontend_blocked', time.perf_counter() - start)
+            with self._lock:
+                remaining[1] -= 1
+                last = remaining[1] == 0
+            if last:
+                for _ in range(self.acoustic_workers):
+                    ready.put(_DONE)
+
+        def run(i):
+            if token is not None:
+                token.check()
+            text, parameters = jobs[i][0], jobs[i][1]
+            return self.synthesize(text, **parameters)
+
+        def acoustic():
+            while True:
+                start = time.perf_counter()
+                i = ready.get()
+                add('acoustic_starved', time.perf_counter() - start)
+                if i is _DONE:
+                    return
+                if not futures[i].set_running_or_notify_cancel():
+                    self._finish(stats, remaining)
+                    continue
+                start = time.perf_counter()
+                try:
+                    if self.executor is not None:
+                        result = self.executor.submit(run, i).result()
+                    else:
+                        result = run(i)
+                except Exception as e:
+                    futures[i].set_exception(e)
+                else:
+                    futures[i].set_result(result)
+                add('acoustic_busy', time.perf_counter() - start)
+                self._finish(stats, remaining)
+
+        self.last_stats = stats
+        if not jobs:
+            stats['finished'] = stats['started']
+            return futures
+        for n in range(self.frontend_workers):
+            threading.Thread(target=frontend, name=f"pipeline-frontend-{n}", daemon=True).start()
+        for n in range(self.acoustic_workers):
+            threading.Thread(target=acoustic, name=f"pipeline-acoustic-{n}", daemon=True).start()
+        return futures
+
+    def _finish(self, stats, remaining):
+        with self._lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                stats['finished'] = time.perf_counter()
+
+    def map(self, jobs: Sequence[tuple], order: Optional[Sequence[int]] = None, token=None):
+        """結果を元の順序で返す"""
+        futures = self.submit(jobs, order=order, token=token)
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def stats(self) -> Dict:
+        """直近の投入分の段ごとの稼働率とスループット"""
+        with self._lock:
+            stats = dict(self.last_stats)
+        if not stats:
+            return {}
+        end = stats.pop('finished') or time.perf_counter()
+        wall = max(end - stats.pop('started'), 1e-9)
+        stats['wall_time'] = wall
+        stats['frontend_utilization'] = stats['frontend_busy'] / (wall * stats['frontend_workers'])
+        stats['acoustic_utilization'] = stats['acoustic_busy'] / (wall * stats['acoustic_workers'])
+        stats['jobs_per_sec'] = stats['jobs'] / wall
+        return stats
+
+
+def benchmark_pipeline(engine, jobs: Sequence[tuple], frontend_workers: int = 1, acoustic_workers: int = 1,
+                       depth: int = 4, bert_batch: int = 1) -> Dict:
+    """同じジョブを逐次（1行ずつ infer）とパイプラインで合成し、スループットを比べる
+
+    どちらも合成結果キャッシュを通さず、毎回テキスト処理と BERT のキャッシュを空にしてから測る。
+    """
+    def clear():
+        engine.frontend_cache.clear()
+        engine.bert_cache.clear()
+
+    clear()
+    start = time.perf_counter()
+    for text, parameters, *_ in jobs:
+        engine.synthesize(text, **parameters)
+    sequential = time.perf_counter() - start
+
+    clear()
+    pipeline = SynthesisPipeline(engine, synthesize=engine.synthesize, frontend_workers=frontend_workers,
+                                 acoustic_workers=acoustic_workers, depth=depth, skip_cached=False,
+                                 bert_batch=bert_batch)
+    for _ in pipeline.map([(job[0], job[1]) for job in jobs]):
+        pass
+    stats = pipeline.stats()
+    return {
+        'sequential': {'wall_time': sequential, 'jobs_per_sec': len(jobs) / sequential if sequential else 0.0},
+        'pipeline': stats,
+        'speedup': sequential / stats['wall_time'] if stats.get('wall_time') else 0.0,
+    }
@@ -0,0 +1,412 @@
+import argparse
+import os
+import secrets
+import threading
+from contextlib import contextmanager
+from multiprocessing.connection import Client, Listener
+from multiprocessing import AuthenticationError
+from typing import Dict, Optional
+
+from .engine_pool import EnginePool
+from .model_manager import ModelManager
+from .shm_transport import ArenaReader, ArenaWriter
+from .tts_engine import TTSEngine
+from utils.file_utils import atomic_write_json, read_json
+
+# 起動中のデーモンの接続先と認証鍵（本人だけが読めるよう 0600 で書く）
+DAEMON_INFO_NAME = "daemon.json"
+
+
+def daemon_info_path(cache_dir: str) -> str:
+    return os.path.join(cache_dir, DAEMON_INFO_NAME)
+
+
+class TTSDaemon:
+    """モデルを読み込んだまま常駐し、ローカルの接続に合成を提供するデーモン
+
+    スタジオを何個起動しても、スクリプトから使っても、BERT と VITS のモデルはこのプロセスに1つだけ載る。
+    接続は 127.0.0.1 のみで受け付け、cache/daemon.json に書いた認証鍵を知っているプロセスだけが使える。
+    要求は (コマンド, 引数...) のタプル、応答は ('ok', 結果) または ('error', メッセージ)。
+    接続ごとにスレッドを1つ使うので、1つのクライアントは並列に合成したければ接続を複数張る。
+    合成した音声は、クライアントが用意した共有メモリ（attach_arena）に書いて位置だけを返す。
+    共有メモリは、それを使った接続がすべて閉じたら手放す。
+    """
+
+    def __init__(self, cache_dir: str = "cache", host: str = "127.0.0.1", port: int = 0,
+                 memory_budget: int = 4 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.engine = TTSEngine(cache_dir=cache_dir)
+        self.pool = EnginePool(self.engine, ModelManager(), memory_budget=memory_budget)
+        self.authkey = secrets.token_bytes(32)
+        self.listener = Listener((host, port), authkey=self.authkey)
+        self._load_lock = threading.Lock()
+        # クライアントが cmd_load で送ったファイルの場所（プールから解放されたモデルを読み込み直すときに使う。
+        # デーモンの ModelManager の履歴は起動時に読んだきりなので、後から読み込んだモデルはそこに無い）
+        self._model_paths: Dict[str, Dict] = {}
+        self._arenas: Dict[str, ArenaWriter] = {}  # 共有メモリ名 -> 書き込み先
+        self._arena_lock = threading.Lock()
+        self._running = True
+        self.stats = {'connections': 0, 'requests': 0, 'errors': 0}
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def serve_forever(self):
+        host, port = self.address
+        atomic_write_json(daemon_info_path(self.cache_dir),
+                          {'host': host, 'port': port, 'authkey': self.authkey.hex(), 'pid': os.getpid()},
+                          mode=0o600)
+        print(f"合成デーモン起動: {host}:{port}")
+        try:
+            while self._running:
+                try:
+                    conn = self.listener.accept()
+                except AuthenticationError:
+                    continue  # 鍵を知らない接続
+                except OSError:
+                    break
+                if not self._running:
+                    conn.close()  # shutdown が accept を起こすために張った接続
+                    break
+                self.stats['connections'] += 1
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self._cleanup()
+
+    def shutdown(self):
+        """待ち受けを止める（accept はソケットを閉じても戻らないので、自分に接続して起こす）"""
+        self._running = False
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except Exception:
+            pass
+
+    def _cleanup(self):
+        self.listener.close()
+        path = daemon_info_path(self.cache_dir)
+        info = read_json(path, default={}) or {}
+        if info.get('pid') == os.getpid() and os.path.exists(path):
+            os.remove(path)
+        self.engine.save_caches()
+        self.pool.release_all()
+
+    def _handle(self, conn):
+        arenas = set()  # この接続が使った共有メモリ
+        try:
+            with conn:
+                while True:
+                    try:
+                        command, *args = conn.recv()
+                    except (EOFError, OSError):
+                        return
+                    self.stats['requests'] += 1
+                    try:
+                        result = getattr(self, f"cmd_{command}")(*args)
+                    except Exception as e:
+                        self.stats['errors'] += 1
+                        conn.send(('error', f"{type(e).__name__}: {e}"))
+                    else:
+                        if command == "attach_arena":
+                            self._use_arena(args[0], arenas)
+                        elif command == "synthesize" and len(args) > 3 and args[3]:
+                            self._use_arena(args[3]['arena'], arenas)
+                        conn.send(('ok', result))
+                    if command == "shutdown":
+                        return
+        finally:
+            self._drop_arenas(arenas)
+
+    def _use_arena(self, name: str, arenas: set):
+        with self._arena_lock:
+            writer = self._arenas.get(name)
+            if writer is not None and name not in arenas:
+                arenas.add(name)
+                writer.refs += 1
+
+    def _drop_arenas(self, arenas: set):
+        with self._arena_lock:
+            for name in arenas:
+                writer = self._arenas.get(name)
+                if writer is None:
+                    continue
+                writer.refs -= 1
+                if writer.refs <= 0:
+                    del self._arenas[name]
+                    writer.close()
+
+    @contextmanager
+    def _engine(self, model_id: str):
+        """要求の間だけエンジンを借りる（合成中にプールから解放されないように）"""
+        with self.pool.lease(model_id, entry=self._model_paths.get(model_id)) as engine:
+            if not engine.is_loaded:
+                raise RuntimeError("モデルが読み込まれていません")
+            yield engine
+
+    # ---------- コマンド ----------
+    def cmd_ping(self) -> Dict:
+        return {'pid': os.getpid(), 'base_model_id': self.pool.base_model_id(), 'stats': dict(self.stats)}
+
+    def cmd_load(self, model_id: str, paths: Dict) -> Dict:
+        """モデルを読み込む（読み込み済みなら何もしない）。(モデル情報, スタイル名) を返す"""
+        if model_id:
+            self._model_paths[model_id] = dict(paths)
+        with self._load_lock:
+            if not self.engine.is_loaded:
+                if not self.engine.load_model(paths['model_path'], paths['config_path'], paths['style_path'],
+                                              model_id=model_id):
+                    raise RuntimeError("モデルの読み込みに失敗しました")
+                engine = self.engine
+            else:
+                engine = self.pool.acquire(model_id, entry=paths)
+        return {'model_info': engine.get_model_info(), 'styles': engine.get_available_styles()}
+
+    def cmd_attach_arena(self, name: str, size: int) -> bool:
+        with self._arena_lock:
+            if name not in self._arenas:
+                self._arenas[name] = ArenaWriter(name, size)
+        return True
+
+    def cmd_synthesize(self, model_id: str, text: str, parameters: Dict, transport: Optional[Dict] = None):
+        """('shm', sr, オフセット, dtype, shape) または ('inline', sr, 音声)
+
+        transport: {'arena': 共有メモリ名, 'free': クライアントが使い終えたオフセット}
+        共有メモリに空きが無いとき、または共有メモリを使わないクライアントには配列ごと返す。
+        """
+        writer = self._arenas.get(transport['arena']) if transport else None
+        if writer is not None and transport.get('free'):
+            writer.release(transport['free'])
+        with self._engine(model_id) as engine:
+            sr, audio = engine.synthesize_cached(text, **parameters)
+        placed = writer.write(audio) if writer is not None else None
+        if placed is None:
+            return ('inline', sr, audio)
+        return ('shm', sr) + placed
+
+    def cmd_phonemes(self, model_id: str, text: str):
+        with self._engine(model_id) as engine:
+            return engine.get_phonemes(text)
+
+    def cmd_stats(self) -> Dict:
+        with self._arena_lock:
+            arenas = {name: {'refs': w.refs, 'used_bytes': w.allocator.used_bytes, 'size': w.allocator.size}
+                      for name, w in self._arenas.items()}
+        return {'daemon': dict(self.stats), 'pool': dict(self.pool.stats), 'engine': self.engine.get_stats(),
+                'arenas': arenas}
+
+    def cmd_shutdown(self):
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        return True
+
+
+class RemoteTTSEngine(TTSEngine):
+    """合成をデーモンに任せる TTSEngine（このプロセスではモデルを読み込まない）
+
+    合成結果キャッシュ・波形・合成キーはローカルの TTSEngine と同じものを使うので、
+    メインウィンドウやスケジューラからはそのまま差し替えられる。
+    接続はスレッドごとに1本張る（Connection はスレッドセーフでないため）。
+    合成した音声は共有メモリ（arena_bytes バイト、spawn したエンジンとも共有）で受け取るので、
+    pickle にして Pipe で送る分の時間はかからない。arena_bytes=0 なら pickle で受け取る。
+    コピーせずに読み取り専用の NumPy 配列（共有メモリのビュー）を返すのは synthesize() だけで、
+    synthesize_cached() は合成結果キャッシュに入れる前に共有メモリからコピーする（キャッシュが領域を
+    握り続けると共有メモリが埋まり、以後の応答がすべて pickle に戻ってしまうため）。
+    ▶・先読み・書き出しはどれも synthesize_cached() を通るので、画面からの合成は1回コピーした配列を受け取る。
+    共有メモリが満杯で pickle に戻った回数は transport_stats() で分かる。
+    """
+
+    def __init__(self, address, authkey: bytes, cache_dir: Optional[str] = None,
+                 arena_bytes: int = 256 * 1024 * 1024):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self._init_synthesis_cache(cache_dir)
+        self.address = tuple(address)
+        self.authkey = authkey
+        self._local = threading.local()
+        self._styles = []
+        self.arena_bytes = arena_bytes
+        # spawn したエンジンと共有
+        self._arena = {'reader': None, 'lock': threading.Lock(),
+                       'stats': {'shm': 0, 'fallbacks': 0, 'copied_bytes': 0}}
+
+    def _arena_reader(self) -> Optional[ArenaReader]:
+        """共有メモリを作ってデーモンに開かせる（初回のみ。作れなければ None で pickle に戻す）"""
+        if not self.arena_bytes:
+            return None
+        with self._arena['lock']:
+            reader = self._arena['reader']
+            if reader is None:
+                try:
+                    reader = ArenaReader(self.arena_bytes)
+                    self._call("attach_arena", reader.name, reader.size)
+                    reader.attached()
+                except Exception as e:
+                    print(f"共有メモリ作成エラー: {e}")
+                    if reader is not None:
+                        reader.close()
+                    self.arena_bytes = 0
+                    return None
+                self._arena['reader'] = reader
+            return reader
+
+    def _call(self, command: str, *args):
+        conn = getattr(self._local, 'conn', None)
+        try:
+            if conn is None:
+                conn = self._local.conn = Client(self.address, authkey=self.authkey)
+            conn.send((command,) + args)
+            status, result = conn.recv()
+        except (EOFError, OSError, AuthenticationError) as e:
+            self._local.conn = None
+            raise RuntimeError(f"合成デーモンとの通信に失敗しました: {e}")
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def ping(self) -> Dict:
+        return self._call("ping")
+
+    def spawn(self):
+        engine = RemoteTTSEngine(self.address, self.authkey)
+        engine.cache_dir = self.cache_dir
+        engine.synthesis_cache = self.synthesis_cache
+        engine.waveforms = self.waveforms
+        engine.default_params = dict(self.default_params)
+        engine.arena_bytes = self.arena_bytes
+        engine._arena = self._arena
+        return engine
+
+    def load_model(self, model_path, config_path, style_path, model_id=None):
+        try:
+            result = self._call("load", model_id, {'model_path': model_path, 'config_path': config_path,
+                                                   'style_path': style_path})
+        except Exception as e:
+            print(f"デーモンでのモデル読み込みエラー: {e}")
+            self.is_loaded = False
+            return False
+        self.model_info = dict(result['model_info'], remote=True)
+        self._styles = list(result['styles'])
+        self.is_loaded = True
+        return True
+
+    def _remote_model_id(self):
+        return self.model_info.get('model_id') or ""
+
+    def synthesize(self, text, **params):
+        return self._synthesize(text, params, copy=False)
+
+    def synthesize_cached(self, text, **params):
+        """キャッシュ付きの音声合成。キャッシュに残る音声は共有メモリからコピーしておく
+
+        共有メモリのビューは返さない（コピーしないで受け取りたいときは synthesize() を使う）。
+        """
+        key = self.synthesis_key(text, **params)
+        return self.synthesis_cache.get_or_compute(key, lambda: self._synthesize(text, params, copy=True))
+
+    def _synthesize(self, text, params, copy: bool):
+        if not self.is_loaded:
+            raise RuntimeError("モデルが読み込まれていません")
+        if not text.strip():
+            raise ValueError("テキストが空です")
+        synth_params = self.default_params.copy()
+        synth_params.update(params)
+        reader = self._arena_reader()
+        transport = {'arena': reader.name, 'free': reader.take_freed()} if reader else None
+        kind, sr, *payload = self._call("synthesize", self._remote_model_id(), text, synth_params, transport)
+        if kind == 'shm':
+            audio = reader.view(*payload)
+            if copy:
+                # ビューを手放せば、その領域は次の要求でデーモンに返る
+                audio = audio.copy()
+        else:
+            audio = payload[0]
+        with self._arena['lock']:
+            counters = self._arena['stats']
+            if kind == 'shm':
+                counters['shm'] += 1
+                if copy:
+                    counters['copied_bytes'] += audio.nbytes
+            elif reader is not None:
+                # 共有メモリが満杯で pickle で送られてきた
+                counters['fallbacks'] += 1
+        with self._stats_lock:
+            self.stats['synth_calls'] += 1
+        return sr, audio
+
+    def get_phonemes(self, text):
+        if not self.is_loaded:
+            return []
+        try:
+            return self._call("phonemes", self._remote_model_id(), text)
+        except Exception as e:
+            print(f"音素取得エラー: {e}")
+            return []
+
+    def get_available_styles(self):
+        return list(self._styles) if self.is_loaded and self._styles else ["Neutral"]
+
+    def transport_stats(self) -> Dict:
+        """音声の受け取り方の内訳（共有メモリ / 満杯で pickle に戻った回数 / キャッシュ用にコピーしたバイト数）"""
+        with self._arena['lock']:
+            return dict(self._arena['stats'])
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats['transport'] = self.transport_stats()
+        try:
+            stats['daemon'] = self._call("stats")
+        except Exception:
+            stats['daemon'] = None
+        return stats
+
+    def unload_model(self):
+        """このプロセスの参照だけを外す（デーモン側のモデルは他のクライアントも使うので残す）"""
+        self.is_loaded = False
+        self.model_info = {}
+        self._styles = []
+
+    def close(self):
+        """接続と共有メモリを手放す（受け取った音声のビューが残っていれば、その分はプロセス終了時に解放）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        with self._arena['lock']:
+            reader, self._arena['reader'] = self._arena['reader'], None
+        if reader is not None:
+            reader.close()
+
+
+def attach_engine(cache_dir: str = "cache") -> Optional[RemoteTTSEngine]:
+    """デーモンが起動していれば接続したエンジンを返す。起動していなければ None"""
+    info = read_json(daemon_info_path(cache_dir), default=None)
+    if not info:
+        return None
+    try:
+        engine = RemoteTTSEngine((info['host'], info['port']), bytes.fromhex(info['authkey']), cache_dir=cache_dir)
+        engine.ping()
+    except Exception:
+        return None  # 前回のデーモンが残した古い情報
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="モデルを読み込んだまま常駐する合成デーモン")
+    parser.add_argument("--port", type=int, default=0, help="待ち受けるポート（0 なら空いているポート）")
+    parser.add_argument("--cache-dir", default="cache")
+    parser.add_argument("--model", help="起動時に読み込むモデル（履歴上のIDまたは名前）")
+    args = parser.parse_args()
+
+    daemon = TTSDaemon(cache_dir=args.cache_dir, port=args.port)
+    if args.model:
+        entry = daemon.pool.model_manager.find_model(args.model)
+        if not entry:
+            parser.error(f"履歴にないモデルです: {args.model}")
+        daemon.cmd_load(entry['id'], entry)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        daemon.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,24 @@ import torch
 import numpy as np
 from pathlib import Path
 import traceback
+import os
 import inspect
 import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from io import StringIO
+
+from .frontend_cache import FrontendCache
+from .bert_cache import BertFeatureCache
+from .bert_batch import BatchBertExtractor, DEFAULT_MAX_TOKENS
+from .style_table import StyleTable
+from .model_cache import ModelCache
+from .synthesis_cache import SynthesisCache, synthesis_key
+from .waveform import WaveformStore
+from .segment_store import SegmentStore
+from . import sbv2_hooks
 
 # Style-Bert-VITS2のログを無効化
 logging.getLogger("style_bert_vits2").setLevel(logging.ERROR)
@@ -15,11 +31,130 @@ logging.getLogger("infer").setLevel(logging.ERROR)
 logging.getLogger("transformers").setLevel(logging.ERROR)
 logging.getLogger("torch").setLevel(logging.ERROR)
 
-class TTSEngine:
+# stdout/stderr の抑制は複数スレッドから入れ子になりうるので参照カウントで管理する
+_quiet_lock = threading.Lock()
+_quiet_depth = 0
+_saved_streams = None
+
+
+@contextmanager
+def suppress_output():
+    """stdout/stderr を一時的に捨てる（スレッドをまたいでも元のストリームを必ず復元）"""
+    global _quiet_depth, _saved_streams
+    with _quiet_lock:
+        if _quiet_depth == 0:
+            _saved_streams = (sys.stdout, sys.stderr)
+            sys.stdout = StringIO()
+            sys.stderr = StringIO()
+        _quiet_depth += 1
+    try:
+        yield
+    finally:
+        with _quiet_lock:
+            _quiet_depth -= 1
+            if _quiet_depth == 0:
+                sys.stdout, sys.stderr = _saved_streams
+                _saved_streams = None
+
+
+class _RngGate:
+    """大域の乱数を使う処理の出入り口（シード無しは同時にいくつでも、シード付きは他をすべて締め出して1つずつ）
+
+    シード付きの合成が待っている間は、新しいシード無しの合成を入れない（シード付きが待ち続けないように）。
+    """
+
     def __init__(self):
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive or self._waiting:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            while self._exclusive or self._shared:
+                self._cond.wait()
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+# torch の乱数状態はプロセスで1つなので、シード付きの合成は他の合成と重ならないように1つずつ行う
+_rng_gate = _RngGate()
+
+
+@contextmanager
+def seeded_rng(seed, device="cpu"):
+    """シードを固定した乱数で実行し、終わったら元の乱数状態と cudnn の設定に戻す
+
+    SBV2 の infer は生成器（torch.Generator）を受け取らず大域の乱数（noise / sdp_ratio のサンプリング）を使うため、
+    エンジンごとの生成器で分けることができない。シード付きの合成は実行中の合成がすべて終わるのを待ってから
+    1つだけで走る（その間はシード無しの合成も始まらない）ので、シードを固定すると合成は並列にならない。
+    seed が None の合成は互いに待たずに並列に走る（シード付きの合成の間だけ待つ）。
+    """
+    if seed is None:
+        with _rng_gate.shared():
+            yield
+        return
+    cuda = str(device).startswith("cuda") and torch.cuda.is_available()
+    devices = [torch.cuda.current_device()] if cuda else []
+    with _rng_gate.exclusive(), torch.random.fork_rng(devices=devices):
+        saved = (torch.backends.cudnn.deterministic, torch.backends.cudnn.benchmark)
+        torch.default_generator.manual_seed(int(seed))
+        if cuda:
+            torch.cuda.manual_seed(int(seed))
+            torch.backends.cudnn.deterministic = True
+            torch.backends.cudnn.benchmark = False
+        try:
+            yield
+        finally:
+            torch.backends.cudnn.deterministic, torch.backends.cudnn.benchmark = saved
+
+
+class TTSEngine:
+    def __init__(self, cache_dir=None):
         self.model = None
         self.is_loaded = False
         self.model_info = {}
+        self.style_table = None
+        self.cache_dir = cache_dir
+
+        # テキストフロントエンド（正規化・g2p・アクセント）のキャッシュ
+        frontend_path = os.path.join(cache_dir, "frontend_cache.json") if cache_dir else None
+        self.frontend_cache = FrontendCache(max_entries=4096, persist_path=frontend_path)
+        # BERT特徴量のキャッシュ（スタイル・韻律パラメータに依存しない）
+        self.bert_cache = BertFeatureCache(max_bytes=256 * 1024 * 1024)
+        # ネットワーク上のモデルフォルダのローカルコピー
+        self.model_cache = ModelCache(os.path.join(cache_dir, "models")) if cache_dir else None
+        self._loaded_weights = set()  # このプロセスで一度読み込んだ重みファイル
+        self._init_synthesis_cache(cache_dir)
+
+        # 計測用（合成は複数スレッドから呼ばれる）
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'synth_calls': 0,
+            'synth_time': 0.0,
+            'loads': [],  # [{'kind': cold/warm/cached, 'seconds': ..., 'model_path': ...}]
+        }
         
         # デフォルトパラメータ
         self.default_params = {
@@ -27,24 +162,26 @@ class TTSEngine:
             'style_weight': 1.0,
             'sdp_ratio': 0.25,
             'noise': 0.35,
-            'length_scale': 0.85
+            'length_scale': 0.85,
+            # 乱数のシード。整数なら同じキーの合成は毎回同じ音声になる（None で固定しない）
+            # 固定すると合成は1つずつしか走らない（seeded_rng）ので、既定では固定しない
+            'seed': None,
         }
         
-    def load_model(self, model_path, config_path, style_path):
-        """モデルを読み込む"""
+    def _init_synthesis_cache(self, cache_dir):
+        # 合成結果のキャッシュ（同じ行・同じパラメータは一度だけ合成）
+        # 波形ピラミッドは合成結果と一緒に作り、ディスクにも残す（再起動後もすぐ描ける）
+        self.waveforms = WaveformStore(os.path.join(cache_dir, "waveforms") if cache_dir else None)
+        # 合成した音声はディスクにも残し、変わっていない行は次の書き出しや再起動後も使い回す
+        segments = SegmentStore(os.path.join(cache_dir, "segments")) if cache_dir else None
+        self.synthesis_cache = SynthesisCache(max_bytes=512 * 1024 * 1024, waveforms=self.waveforms,
+                                              segments=segments)
+
+    def load_model(self, model_path, config_path, style_path, model_id=None):
+        """モデルを読み込む（model_id はモデルの内容指紋。キャッシュのキーに使う）"""
         try:
             # ログ出力を完全に抑制
-            import sys
-            import os
-            from io import StringIO
-            
-            # stdout/stderrを一時的にリダイレクト
-            old_stdout = sys.stdout
-            old_stderr = sys.stderr
-            sys.stdout = StringIO()
-            sys.stderr = StringIO()
-            
-            try:
+            with suppress_output():
                 # BERTモデルの読み込み
                 from style_bert_vits2.nlp import bert_models
                 from style_bert_vits2.constants import Languages
@@ -52,63 +189,86 @@ class TTSEngine:
                 
                 bert_models.load_model(Languages.JP, "ku-nlp/deberta-v2-large-japanese-char-wwm")
                 bert_models.load_tokenizer(Languages.JP, "ku-nlp/deberta-v2-large-japanese-char-wwm")
+
+                # フロントエンド処理をキャッシュ経由にする
+                sbv2_hooks.install_frontend_cache(self.frontend_cache)
+                sbv2_hooks.install_bert_cache(self.bert_cache)
+                # 重みはメモリマップで読み込む
+                sbv2_hooks.install_mmap_weight_loader()
                 
                 # TTSモデル読み込み
                 device = "cuda" if torch.cuda.is_available() else "cpu"
+                start = time.perf_counter()
+
+                # ネットワーク上のモデルはローカルコピーから読み込む
+                local = {'model_path': model_path, 'config_path': config_path, 'style_path': style_path}
+                load_kind = 'warm' if model_path in self._loaded_weights else 'cold'
+                if self.model_cache and self.model_cache.should_cache(model_path):
+                    cached = self.model_cache.resolve(model_path, config_path, style_path, key=model_id)
+                    if cached:
+                        local = cached
+                        load_kind = 'cached'
                 
                 self.model = TTSModel(
-                    model_path=model_path,
-                    config_path=config_path,
-                    style_vec_path=style_path,
+                    model_path=local['model_path'],
+                    config_path=local['config_path'],
+                    style_vec_path=local['style_path'],
                     device=device,
                 )
-                
-            finally:
-                # stdout/stderrを復元
-                sys.stdout = old_stdout
-                sys.stderr = old_stderr
-            
+                # 初回合成時ではなくここで重みを読み込む
+                if hasattr(self.model, "load"):
+                    self.model.load()
+                load_seconds = time.perf_counter() - start
+
+                # スタイル表を作成し、TTSModel が読み込んだ配列をメモリマップ版に差し替える
+                self.style_table = StyleTable(local['config_path'], local['style_path'])
+                if hasattr(self.model, "_TTSModel__style_vectors"):
+                    self.model._TTSModel__style_vectors = self.style_table.vectors
+
             # モデル情報を保存
             self.model_info = {
                 'model_path': model_path,
                 'config_path': config_path,
                 'style_path': style_path,
-                'device': device
+                'device': device,
+                'model_id': model_id,
+                'local_model_path': local['model_path'],
+                'load_kind': load_kind,
+                'load_time': load_seconds,
             }
+            self._loaded_weights.add(model_path)
+            self.stats['loads'].append({'kind': load_kind, 'seconds': load_seconds, 'model_path': model_path})
             
             self.is_loaded = True
             return True
             
         except Exception as e:
-            # エラー時もstdout/stderrを復元
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
             self.is_loaded = False
             return False
     
+    def spawn(self):
+        """キャッシュを共有する別のエンジンを作る（複数モデルを同時に読み込む用）
+
+        合成結果キャッシュのキーにはモデルIDが入るので、共有しても混ざらない。
+        """
+        engine = TTSEngine()
+        engine.cache_dir = self.cache_dir
+        engine.frontend_cache = self.frontend_cache
+        engine.bert_cache = self.bert_cache
+        engine.model_cache = self.model_cache
+        engine.synthesis_cache = self.synthesis_cache
+        engine.waveforms = self.waveforms
+        engine._loaded_weights = self._loaded_weights
+        engine.default_params = dict(self.default_params)
+        return engine
+
     def get_available_styles(self):
-        """利用可能な感情スタイルを取得"""
+        """利用可能な感情スタイルを取得（読み込み時に作成したスタイル表から返す）"""
         if not self.is_loaded or not self.model:
             return ["Neutral"]
         
-        # モデルから実際の感情リストを取得を試みる
-        try:
-            # config.jsonから感情情報を取得
-            import json
-            with open(self.model_info.get('config_path', ''), 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            # 学習済み感情を確認
-            if 'data' in config and 'emotions' in config['data']:
-                emotions = config['data']['emotions']
-                return emotions
-            elif 'emotions' in config:
-                emotions = config['emotions']
-                return emotions
-            else:
-                pass
-        except Exception as e:
-            pass
+        if self.style_table and len(self.style_table):
+            return list(self.style_table.names)
         # デフォルト（一般的な感情リスト）
         return [
             "Neutral",
@@ -121,7 +281,7 @@ class TTSEngine:
         ]
     
     def synthesize(self, text, **params):
-        """音声合成を実行"""
+        """音声合成を実行（params の seed が整数なら、その乱数で決定的に合成する）"""
         if not self.is_loaded or self.model is None:
             raise RuntimeError("モデルが読み込まれていません")
         
@@ -130,29 +290,25 @@ class TTSEngine:
             
         try:
             # ログ出力を抑制
-            import sys
-            from io import StringIO
-            
-            old_stdout = sys.stdout
-            old_stderr = sys.stderr
-            sys.stdout = StringIO()
-            sys.stderr = StringIO()
-            
-            try:
+            with suppress_output():
                 # パラメータを準備
                 synth_params = self.default_params.copy()
                 synth_params.update(params)
+                # 別モデル用に作った行など、このモデルに無いスタイルは先頭のスタイルで読む
+                if self.style_table and len(self.style_table) and synth_params['style'] not in self.style_table:
+                    synth_params['style'] = self.style_table.names[0]
                             
                 # モデルの infer メソッドのシグネチャを確認して安全に呼び出し
                 kwargs = self._build_infer_kwargs(text, synth_params)
                 
                 # 音声合成実行
-                sr, audio = self.model.infer(**kwargs)
-                
-            finally:
-                # stdout/stderrを復元
-                sys.stdout = old_stdout
-                sys.stderr = old_stderr
+                start = time.perf_counter()
+                with seeded_rng(synth_params.get('seed'), self.model_info.get('device', 'cpu')):
+                    sr, audio = self.model.infer(**kwargs)
+                elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.stats['synth_calls'] += 1
+                self.stats['synth_time'] += elapsed
             
             # 結果チェック
             if audio is None or len(audio) == 0:
@@ -163,6 +319,89 @@ class TTSEngine:
         except Exception as e:
             raise e
     
+    @property
+    def deterministic(self):
+        """シードを固定して合成しているか（合成結果キャッシュが同じ音声を返すことが保証される）"""
+        return self.default_params.get('seed') is not None
+
+    def set_seed(self, seed):
+        """既定のシード（None にすると毎回違う乱数で合成する）"""
+        self.default_params['seed'] = None if seed is None else int(seed)
+
+    def get_phonemes(self, text):
+        """テキストの音素列（合成時の結果がフロントエンドキャッシュにあるので普通は再計算しない）"""
+        if not self.is_loaded:
+            return []
+        try:
+            from style_bert_vits2.models import infer as sbv2_infer
+            from style_bert_vits2.constants import Languages
+
+            version = str(getattr(getattr(self.model, "hyper_parameters", None), "version", ""))
+            with suppress_output():
+                _, phones, _, _ = sbv2_infer.clean_text(text, Languages.JP, use_jp_extra=version.endswith("JP-Extra"))
+            return list(phones)
+        except Exception as e:
+            print(f"音素取得エラー: {e}")
+            return []
+
+    def warm_frontend(self, text):
+        """テキスト処理（g2p）と BERT 特徴量だけを計算してキャッシュに入れる（音響モデルは動かさない）
+
+        infer と同じく get_text を通すので、キャッシュのキー（add_blank 後の word2ph など）も同じになり、
+        後で合成するときは音響モデルだけが走る。複数行のテキストは infer と同じく行ごとに処理する。
+        """
+        if not self.is_loaded or self.model is None:
+            return False
+        try:
+            from style_bert_vits2.models import infer as sbv2_infer
+            from style_bert_vits2.constants import Languages
+
+            hps = self.model.hyper_parameters
+            device = getattr(self.model, "device", self.model_info.get('device', 'cpu'))
+            with suppress_output():
+                for line in text.split("\n"):
+                    if line.strip():
+                        sbv2_infer.get_text(line, Languages.JP, hps, device)
+            return True
+        except Exception as e:
+            print(f"フロントエンド先行処理エラー: {e}")
+            return False
+
+    def warm_frontend_batch(self, texts, max_tokens=DEFAULT_MAX_TOKENS):
+        """複数行の BERT 特徴量を長さ順に束ねてまとめて計算し、キャッシュに入れる（計算した行数を返す）
+
+        後で warm_frontend や合成をすると、BERT はキャッシュに当たる。
+        """
+        if not self.is_loaded or self.model is None:
+            return 0
+        try:
+            device = getattr(self.model, "device", self.model_info.get('device', 'cpu'))
+            extractor = BatchBertExtractor(self.bert_cache, str(device), max_tokens)
+            with suppress_output():
+                return extractor.warm(texts, self.model.hyper_parameters)
+        except Exception as e:
+            print(f"BERT 一括計算エラー: {e}")
+            return 0
+
+    def synthesis_key(self, text, model_id=None, **params):
+        """(テキスト, パラメータ, モデル) のキー。モデルは内容指紋（無ければパス）で区別する
+
+        model_id を渡すと、読み込み中のモデルではなくそのモデルで合成したときのキーになる。
+        """
+        synth_params = self.default_params.copy()
+        synth_params.update(params)
+        model_id = model_id or self.model_info.get('model_id') or self.model_info.get('model_path')
+        return synthesis_key(text, synth_params, model_id)
+
+    def get_waveform(self, text, model_id=None, **params):
+        """行の波形ピラミッド（合成済みなら。model_id 省略時は読み込み中のモデル）"""
+        return self.waveforms.get(self.synthesis_key(text, model_id=model_id, **params))
+
+    def synthesize_cached(self, text, **params):
+        """キャッシュ付きの音声合成。同じキーの合成が実行中なら結果を共有する"""
+        key = self.synthesis_key(text, **params)
+        return self.synthesis_cache.get_or_compute(key, lambda: self.synthesize(text, **params))
+
     def _build_infer_kwargs(self, text, params):
         """infer() メソッドに渡す引数を安全に構築"""
         if not self.model:
@@ -235,6 +474,18 @@ class TTSEngine:
         
         return kwargs
     
+    def get_stats(self):
+        """計測値（合成回数・時間・キャッシュヒット率）を取得"""
+        stats = dict(self.stats)
+        stats['frontend_cache'] = self.frontend_cache.stats()
+        stats['bert_cache'] = self.bert_cache.stats()
+        stats['synthesis_cache'] = self.synthesis_cache.stats()
+        return stats
+
+    def save_caches(self):
+        """永続化が有効なキャッシュを保存"""
+        self.frontend_cache.save()
+
     def get_model_info(self):
         """モデル情報を取得"""
         return self.model_info.copy() if self.is_loaded else {}
@@ -246,6 +497,8 @@ class TTSEngine:
             self.model = None
         self.is_loaded = False
         self.model_info = {}
+        self.style_table = None
+        self.save_caches()
         
         # GPU メモリをクリア
         if torch.cuda.is_available():
@@ -0,0 +1,135 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils.file_utils import atomic_write_bytes
+
+# 最下段の1ブロックのサンプル数
+BASE_BLOCK = 64
+
+
+class WaveformPyramid:
+    """min/max のピラミッド（段ごとにブロックを2倍にまとめる）
+
+    描画時は「1ピクセルあたりのサンプル数」以下で最も粗い段を選ぶので、
+    どの倍率でも触るのはおおよそピクセル数分の値だけで済む。
+    """
+
+    def __init__(self, mins: np.ndarray, maxs: np.ndarray, sr: int, length: int, base_block: int = BASE_BLOCK):
+        self.sr = sr
+        self.length = length
+        self.base_block = base_block
+        self.levels: List[Tuple[np.ndarray, np.ndarray]] = [(mins, maxs)]
+        while len(mins) > 1:
+            n = len(mins) // 2 * 2
+            odd_min, odd_max = mins[n:], maxs[n:]
+            mins = np.concatenate([np.minimum(mins[0:n:2], mins[1:n:2]), odd_min])
+            maxs = np.concatenate([np.maximum(maxs[0:n:2], maxs[1:n:2]), odd_max])
+            self.levels.append((mins, maxs))
+
+    @classmethod
+    def from_audio(cls, audio: np.ndarray, sr: int, base_block: int = BASE_BLOCK):
+        """音声から一度だけ最下段を作る（ブロック単位に並べ替えてまとめて min/max）"""
+        audio = np.asarray(audio)
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        else:
+            audio = audio.astype(np.float32, copy=False)
+        blocks = max(-(-len(audio) // base_block), 1)
+        padded = np.zeros(blocks * base_block, dtype=np.float32)
+        padded[:len(audio)] = audio
+        shaped = padded.reshape(blocks, base_block)
+        return cls(shaped.min(axis=1).astype(np.float16), shaped.max(axis=1).astype(np.float16),
+                   sr, len(audio), base_block)
+
+    @property
+    def duration(self) -> float:
+        return self.length / self.sr
+
+    def peaks(self, pixels: int, start: float = 0.0, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """[start, end) 秒を pixels 本に縮めた (min, max)"""
+        end = self.duration if end is None else end
+        pixels = max(int(pixels), 1)
+        samples_per_pixel = max((end - start) * self.sr / pixels, 1.0)
+        level = 0
+        while level + 1 < len(self.levels) and self.base_block * 2 ** (level + 1) <= samples_per_pixel:
+            level += 1
+        mins, maxs = self.levels[level]
+        block = self.base_block * 2 ** level
+        first = min(int(start * self.sr) // block, len(mins) - 1)
+        last = min(max(int(np.ceil(end * self.sr / block)), first + 1), len(mins))
+        edges = np.linspace(first, last, pixels + 1)[:-1].astype(np.int64)
+        return (np.minimum.reduceat(mins[first:last], edges - first).astype(np.float32),
+                np.maximum.reduceat(maxs[first:last], edges - first).astype(np.float32))
+
+    # ---------- 保存 ----------
+    def to_bytes(self) -> bytes:
+        """最下段だけを保存する（上の段は読み込み時に作り直す）"""
+        import io
+        buf = io.BytesIO()
+        mins, maxs = self.levels[0]
+        np.savez(buf, mins=mins, maxs=maxs, meta=np.array([self.sr, self.length, self.base_block], dtype=np.int64))
+        return buf.getvalue()
+
+    @classmethod
+    def from_file(cls, path: str):
+        with np.load(path) as data:
+            sr, length, base_block = (int(v) for v in data['meta'])
+            return cls(data['mins'], data['maxs'], sr, length, base_block)
+
+
+class WaveformStore:
+    """合成キーごとの波形ピラミッド（メモリ上のLRUと、ディスク上の .npz）"""
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 4096):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, WaveformPyramid]" = OrderedDict()
+        self._missing = set()  # ディスクにも無かったキー（描画のたびに stat しない）
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key: str) -> Optional[WaveformPyramid]:
+        with self._lock:
+            pyramid = self._entries.get(key)
+            if pyramid is not None:
+                self._entries.move_to_end(key)
+                return pyramid
+            if key in self._missing:
+                return None
+        if not self.directory or not os.path.exists(self._path(key)):
+            with self._lock:
+                if len(self._missing) > 65536:
+                    self._missing.clear()
+                self._missing.add(key)
+            return None
+        try:
+            pyramid = WaveformPyramid.from_file(self._path(key))
+        except Exception as e:
+            print(f"波形読み込みエラー: {e}")
+            return None
+        self._remember(key, pyramid)
+        return pyramid
+
+    def put(self, key: str, audio: np.ndarray, sr: int) -> WaveformPyramid:
+        pyramid = WaveformPyramid.from_audio(audio, sr)
+        self._remember(key, pyramid)
+        if self.directory:
+            try:
+                atomic_write_bytes(self._path(key), pyramid.to_bytes())
+            except OSError as e:
+                print(f"波形保存エラー: {e}")
+        return pyramid
+
+    def _remember(self, key: str, pyramid: WaveformPyramid):
+        with self._lock:
+            self._missing.discard(key)
+            self._entries[key] = pyramid
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
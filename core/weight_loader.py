@@ -0,0 +1,81 @@
+import json
+import mmap
+import struct
+from typing import Dict, Optional, Tuple
+
+import torch
+
+# safetensors のdtype表記 -> torch.dtype
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def open_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """safetensors をメモリマップし、ファイル上のデータをそのまま参照するテンソルを返す
+
+    ACCESS_COPY（コピーオンライト）で開くため、書き込まれない限りページは
+    プロセス間で共有され、再読み込み時はページキャッシュに当たる。
+    テンソルがバッファを参照している間はマップが保持される。
+    """
+    with open(path, 'rb') as f:
+        header_size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _DTYPES[info['dtype']]
+        shape = info['shape']
+        begin, end = info['data_offsets']
+        if end == begin:
+            tensors[name] = torch.empty(shape, dtype=dtype)
+            continue
+        count = (end - begin) // torch.tensor([], dtype=dtype).element_size()
+        tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + begin)
+        tensors[name] = tensor.reshape(shape)
+    return tensors
+
+
+def load_safetensors_mmap(checkpoint_path, model: torch.nn.Module, for_infer: bool = False,
+                          device="cpu") -> Tuple[torch.nn.Module, Optional[int]]:
+    """style_bert_vits2.models.utils.safetensors.load_safetensors 互換のメモリマップ版
+
+    CPU で dtype と形状が一致する場合はテンソルを割り当てるだけ（コピーなし）。
+    それ以外（GPU など）は通常どおりパラメータへコピーする。
+    """
+    tensors = open_safetensors_mmap(str(checkpoint_path))
+    iteration = None
+    if "iteration" in tensors:
+        iteration = int(tensors.pop("iteration").item())
+
+    target = model.module if hasattr(model, "module") else model
+    current = target.state_dict()
+    zero_copy = str(device) == "cpu" and all(
+        key in current
+        and current[key].dtype == value.dtype
+        and current[key].shape == value.shape
+        and current[key].device.type == "cpu"
+        for key, value in tensors.items()
+    )
+    if zero_copy:
+        result = target.load_state_dict(tensors, strict=False, assign=True)
+    else:
+        result = target.load_state_dict(tensors, strict=False)
+
+    missing = [k for k in result.missing_keys if not (for_infer and k.startswith("enc_q"))]
+    if missing:
+        raise RuntimeError(f"重みが不足しています: {missing[:5]}")
+    return model, iteration
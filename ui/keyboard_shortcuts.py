@@ -19,6 +19,7 @@ class KeyboardShortcutManager(QObject):
         # 再生系
         self.add_shortcut("R", self.play_current_row)
         self.add_shortcut("Ctrl+R", self.play_sequential)
+        self.add_shortcut("Escape", self.stop_playback)
         
         # テキスト操作
         self.add_shortcut("N", self.add_text_row)
@@ -49,47 +50,30 @@ class KeyboardShortcutManager(QObject):
         self.main_window.toggle_file_menu()
     
     def play_current_row(self):
-        """現在フォーカス中の行を再生"""
-        # アクティブなタブのIDを取得
-        current_tab_index = self.main_window.tabbed_emotion_control.tab_widget.currentIndex()
-        if current_tab_index >= 0:
-            # タブのrow_idを取得（タブウィジェットから逆引き）
-            current_control = self.main_window.tabbed_emotion_control.tab_widget.currentWidget()
-            if current_control and hasattr(current_control, 'row_id'):
-                row_id = current_control.row_id
-                # 対応するテキスト行を再生
-                if row_id in self.main_window.multi_text.text_rows:
-                    text_widget = self.main_window.multi_text.text_rows[row_id]
-                    text_widget.play_btn.click()
+        """現在選択中の行を再生"""
+        self.main_window.script_editor.play_current_row()
     
     def play_sequential(self):
         """連続再生"""
         self.main_window.sequential_play_btn.click()
     
+    def stop_playback(self):
+        """再生を止める（合成待ちの ▶ と連続再生も取り消す）"""
+        self.main_window.stop_playback()
+    
     def add_text_row(self):
         """テキスト行を追加"""
-        # 9行制限チェック
-        if len(self.main_window.multi_text.text_rows) >= 9:
-            return
-        self.main_window.multi_text.add_text_row()
+        self.main_window.script_editor.add_row()
     
     def focus_text_row(self, row_number):
-        """指定番号のテキスト行にフォーカス"""
-        text_rows = list(self.main_window.multi_text.text_rows.values())
-        if 0 < row_number <= len(text_rows):
-            target_row = text_rows[row_number - 1]
-            target_row.text_input.setFocus()
-            
-            # 対応するパラメータタブもアクティブに
-            row_id = target_row.row_id
-            self.main_window.tabbed_emotion_control.set_current_row(row_id)
+        """指定番号のテキスト行にフォーカス（パラメータパネルも選択行に追従）"""
+        self.main_window.script_editor.focus_row(row_number - 1)
     
     def open_emotion_combo(self):
         """感情コンボボックスを開く"""
-        current_control = self.main_window.tabbed_emotion_control.tab_widget.currentWidget()
-        if current_control and hasattr(current_control, 'emotion_combo'):
-            current_control.emotion_combo.setFocus()
-            current_control.emotion_combo.showPopup()
+        combo = self.main_window.emotion_control.emotion_combo
+        combo.setFocus()
+        combo.showPopup()
     
     def save_individual(self):
         """個別保存"""
@@ -0,0 +1,73 @@
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QTimer, QRectF
+from PyQt6.QtGui import QPainter, QColor, QPen, QFont
+
+from core.lipsync import FPS, LipSyncTimeline
+
+# 母音ごとの口の形（幅の倍率, 高さの倍率）
+MOUTH_SHAPES = {
+    'a': (1.0, 1.0),
+    'i': (1.2, 0.45),
+    'u': (0.6, 0.6),
+    'e': (1.1, 0.7),
+    'o': (0.75, 0.9),
+    'N': (0.9, 0.1),
+}
+
+
+class LipSyncWidget(QWidget):
+    """再生位置に合わせて口の開きを表示するパネル（Live2D モデルの代わりの簡易表示）
+
+    60fps のタイマーで AudioEngine の再生位置を読み、タイムラインの特徴量を引くだけなので軽い。
+    再生していない間はタイマーを止める。
+    """
+
+    def __init__(self, audio_engine, parent=None):
+        super().__init__(parent)
+        self.audio_engine = audio_engine
+        self.timeline = LipSyncTimeline()
+        self.mouth = 0.0
+        self.vowel = None
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(int(1000 / FPS))
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def clear(self):
+        self.timeline.clear()
+        self.mouth = 0.0
+        self.vowel = None
+        self.update()
+
+    def tick(self):
+        mouth, vowel = self.timeline.sample(self.audio_engine.position())
+        if not self.audio_engine.is_playing():
+            mouth, vowel = 0.0, None
+            self.timer.stop()
+        if mouth != self.mouth or vowel != self.vowel:
+            self.mouth, self.vowel = mouth, vowel
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor("#ffffff"))
+
+        cx, cy = self.width() / 2, self.height() / 2
+        width_scale, height_scale = MOUTH_SHAPES.get(self.vowel, (1.0, 1.0))
+        w = 90 * width_scale
+        h = max(4.0, 60 * self.mouth * height_scale)
+        painter.setPen(QPen(QColor("#c2185b"), 3))
+        painter.setBrush(QColor("#f8bbd0") if self.mouth > 0.05 else Qt.BrushStyle.NoBrush)
+        painter.drawEllipse(QRectF(cx - w / 2, cy - h / 2, w, h))
+
+        painter.setPen(QColor("#666"))
+        painter.setFont(QFont("", 10))
+        label = f"リップシンク  開き {self.mouth:.2f}"
+        if self.vowel:
+            label += f"  /{self.vowel}/"
+        painter.drawText(QRectF(0, self.height() - 30, self.width(), 20), Qt.AlignmentFlag.AlignCenter, label)
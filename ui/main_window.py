@@ -1,35 +1,90 @@
 import os
 from pathlib import Path
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                            QPushButton, QLabel, QFileDialog, QStyle, QFrame, QApplication, QMessageBox)
-from PyQt6.QtCore import Qt
+                            QPushButton, QLabel, QFileDialog, QStyle, QFrame, QApplication, QMessageBox,
+                            QInputDialog, QProgressBar)
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QAction
 
 # 自作モジュール
 from .model_history import ModelHistoryWidget
 from .model_loader import ModelLoaderDialog
-from .tabbed_emotion_control import TabbedEmotionControl
-from .multi_text import MultiTextWidget
+from .tabbed_emotion_control import SingleEmotionControl
+from .script_editor import ScriptEditorWidget
 from .keyboard_shortcuts import KeyboardShortcutManager
 from .sliding_menu import SlidingMenuWidget
+from .lipsync_widget import LipSyncWidget
+from .waveform_view import WaveformView
 from core.tts_engine import TTSEngine
+from core.tts_daemon import RemoteTTSEngine, attach_engine
 from core.model_manager import ModelManager
+from core.model_scanner import ModelLibraryScanner
+from core.export_job import ExportJob
+from core.engine_pool import EnginePool, ModelGroupedScheduler
+from core.audio_engine import AudioEngine, resample
+from core.lipsync import LipSyncTrack
+from core.prefetcher import Prefetcher
+from core.priority_scheduler import PriorityScheduler, CancelToken, INTERACTIVE, BATCH
+from core.synthesis_job import SynthesisJob
+from utils.file_utils import atomic_write_bytes
+from core.script_io import iter_script_rows
 
 class TTSStudioMainWindow(QMainWindow):
+    # 起動時の前回モデル確認結果（ワーカースレッドからGUIスレッドへ渡す）
+    last_model_checked = pyqtSignal(dict, object)  # (model_entry, True/False/None)
+    model_fingerprinted = pyqtSignal(dict, str, bool)  # (パス, 指紋, 前回のモデルの自動読み込みか)
+    # ▶ の合成結果（合成キューのワーカーからGUIスレッドへ渡す）
+    single_rendered = pyqtSignal(object, object, int, object)  # (token, 音素列, sr, audio)
+    single_failed = pyqtSignal(object, str)  # (token, エラーメッセージ)
+    # 連続再生・書き出しジョブ（ジョブのスレッドからGUIスレッドへ渡す）
+    segment_rendered = pyqtSignal(object, object, int)  # (音素列, audio, sr)
+    job_progress = pyqtSignal(object)  # JobProgress.snapshot()
+    job_finished = pyqtSignal(object)  # SynthesisJob
+
     def __init__(self):
         super().__init__()
-        self.tts_engine = TTSEngine()
+        # 合成デーモン（python -m core.tts_daemon）が起動していれば、モデルはそちらのものを使う
+        self.tts_engine = attach_engine(cache_dir="cache") or TTSEngine(cache_dir="cache")
         self.model_manager = ModelManager()
+        self.model_scanner = ModelLibraryScanner(index_path=os.path.join("cache", "library_index.json"))
+        # 行ごとに別モデルを使うためのエンジンプール（重みの合計4GBまで同時に保持）
+        self.engine_pool = EnginePool(self.tts_engine, self.model_manager, memory_budget=4 * 1024 ** 3)
+        # 合成は優先度つきのキューで行う（▶ は書き出しより先。ワーカー1つは ▶ 用に空けておく）
+        self.synth_queue = PriorityScheduler(workers=3, reserved=1)
+        self.play_token = CancelToken()
+        # 一括合成はモデルごと・長さバケット順に並べ替えて実行し、結果は台本順に受け取る
+        self.synth_scheduler = ModelGroupedScheduler(self.engine_pool, workers=2,
+                                                     executor=self.synth_queue.executor(BATCH))
+        # 編集が落ち着いた行を空き時間に先に合成しておく（▶ がキャッシュヒットになる）
+        # 合成は優先度つきのキューに最も低い優先度で入れる（▶ や書き出しのワーカーを奪わない）
+        self.prefetcher = Prefetcher(self.engine_pool, debounce=0.8, cpu_budget=0.5, scheduler=self.synth_queue)
+        # 再生は開きっぱなしの出力ストリームで行う（行と行の間も途切れない）
+        self.audio_engine = AudioEngine(samplerate=44100, blocksize=512, latency='low')
+        # 前回書き出した時点の各行の版番号（変更された行を数える用）
+        self.export_snapshot = {}
+        # 実行中の連続再生・書き出し（1つだけ）
+        self.current_job = None
+        self.job_finished_handler = None
+        # シード固定を切ってから戻したときに使うシード
+        self.last_seed = self.tts_engine.default_params['seed'] or 0
         self.init_ui()
         
         # スライド式メニューを作成
         self.sliding_menu = SlidingMenuWidget(self)
         self.sliding_menu.load_model_clicked.connect(self.open_model_loader)
         self.sliding_menu.load_from_history_clicked.connect(self.show_model_history_dialog)
+        self.sliding_menu.import_script_clicked.connect(self.import_script)
         
         # キーボードショートカット設定
         self.keyboard_shortcuts = KeyboardShortcutManager(self)
         
+        self.last_model_checked.connect(self.on_last_model_checked)
+        self.model_fingerprinted.connect(self.on_model_fingerprinted)
+        self.single_rendered.connect(self.on_single_rendered)
+        self.single_failed.connect(self.on_single_failed)
+        self.segment_rendered.connect(self.queue_playback)
+        self.job_progress.connect(self.on_job_progress)
+        self.job_finished.connect(self.on_job_finished)
         self.load_last_model()
 
     def init_ui(self):
@@ -47,11 +102,16 @@ class TTSStudioMainWindow(QMainWindow):
 
         # 左ペイン
         left = QVBoxLayout()
-        self.multi_text = MultiTextWidget()
-        self.multi_text.play_single_requested.connect(self.play_single_text)
-        self.multi_text.row_added.connect(self.on_text_row_added)
-        self.multi_text.row_removed.connect(self.on_text_row_removed)
-        self.multi_text.row_numbers_updated.connect(self.on_row_numbers_updated)
+        self.script_editor = ScriptEditorWidget()
+        self.script_editor.play_single_requested.connect(self.play_single_text)
+        self.script_editor.current_row_changed.connect(self.on_current_row_changed)
+        self.script_editor.parameters_changed.connect(self.on_row_parameters_changed)
+        self.script_editor.text_changed.connect(self.on_row_edited)
+        self.script_editor.parameters_changed.connect(self.on_row_edited)
+        self.script_editor.model_changed.connect(self.on_row_edited)
+        self.refresh_script_models()
+        self.script_editor.set_waveform_lookup(self.lookup_waveform)
+        self.waveform_view = WaveformView()
 
         params_label = QLabel("音声パラメータ:")
         params_label.setFont(QFont("", 10, QFont.Weight.Bold))
@@ -61,9 +121,10 @@ class TTSStudioMainWindow(QMainWindow):
         divider.setFrameShadow(QFrame.Shadow.Sunken)
         divider.setStyleSheet("color: #dee2e6;")
 
-        self.tabbed_emotion_control = TabbedEmotionControl()
-        self.tabbed_emotion_control.parameters_changed.connect(self.on_parameters_changed)
-        self.tabbed_emotion_control.add_text_row("initial", 1)
+        # 選択中の行のパラメータを編集するパネル（行ごとにウィジェットを作らない）
+        first_row = self.script_editor.current_row_id()
+        self.emotion_control = SingleEmotionControl(first_row, self.script_editor.get_parameters(first_row))
+        self.emotion_control.parameters_changed.connect(self.on_parameters_changed)
 
         controls = QHBoxLayout()
         controls.addStretch()
@@ -91,24 +152,33 @@ class TTSStudioMainWindow(QMainWindow):
         controls.addWidget(self.save_individual_btn)
         controls.addWidget(self.save_continuous_btn)
 
-        left.addWidget(self.multi_text, 1)
+        # 実行中のジョブの進み具合（行数・残り時間）と中止ボタン
+        self.job_panel = QWidget()
+        job_layout = QHBoxLayout(self.job_panel)
+        job_layout.setContentsMargins(0, 0, 0, 0)
+        self.job_label = QLabel()
+        self.job_progress_bar = QProgressBar()
+        self.job_progress_bar.setTextVisible(False)
+        self.job_progress_bar.setMaximumHeight(12)
+        job_cancel_btn = QPushButton("中止")
+        job_cancel_btn.clicked.connect(self.cancel_job)
+        job_layout.addWidget(self.job_label)
+        job_layout.addWidget(self.job_progress_bar, 1)
+        job_layout.addWidget(job_cancel_btn)
+        self.job_panel.hide()
+
+        left.addWidget(self.script_editor, 1)
+        left.addWidget(self.waveform_view)
         left.addWidget(params_label)
         left.addWidget(divider)
-        left.addWidget(self.tabbed_emotion_control, 1)
+        left.addWidget(self.emotion_control, 1)
         left.addLayout(controls)
+        left.addWidget(self.job_panel)
 
-        # 右ペイン（ダミー）
-        self.live2d_widget = QWidget()
+        # 右ペイン（再生に合わせて口を動かすリップシンク表示）
+        self.live2d_widget = LipSyncWidget(self.audio_engine)
         self.live2d_widget.setMaximumWidth(300)
         self.live2d_widget.setMinimumWidth(250)
-        self.live2d_widget.setStyleSheet("""
-            QWidget { background-color: #ffffff; border: 1px solid #dee2e6; border-radius: 4px; }
-        """)
-        live2d_layout = QVBoxLayout(self.live2d_widget)
-        live2d_label = QLabel("Live2D\nリップシンクエリア")
-        live2d_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        live2d_label.setStyleSheet("color: #666; font-size: 14px; border: none;")
-        live2d_layout.addWidget(live2d_label)
 
         content.addLayout(left, 1)
         content.addWidget(self.live2d_widget, 0)
@@ -164,6 +234,102 @@ class TTSStudioMainWindow(QMainWindow):
         file_action = menubar.addAction("ファイル(F)")
         file_action.triggered.connect(self.toggle_file_menu)
 
+        # 先読み（編集した行を空き時間に合成しておく）のCPU予算
+        prefetch_menu = menubar.addMenu("先読み")
+        self.prefetch_actions = []
+        for label, budget in (("オフ", 0.0), ("控えめ（25%）", 0.25), ("標準（50%）", 0.5), ("最大（100%）", 1.0)):
+            action = QAction(label, self, checkable=True)
+            action.setChecked(budget == 0.5)
+            action.triggered.connect(lambda checked, b=budget: self.set_prefetch_budget(b))
+            prefetch_menu.addAction(action)
+            self.prefetch_actions.append((budget, action))
+        prefetch_menu.addSeparator()
+        prefetch_menu.addAction("統計を表示").triggered.connect(self.show_prefetch_stats)
+
+        # シード固定（同じ行・同じパラメータは毎回同じ音声になり、キャッシュを信頼できる）
+        synth_menu = menubar.addMenu("合成")
+        # 乱数はプロセスで1つなので、固定すると合成は1行ずつになる（並列合成が効かない）
+        self.deterministic_action = QAction("シードを固定する（合成は1行ずつになります）", self, checkable=True)
+        self.deterministic_action.setChecked(self.tts_engine.deterministic)
+        self.deterministic_action.toggled.connect(self.set_deterministic)
+        synth_menu.addAction(self.deterministic_action)
+        synth_menu.addAction("シードを変更...").triggered.connect(self.change_seed)
+        # 連続再生・書き出しで、次の数行の g2p・BERT を音響モデルと並行して先に計算する
+        self.pipeline_action = QAction("パイプライン合成（g2p・BERT を先に計算）", self, checkable=True)
+        self.pipeline_action.setChecked(self.synth_scheduler.pipeline_depth > 0)
+        self.pipeline_action.toggled.connect(self.set_pipeline)
+        synth_menu.addAction(self.pipeline_action)
+        synth_menu.addSeparator()
+        if isinstance(self.tts_engine, RemoteTTSEngine):
+            daemon_label = f"合成デーモンに接続中（{self.tts_engine.address[0]}:{self.tts_engine.address[1]}）"
+        else:
+            daemon_label = "合成デーモン: 未接続（このプロセスでモデルを読み込みます）"
+        synth_menu.addAction(daemon_label).setEnabled(False)
+
+    def set_prefetch_budget(self, budget):
+        self.prefetcher.set_cpu_budget(budget)
+        for b, action in self.prefetch_actions:
+            action.setChecked(b == budget)
+
+    def set_seed(self, seed):
+        """読み込み済みのすべてのエンジンの既定シードを変える（後から読み込むエンジンは基準エンジンから引き継ぐ）"""
+        for engine in self.engine_pool.engines():
+            engine.set_seed(seed)
+        self.script_editor.refresh_waveforms()
+
+    def set_deterministic(self, enabled):
+        self.set_seed(self.last_seed if enabled else None)
+
+    def set_pipeline(self, enabled):
+        self.synth_scheduler.pipeline_depth = 4 if enabled else 0
+
+    def change_seed(self):
+        seed, ok = QInputDialog.getInt(self, "シードを変更", "シード:", self.last_seed, 0, 2 ** 31 - 1)
+        if not ok:
+            return
+        self.last_seed = seed
+        if self.deterministic_action.isChecked():
+            self.set_seed(seed)
+        else:
+            self.deterministic_action.setChecked(True)
+
+    def show_prefetch_stats(self):
+        stats = self.prefetcher.stats()
+        cache = self.tts_engine.synthesis_cache.stats()
+        queue = self.synth_queue.stats()
+        QMessageBox.information(
+            self, "先読みの統計",
+            f"▶ のヒット率: {stats['hit_rate']:.0%}（{stats['play_hits']} / {stats['play_requests']}）\n"
+            f"先読みで合成した行: {stats['rendered']}（{stats['busy_time']:.1f}秒）\n"
+            f"待機中の行: {stats['pending']}\n"
+            f"合成キャッシュ: {cache['entries']} 件 / ヒット率 {cache['hit_rate']:.0%}\n"
+            f"キュー待ち（平均 / 最大）: ▶ {queue['interactive']['wait_avg'] * 1000:.0f} / "
+            f"{queue['interactive']['wait_max'] * 1000:.0f} ms、"
+            f"一括 {queue['batch']['wait_avg']:.1f} / {queue['batch']['wait_max']:.1f} 秒"
+            f"（取り消し {queue['interactive']['cancelled']} 件）"
+            + self.format_pipeline_stats()
+            + self.format_transport_stats()
+        )
+
+    def format_transport_stats(self):
+        if not hasattr(self.tts_engine, "transport_stats"):
+            return ""
+        stats = self.tts_engine.transport_stats()
+        return (
+            f"\nデーモンからの受け取り: 共有メモリ {stats['shm']} 回、"
+            f"満杯で pickle {stats['fallbacks']} 回"
+        )
+
+    def format_pipeline_stats(self):
+        stats = self.synth_scheduler.last_pipeline_stats
+        if not stats:
+            return ""
+        return (
+            f"\nパイプライン（直近）: {stats['jobs_per_sec']:.2f} 行/秒、"
+            f"稼働率 g2p・BERT {stats['frontend_utilization']:.0%} / 音響 {stats['acoustic_utilization']:.0%}、"
+            f"音響の待ち {stats['acoustic_starved']:.1f}秒、BERT 一括 {stats['batched']} 行"
+        )
+
     def toggle_file_menu(self):
         """ファイルメニューの表示/非表示を切り替え"""
         self.sliding_menu.toggle_menu()
@@ -175,9 +341,23 @@ class TTSStudioMainWindow(QMainWindow):
             self.sliding_menu.hide_menu()
         super().mousePressEvent(event)
 
+    def closeEvent(self, event):
+        """終了時にキャッシュと履歴を保存"""
+        self.tts_engine.save_caches()
+        self.model_manager.save_history()
+        if self.current_job is not None:
+            self.current_job.cancel()
+        self.prefetcher.shutdown()
+        self.synth_scheduler.shutdown()
+        self.synth_queue.shutdown()
+        self.audio_engine.close()
+        if isinstance(self.tts_engine, RemoteTTSEngine):
+            self.tts_engine.close()
+        super().closeEvent(event)
+
     # ---------- 履歴ダイアログ ----------
     def open_model_loader(self):
-        dialog = ModelLoaderDialog(self)
+        dialog = ModelLoaderDialog(self, model_manager=self.model_manager, scanner=self.model_scanner)
         dialog.model_loaded.connect(self.load_model)
         dialog.exec()
 
@@ -198,9 +378,7 @@ class TTSStudioMainWindow(QMainWindow):
         widget = ModelHistoryWidget(self.model_manager, dlg)
 
         def _on_selected(model_data):
-            if not self.model_manager.validate_model_files(model_data):
-                QMessageBox.warning(dlg, "エラー", "モデルファイルが見つかりません。")
-                return
+            # ファイルの存在は ModelHistoryWidget が非同期で確認済み
             paths = {
                 'model_path': model_data['model_path'],
                 'config_path': model_data['config_path'],
@@ -212,25 +390,73 @@ class TTSStudioMainWindow(QMainWindow):
         widget.model_selected.connect(_on_selected)
         lay.addWidget(widget)
         dlg.exec()
+        # 名前の変更や削除をモデル列に反映
+        self.refresh_script_models()
+
+    # ---------- 台本読み込み ----------
+    def import_script(self):
+        """CSV / TSV / JSONL の台本を取り込む"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "台本ファイルを選択",
+            "",
+            "台本ファイル (*.csv *.tsv *.jsonl);;All files (*.*)"
+        )
+        if not file_path:
+            return
+        unknown = set()
+
+        def resolve_models(rows):
+            # モデル列（IDまたは履歴上の名前）を履歴のIDに変換。見つからなければ読み込み中のモデル
+            for row in rows:
+                ref = row.get('model')
+                model = self.model_manager.find_model(ref)
+                if ref and not model:
+                    unknown.add(ref)
+                row['model_id'] = model['id'] if model else ""
+                yield row
+
+        try:
+            added = self.script_editor.import_rows(resolve_models(iter_script_rows(file_path)))
+            message = f"{added} 行を読み込みました。"
+            if unknown:
+                message += f"\n履歴に無いモデル（読み込み中のモデルで再生します）: {', '.join(sorted(unknown))}"
+            QMessageBox.information(self, "完了", message)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"台本の読み込みに失敗しました: {str(e)}")
 
     # ---------- モデル読み込み ----------
     def load_model(self, paths):
-        """モデルを読み込む"""
+        """モデルを読み込む（指紋は別スレッドで計算してから読み込む）"""
+        self.fingerprint_model(paths, quiet=False)
+
+    def fingerprint_model(self, paths, quiet):
+        self.model_manager.get_fingerprint_async(
+            paths["model_path"], paths["config_path"], paths["style_path"],
+            lambda model_id: self.model_fingerprinted.emit(paths, model_id, quiet)
+        )
+
+    def on_model_fingerprinted(self, paths, model_id, quiet):
         try:
             success = self.tts_engine.load_model(
                 paths["model_path"], 
                 paths["config_path"], 
-                paths["style_path"]
+                paths["style_path"],
+                model_id=model_id
             )
             
             if success:
-                # 履歴に追加
+                # 履歴に追加（旧形式（パスのMD5）のIDは内容指紋に移行される）
                 self.model_manager.add_model(
                     paths["model_path"], 
                     paths["config_path"], 
-                    paths["style_path"]
+                    paths["style_path"],
+                    model_id=model_id
                 )
                 
+                # 感情コンボをモデルのスタイルに合わせる
+                self.apply_model_styles()
+                
                 # ボタンを有効化
                 self.sequential_play_btn.setEnabled(True)
                 self.save_individual_btn.setEnabled(True)
@@ -240,64 +466,144 @@ class TTSStudioMainWindow(QMainWindow):
                 model_name = Path(paths["model_path"]).parent.name
                 self.setWindowTitle(f"TTSスタジオ - {model_name}")
                 
-                QMessageBox.information(self, "成功", "モデルを読み込みました。")
+                if not quiet:
+                    info = self.tts_engine.get_model_info()
+                    QMessageBox.information(
+                        self, "成功",
+                        f"モデルを読み込みました。\n"
+                        f"読み込み時間: {info.get('load_time', 0.0):.2f}秒（{info.get('load_kind', '')}）"
+                    )
                 
-            else:
+            elif not quiet:
                 QMessageBox.critical(self, "エラー", "モデルの読み込みに失敗しました。")
                 
         except Exception as e:
-            QMessageBox.critical(self, "エラー", f"モデル読み込み中にエラーが発生しました: {str(e)}")
+            if not quiet:
+                QMessageBox.critical(self, "エラー", f"モデル読み込み中にエラーが発生しました: {str(e)}")
+            else:
+                print(f"前回のモデル読み込みエラー: {e}")
 
     # ---------- TTS / そのほか（既存） ----------
-    def on_text_row_added(self, row_id, row_number):
-        self.tabbed_emotion_control.add_text_row(row_id, row_number)
+    def apply_model_styles(self):
+        """感情の選択肢をモデルのスタイルに合わせる"""
+        styles = self.tts_engine.get_available_styles()
+        self.script_editor.set_available_styles(styles)
+        self.emotion_control.set_available_styles(styles)
+        self.refresh_script_models()
+
+    def refresh_script_models(self):
+        """台本のモデル列の選択肢を履歴から作り直す"""
+        self.script_editor.set_available_models(
+            {m['id']: m.get('name') or m['id'] for m in self.model_manager.get_all_models()}
+        )
+
+    def on_current_row_changed(self, row_id):
+        """選択行が変わったらパネルをその行のパラメータに切り替える"""
+        self.emotion_control.set_row(row_id, self.script_editor.get_parameters(row_id))
+        self.waveform_view.set_pyramid(self.script_editor.get_waveform(row_id))
 
-    def on_text_row_removed(self, row_id):
-        self.tabbed_emotion_control.remove_text_row(row_id)
+    def lookup_waveform(self, text, model_id, parameters):
+        """行の波形ピラミッド（合成済みのものだけ。PCMは読まない）"""
+        if not model_id and not self.tts_engine.is_loaded:
+            return None
+        return self.tts_engine.get_waveform(text, model_id=model_id or None, **parameters)
 
-    def on_row_numbers_updated(self, row_mapping):
-        self.tabbed_emotion_control.update_tab_numbers(row_mapping)
+    def on_audio_rendered(self):
+        """合成後、波形列と選択行の波形表示を更新"""
+        self.script_editor.refresh_waveforms()
+        row_id = self.script_editor.current_row_id()
+        if row_id:
+            self.waveform_view.set_pyramid(self.script_editor.get_waveform(row_id))
 
     def on_parameters_changed(self, row_id, parameters):
-        """パラメータ変更時の処理（必要に応じて実装）"""
-        # 現在は何もしないが、将来的にリアルタイムプレビューなどに使用可能
-        pass
+        """パネルでの変更を台本に反映"""
+        if row_id:
+            self.script_editor.set_parameters(row_id, parameters)
+
+    def on_row_edited(self, row_id, *args):
+        """行の編集を先読みに知らせる（落ち着いたら合成される）"""
+        store = self.script_editor.store
+        row = store.index_of(row_id)
+        if row >= 0:
+            self.prefetcher.touch(row_id, store.text(row), store.parameters(row), store.model_id(row))
+
+    def on_row_parameters_changed(self, row_id, parameters):
+        """表での変更をパネルに反映（選択中の行のみ）"""
+        if row_id == self.emotion_control.row_id and parameters != self.emotion_control.get_current_parameters():
+            self.emotion_control.set_row(row_id, parameters)
 
     def load_last_model(self):
+        """前回のモデルの存在を非同期で確認し、揃っていれば読み込む"""
         models = self.model_manager.get_all_models()
         if not models:
             return
         last = models[0]  # 先頭が直近
-        if not self.model_manager.validate_model_files(last):
+        self.model_manager.validate_model_files_async(
+            last, lambda result: self.last_model_checked.emit(last, result)
+        )
+
+    def on_last_model_checked(self, last, available):
+        if available is not True:
             return
         paths = {
             "model_path": last["model_path"],
             "config_path": last["config_path"],
             "style_path": last["style_path"],
         }
-        success = self.tts_engine.load_model(
-            paths["model_path"], paths["config_path"], paths["style_path"]
-        )
-        if success:
-            self.sequential_play_btn.setEnabled(True)
-            self.save_individual_btn.setEnabled(True)
-            self.save_continuous_btn.setEnabled(True)
-            
-            # ウィンドウタイトル更新
-            model_name = Path(paths["model_path"]).parent.name
-            self.setWindowTitle(f"TTSスタジオ - {model_name}")
+        self.fingerprint_model(paths, quiet=True)
 
     def play_single_text(self, row_id, text, parameters):
         if not self.tts_engine.is_loaded:
             QMessageBox.warning(self, "エラー", "モデルが読み込まれていません。")
             return
-        tab_parameters = self.tabbed_emotion_control.get_parameters(row_id) or parameters
-        try:
-            sr, audio = self.tts_engine.synthesize(text, **tab_parameters)
-            import sounddevice as sd
-            sd.play(audio, sr, blocking=False)
-        except Exception as e:
-            QMessageBox.critical(self, "エラー", f"音声合成に失敗しました: {str(e)}")
+        # まだ始まっていない前の ▶ は捨てる（連打しても最後の行だけが鳴る）
+        self.play_token.cancel()
+        token = self.play_token = CancelToken()
+        model_id = self.script_editor.get_model_id(row_id)
+
+        def render():
+            with self.engine_pool.lease(model_id) as engine:
+                key = engine.synthesis_key(text, **parameters)
+                self.prefetcher.note_play(key, key in engine.synthesis_cache)
+                with self.prefetcher.foreground():
+                    sr, audio = engine.synthesize_cached(text, **parameters)
+                # リップシンク用の音素もここで（合成直後なのでフロントエンドキャッシュに当たる）
+                phonemes = engine.get_phonemes(text)
+            return phonemes, sr, audio
+
+        def done(future):
+            if future.cancelled():
+                return
+            try:
+                phonemes, sr, audio = future.result()
+            except Exception as e:
+                self.single_failed.emit(token, str(e))
+                return
+            self.single_rendered.emit(token, phonemes, sr, audio)
+
+        self.synth_queue.submit(render, priority=INTERACTIVE, token=token).add_done_callback(done)
+
+    def on_single_rendered(self, token, phonemes, sr, audio):
+        if token.cancelled:
+            return
+        self.live2d_widget.clear()
+        self.queue_playback(phonemes, audio, sr, interrupt=True)
+        self.on_audio_rendered()
+
+    def on_single_failed(self, token, message):
+        if not token.cancelled:
+            QMessageBox.critical(self, "エラー", f"音声合成に失敗しました: {message}")
+
+    def queue_playback(self, phonemes, audio, sr, interrupt=False):
+        """音声を再生キューに積み、同じ開始時刻にリップシンクの特徴量を並べる（音素は合成側で求めておく）"""
+        track = LipSyncTrack.from_audio(audio, sr, phonemes)
+        start = self.audio_engine.play(audio, sr) if interrupt else self.audio_engine.enqueue(audio, sr)
+        self.live2d_widget.timeline.add(start, track)
+        self.live2d_widget.start()
+
+    def resample(self, audio, sr, target_sr):
+        """サンプルレートが違うモデルの音声を連結できるよう線形補間で揃える"""
+        return resample(audio, sr, target_sr)
 
     def trim_silence(self, audio, sample_rate, threshold=0.01):
         """音声の末尾無音部分を削除"""
@@ -317,146 +623,191 @@ class TTSStudioMainWindow(QMainWindow):
             return audio
 
     def play_sequential(self):
-        """連続して再生（1→2→3の順で、各タブのパラメータ使用）"""
+        """連続して再生（1→2→3の順で、各行のパラメータ使用）"""
         if not self.tts_engine.is_loaded:
             QMessageBox.warning(self, "エラー", "モデルが読み込まれていません。")
             return
         
         # 全テキストを取得
-        texts_data = self.multi_text.get_all_texts_and_parameters()
+        texts_data = self.script_editor.get_all_texts_and_parameters()
         if not texts_data:
             QMessageBox.information(self, "情報", "再生するテキストがありません。")
             return
         
-        try:
-            # ボタンを一時無効化
-            self.sequential_play_btn.setEnabled(False)
-            self.sequential_play_btn.setText("再生中...")
-            
-            # 全ての音声を合成（各行の個別パラメータ使用）
-            all_audio = []
-            sample_rate = None
-            
-            for i, data in enumerate(texts_data, 1):
-                text = data['text']
-                row_id = data['row_id']
-                
-                # 対応するタブのパラメータを取得
-                tab_parameters = self.tabbed_emotion_control.get_parameters(row_id)
-                if not tab_parameters:
-                    # デフォルトパラメータ
-                    tab_parameters = {
-                        'style': 'Neutral', 'style_weight': 1.0,
-                        'length_scale': 0.85, 'pitch_scale': 1.0,
-                        'intonation_scale': 1.0, 'sdp_ratio': 0.25, 'noise': 0.35
-                    }
-                
-                sr, audio = self.tts_engine.synthesize(text, **tab_parameters)
-                
-                if sample_rate is None:
-                    sample_rate = sr
-                
-                all_audio.append(audio)
-            
-            # 音声を結合（末尾無音削除）
-            import numpy as np
-            
-            combined_audio = []
-            for i, audio in enumerate(all_audio):
-                # 音声データをfloat32に正規化
-                if audio.dtype != np.float32:
-                    audio = audio.astype(np.float32)
-                
-                # 音量を制限（クリッピング防止）
-                max_val = np.abs(audio).max()
-                if max_val > 0.8:
-                    audio = audio * (0.8 / max_val)
-                
-                # 末尾無音を削除
-                audio = self.trim_silence(audio, sample_rate)
-                
-                combined_audio.append(audio)
-            
-            final_audio = np.concatenate(combined_audio).astype(np.float32)
-            
-            # 最終的なクリッピング防止
-            max_final = np.abs(final_audio).max()
-            if max_final > 0.9:
-                final_audio = final_audio * (0.9 / max_final)
-            
-            # バックグラウンドで再生
-            import sounddevice as sd
-            sd.play(final_audio, sample_rate, blocking=False)
-            
-            # ボタンを元に戻す
-            self.sequential_play_btn.setEnabled(True)
-            self.sequential_play_btn.setText("連続して再生")
-            
-        except Exception as e:
-            self.sequential_play_btn.setEnabled(True)
-            self.sequential_play_btn.setText("連続して再生")
-            QMessageBox.critical(self, "エラー", f"連続再生に失敗しました: {str(e)}")
-    
+        self.audio_engine.stop()
+        self.live2d_widget.clear()
+        jobs = [(data['text'], data['parameters'], data['model_id']) for data in texts_data]
+
+        def run(job):
+            # 合成できた行から順に、前の行の直後へ隙間なく積んでいく（最初の行が揃えば鳴り始める）
+            with self.prefetcher.foreground():
+                for data, (sr, audio) in zip(texts_data, self.synth_scheduler.map(jobs, token=job.token)):
+                    job.check()
+                    # リップシンク用の音素もこのスレッドで求める（GUIスレッドで g2p やデーモンとの往復をしない）
+                    engine = self.engine_pool.peek(data['model_id']) or self.tts_engine
+                    self.segment_rendered.emit(engine.get_phonemes(data['text']),
+                                               self.prepare_segment(audio, sr), sr)
+                    job.advance(len(audio) / sr)
+
+        def finished(job):
+            if job.error is not None and not job.cancelled:
+                QMessageBox.critical(self, "エラー", f"連続再生に失敗しました: {str(job.error)}")
+
+        self.start_job("連続再生", texts_data, run, finished)
+
+    def prepare_segment(self, audio, sr):
+        """連続再生・連続保存用に、float32 に揃えて音量を制限し、末尾の無音を削る"""
+        import numpy as np
+
+        # 音声データをfloat32に正規化
+        if audio.dtype != np.float32:
+            audio = audio.astype(np.float32)
+
+        # 音量を制限（クリッピング防止）
+        max_val = np.abs(audio).max()
+        if max_val > 0.8:
+            audio = audio * (0.8 / max_val)
+
+        # 末尾無音を削除
+        return self.trim_silence(audio, sr)
+
+    # ---------- バックグラウンドジョブ ----------
+    def start_job(self, name, texts_data, run, finished):
+        """連続再生・書き出しを別スレッドで始める（同時に走らせるのは1つだけ）
+
+        finished(job) は終わったあとにGUIスレッドで呼ばれる。取り消されたときは job.cancelled が真。
+        """
+        if self.current_job is not None and not self.current_job.done:
+            QMessageBox.information(self, "情報", f"「{self.current_job.name}」の実行中です。")
+            return
+        self.job_finished_handler = finished
+        self.current_job = SynthesisJob(name, [data['text'] for data in texts_data], run,
+                                        on_progress=self.job_progress.emit, on_done=self.job_finished.emit)
+        for button in (self.sequential_play_btn, self.save_individual_btn, self.save_continuous_btn):
+            button.setEnabled(False)
+        self.job_progress_bar.setRange(0, len(texts_data))
+        self.job_progress_bar.setValue(0)
+        self.job_label.setText(f"{name}: 準備中...")
+        self.job_panel.show()
+        self.current_job.start()
+
+    def stop_playback(self):
+        """再生を止める（合成待ちの ▶ と連続再生のジョブも取り消す）"""
+        self.play_token.cancel()
+        if self.current_job is not None and self.current_job.name == "連続再生":
+            self.current_job.cancel()
+        self.audio_engine.stop()
+
+    def cancel_job(self):
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.job_label.setText(f"{self.current_job.name}: 中止しています...")
+
+    def on_job_progress(self, snapshot):
+        self.job_progress_bar.setValue(snapshot['done'])
+        text = f"{snapshot['name']}: {snapshot['done']} / {snapshot['total']} 行"
+        if snapshot['eta'] is not None:
+            text += f"（残り約 {snapshot['eta']:.0f} 秒・RTF {snapshot['rtf']:.2f}）"
+        self.job_label.setText(text)
+
+    def on_job_finished(self, job):
+        self.job_panel.hide()
+        for button in (self.sequential_play_btn, self.save_individual_btn, self.save_continuous_btn):
+            button.setEnabled(self.tts_engine.is_loaded)
+        self.on_audio_rendered()
+        handler, self.job_finished_handler = self.job_finished_handler, None
+        if handler:
+            handler(job)
+
+    def plan_export(self, texts_data, changed):
+        """書き出し前に、前回までの音声を使い回せる行と合成し直す行を数える
+
+        行ごとにディスク上の合成記録を見るので、GUIスレッドではなく書き出しジョブのスレッドで、合成を始める前に呼ぶ。
+        changed（前回から変更された行数）は台本から GUI スレッドで数えて渡す。
+        """
+        cache = self.tts_engine.synthesis_cache
+        plan = {
+            'changed': changed,
+            'reused': 0,
+            'rerendered': 0,
+            'saved_time': 0.0,
+        }
+        seen = set()
+        for data in texts_data:
+            key = self.tts_engine.synthesis_key(data['text'], model_id=data['model_id'] or None, **data['parameters'])
+            if key in seen:
+                continue
+            seen.add(key)
+            seconds = cache.render_seconds(key)
+            if seconds is None:
+                plan['rerendered'] += 1
+            else:
+                plan['reused'] += 1
+                plan['saved_time'] += seconds
+        return plan
+
+    def export_plan_text(self, plan):
+        """書き出し後の集計メッセージ（次回の比較用に版番号も記録する）"""
+        self.export_snapshot = self.script_editor.store.snapshot()
+        return (
+            f"前回から変更された行 {plan['changed']} 行 / 音声を再利用 {plan['reused']} 行 / "
+            f"合成し直し {plan['rerendered']} 行（節約 {plan['saved_time']:.1f}秒）"
+        )
+
     def save_individual(self):
         """個別保存（フォルダ内に個別ファイル）"""
         if not self.tts_engine.is_loaded:
             QMessageBox.warning(self, "エラー", "モデルが読み込まれていません。")
             return
         
-        texts_data = self.multi_text.get_all_texts_and_parameters()
+        texts_data = self.script_editor.get_all_texts_and_parameters()
         if not texts_data:
             QMessageBox.information(self, "情報", "保存するテキストがありません。")
             return
         
-        try:
-            import soundfile as sf
-            
-            # フォルダ選択
-            folder_path = QFileDialog.getExistingDirectory(
-                self,
-                "個別保存フォルダを選択"
+        # フォルダ選択
+        folder_path = QFileDialog.getExistingDirectory(
+            self,
+            "個別保存フォルダを選択"
+        )
+        if not folder_path:
+            return
+
+        # 各行を個別に保存（書き出し済みの行はマニフェストを見て飛ばす。中止しても次回は続きから）
+        changed = len(self.script_editor.store.changed_since(self.export_snapshot))
+        plan = {}
+        export = ExportJob(
+            folder_path, texts_data, self.tts_engine.synthesize_cached,
+            model_id=self.tts_engine.get_model_info().get('model_id'),
+            total=len(texts_data), scheduler=self.synth_scheduler
+        )
+
+        def run(job):
+            plan.update(self.plan_export(texts_data, changed))
+            with self.prefetcher.foreground():
+                return export.run(progress=lambda number, total, seconds: job.advance(seconds), token=job.token)
+
+        def finished(job):
+            if job.cancelled:
+                QMessageBox.information(
+                    self, "中止",
+                    f"個別保存を中止しました（{job.progress.done} / {job.progress.total} 行）。\n"
+                    f"書き出し済みの行は、次回同じフォルダに保存するときに飛ばされます。"
+                )
+                return
+            if job.error is not None:
+                QMessageBox.critical(self, "エラー", f"個別保存に失敗しました: {str(job.error)}")
+                return
+            summary = job.result
+            QMessageBox.information(
+                self, "完了",
+                f"個別ファイルを保存しました。\n保存先: {folder_path}\n"
+                f"合成 {summary['rendered']} 件 / 重複行の複製 {summary['deduplicated']} 件"
+                f"（重複率 {summary['dedup_ratio']:.0%}）/ 既存のためスキップ {summary['skipped']} 件\n"
+                f"{self.export_plan_text(plan)}"
             )
-            
-            if folder_path:
-                # 保存ボタンを一時無効化
-                self.save_individual_btn.setEnabled(False)
-                self.save_individual_btn.setText("保存中...")
-                
-                # 各行を個別に保存
-                for i, data in enumerate(texts_data, 1):
-                    text = data['text']
-                    row_id = data['row_id']
-                    
-                    # 対応するタブのパラメータを取得
-                    tab_parameters = self.tabbed_emotion_control.get_parameters(row_id)
-                    if not tab_parameters:
-                        tab_parameters = {
-                            'style': 'Neutral', 'style_weight': 1.0,
-                            'length_scale': 0.85, 'pitch_scale': 1.0,
-                            'intonation_scale': 1.0, 'sdp_ratio': 0.25, 'noise': 0.35
-                        }
-                    
-                    sr, audio = self.tts_engine.synthesize(text, **tab_parameters)
-                    
-                    # ファイル名生成
-                    safe_text = "".join(c for c in text[:20] if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                    if not safe_text:
-                        safe_text = f"text_{i}"
-                    filename = f"{i:02d}_{safe_text}.wav"
-                    file_path = os.path.join(folder_path, filename)
-                    
-                    sf.write(file_path, audio, sr)
-                
-                # ボタンを元に戻す
-                self.save_individual_btn.setEnabled(True)
-                self.save_individual_btn.setText("個別保存")
-                
-                QMessageBox.information(self, "完了", f"個別ファイルを保存しました。\n保存先: {folder_path}")
-                
-        except Exception as e:
-            self.save_individual_btn.setEnabled(True)
-            self.save_individual_btn.setText("個別保存")
-            QMessageBox.critical(self, "エラー", f"個別保存に失敗しました: {str(e)}")
+
+        self.start_job("個別保存", texts_data, run, finished)
     
     def save_continuous(self):
         """連続保存（1つのWAVファイルに統合）"""
@@ -464,86 +815,66 @@ class TTSStudioMainWindow(QMainWindow):
             QMessageBox.warning(self, "エラー", "モデルが読み込まれていません。")
             return
         
-        texts_data = self.multi_text.get_all_texts_and_parameters()
+        texts_data = self.script_editor.get_all_texts_and_parameters()
         if not texts_data:
             QMessageBox.information(self, "情報", "保存するテキストがありません。")
             return
         
-        try:
+        # ファイル保存先選択
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "連続音声ファイルを保存",
+            "continuous_output.wav",
+            "WAV files (*.wav);;All files (*.*)"
+        )
+        if not file_path:
+            return
+
+        changed = len(self.script_editor.store.changed_since(self.export_snapshot))
+        plan = {}
+        jobs = [(data['text'], data['parameters'], data['model_id']) for data in texts_data]
+
+        def run(job):
+            import io
             import soundfile as sf
             import numpy as np
-            
-            # ファイル保存先選択
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "連続音声ファイルを保存",
-                "continuous_output.wav",
-                "WAV files (*.wav);;All files (*.*)"
-            )
-            
-            if file_path:
-                # 保存ボタンを一時無効化
-                self.save_continuous_btn.setEnabled(False)
-                self.save_continuous_btn.setText("保存中...")
-                
-                # 全ての音声を合成
-                all_audio = []
-                sample_rate = None
-                
-                for i, data in enumerate(texts_data, 1):
-                    text = data['text']
-                    row_id = data['row_id']
-                    
-                    # 対応するタブのパラメータを取得
-                    tab_parameters = self.tabbed_emotion_control.get_parameters(row_id)
-                    if not tab_parameters:
-                        tab_parameters = {
-                            'style': 'Neutral', 'style_weight': 1.0,
-                            'length_scale': 0.85, 'pitch_scale': 1.0,
-                            'intonation_scale': 1.0, 'sdp_ratio': 0.25, 'noise': 0.35
-                        }
-                    
-                    sr, audio = self.tts_engine.synthesize(text, **tab_parameters)
-                    
+
+            plan.update(self.plan_export(texts_data, changed))
+
+            # 全ての音声を合成（末尾無音削除）
+            combined_audio = []
+            sample_rate = None
+            with self.prefetcher.foreground():
+                for sr, audio in self.synth_scheduler.map(jobs, token=job.token):
+                    job.check()
                     if sample_rate is None:
                         sample_rate = sr
-                    
-                    all_audio.append(audio)
-                
-                # 音声を結合（末尾無音削除）
-                combined_audio = []
-                for i, audio in enumerate(all_audio):
-                    # 音声データをfloat32に正規化
-                    if audio.dtype != np.float32:
-                        audio = audio.astype(np.float32)
-                    
-                    # 音量を制限（クリッピング防止）
-                    max_val = np.abs(audio).max()
-                    if max_val > 0.8:
-                        audio = audio * (0.8 / max_val)
-                    
-                    # 末尾無音を削除
-                    audio = self.trim_silence(audio, sample_rate)
-                    
-                    combined_audio.append(audio)
-                
-                final_audio = np.concatenate(combined_audio).astype(np.float32)
-                
-                # 最終的なクリッピング防止
-                max_final = np.abs(final_audio).max()
-                if max_final > 0.9:
-                    final_audio = final_audio * (0.9 / max_final)
-                
-                # ファイル保存
-                sf.write(file_path, final_audio, sample_rate)
-                
-                # ボタンを元に戻す
-                self.save_continuous_btn.setEnabled(True)
-                self.save_continuous_btn.setText("連続保存")
-                
-                QMessageBox.information(self, "完了", f"連続音声ファイルを保存しました。\n保存先: {file_path}")
-                
-        except Exception as e:
-            self.save_continuous_btn.setEnabled(True)
-            self.save_continuous_btn.setText("連続保存")
-            QMessageBox.critical(self, "エラー", f"連続保存に失敗しました: {str(e)}")
\ No newline at end of file
+                    combined_audio.append(self.prepare_segment(self.resample(audio, sr, sample_rate), sample_rate))
+                    job.advance(len(audio) / sr)
+
+            final_audio = np.concatenate(combined_audio).astype(np.float32)
+
+            # 最終的なクリッピング防止
+            max_final = np.abs(final_audio).max()
+            if max_final > 0.9:
+                final_audio = final_audio * (0.9 / max_final)
+
+            # ファイル保存（全行そろってから一時ファイル経由で置き換えるので、中止しても書きかけは残らない）
+            buf = io.BytesIO()
+            sf.write(buf, final_audio, sample_rate, format='WAV')
+            job.check()
+            atomic_write_bytes(file_path, buf.getvalue(), suffix=".wav")
+
+        def finished(job):
+            if job.cancelled:
+                QMessageBox.information(self, "中止", "連続保存を中止しました（ファイルは書き出していません）。")
+                return
+            if job.error is not None:
+                QMessageBox.critical(self, "エラー", f"連続保存に失敗しました: {str(job.error)}")
+                return
+            QMessageBox.information(
+                self, "完了",
+                f"連続音声ファイルを保存しました。\n保存先: {file_path}\n{self.export_plan_text(plan)}"
+            )
+
+        self.start_job("連続保存", texts_data, run, finished)
@@ -34,6 +34,11 @@ class ModelHistoryItem(QWidget):
         self.name_label.setStyleSheet("color:#333;")
         top.addWidget(self.name_label, 1)
 
+        # ファイルの存在確認結果（バックグラウンドで更新）
+        self.status_label = QLabel("確認中…")
+        self.status_label.setStyleSheet("color:#999; border:none; font-size:9pt;")
+        top.addWidget(self.status_label)
+
         edit_btn = QPushButton("✎")
         edit_btn.setFixedSize(28, 28)
         edit_btn.setToolTip("名前を編集")
@@ -96,13 +101,32 @@ class ModelHistoryItem(QWidget):
     def _on_note_edited(self, _):
         self._note_timer.start()
 
+    def set_availability(self, available):
+        """存在確認結果を表示（True: 利用可能 / False: 見つからない / None: 応答なし）"""
+        if available is True:
+            self.status_label.setText("✅ 利用可能")
+            self.status_label.setStyleSheet("color:#2e7d32; border:none; font-size:9pt;")
+        elif available is False:
+            self.status_label.setText("⚠ 見つかりません")
+            self.status_label.setStyleSheet("color:#d32f2f; border:none; font-size:9pt;")
+        else:
+            self.status_label.setText("⏳ 応答なし")
+            self.status_label.setStyleSheet("color:#f57c00; border:none; font-size:9pt;")
+
 class ModelHistoryWidget(QWidget):
     """モデル履歴表示（シンプル）"""
     model_selected = pyqtSignal(dict)  # 選択されたモデルデータ
+    # 存在確認の結果（ワーカースレッドからGUIスレッドへ渡す）
+    availability_checked = pyqtSignal(str, object)  # (model_id, True/False/None)
+    load_checked = pyqtSignal(str, object)          # (model_id, True/False/None)
 
     def __init__(self, model_manager, parent=None):
         super().__init__(parent)
         self.model_manager = model_manager
+        self.items = {}  # model_id -> ModelHistoryItem
+        self.availability = {}  # model_id -> True/False/None
+        self.availability_checked.connect(self.on_availability_checked)
+        self.load_checked.connect(self.on_load_checked)
         self._build()
         self.refresh_list()
 
@@ -140,6 +164,7 @@ class ModelHistoryWidget(QWidget):
 
     def refresh_list(self):
         self.list.clear()
+        self.items = {}
         models = self.model_manager.get_all_models()
         if not models:
             it = QListWidgetItem()
@@ -160,13 +185,58 @@ class ModelHistoryWidget(QWidget):
             it.setSizeHint(w.sizeHint())
             self.list.addItem(it)
             self.list.setItemWidget(it, w)
+            self.items[m['id']] = w
+            self._check_availability(m)
+
+    def _check_availability(self, m):
+        """存在確認を非同期で開始（キャッシュがあれば即表示）"""
+        cached = self.model_manager.cached_availability(m)
+        if cached is not None:
+            self.on_availability_checked(m['id'], cached)
+            return
+        model_id = m['id']
+        self.model_manager.validate_model_files_async(
+            m, lambda result: self._emit_safely(self.availability_checked, model_id, result)
+        )
+
+    def _emit_safely(self, signal, model_id, result):
+        # ダイアログが閉じた後に結果が届くことがある
+        try:
+            signal.emit(model_id, result)
+        except RuntimeError:
+            pass
+
+    def on_availability_checked(self, model_id, available):
+        self.availability[model_id] = available
+        item = self.items.get(model_id)
+        if item is not None:
+            item.set_availability(available)
 
     def load_model(self, model_id):
         m = self.model_manager.get_model_by_id(model_id)
-        if m:
+        if not m:
+            return
+        if self.availability.get(model_id) is True and self.model_manager.cached_availability(m) is True:
+            self.on_load_checked(model_id, True)
+            return
+        # 未確認・期限切れ・応答なしの場合は確認し直してから読み込む
+        self.model_manager.validate_model_files_async(
+            m, lambda result: self._emit_safely(self.load_checked, model_id, result)
+        )
+
+    def on_load_checked(self, model_id, available):
+        self.on_availability_checked(model_id, available)
+        m = self.model_manager.get_model_by_id(model_id)
+        if not m:
+            return
+        if available is True:
             # update_last_used は削除済みなので呼ばない
             self.model_selected.emit(m)
             self.refresh_list()
+        elif available is False:
+            QMessageBox.warning(self, "エラー", "モデルファイルが見つかりません。")
+        else:
+            QMessageBox.warning(self, "エラー", "モデルの保存先から応答がありません。")
 
     def edit_model_name(self, model_id):
         m = self.model_manager.get_model_by_id(model_id)
@@ -193,6 +263,5 @@ class ModelHistoryWidget(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.model_manager.models = []
-            self.model_manager.save_history(quiet=True)
+            self.model_manager.clear_history()
             self.refresh_list()
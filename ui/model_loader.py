@@ -1,21 +1,64 @@
 import os
 from pathlib import Path
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
-                            QLabel, QFileDialog, QGroupBox, QGridLayout)
-from PyQt6.QtCore import Qt, pyqtSignal
+                            QLabel, QFileDialog, QGroupBox, QGridLayout, QComboBox, QMessageBox)
+from PyQt6.QtCore import Qt, pyqtSignal, QThread
 from PyQt6.QtGui import QFont
 
+from core.model_scanner import scan_folder
+
+class LibraryScanThread(QThread):
+    """ライブラリ走査をバックグラウンドで実行"""
+    scan_finished = pyqtSignal(list)  # 見つかったモデル一覧
+    scan_failed = pyqtSignal(str)
+    
+    def __init__(self, scanner, root, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.root = root
+    
+    def run(self):
+        try:
+            self.scan_finished.emit(self.scanner.scan(self.root))
+        except Exception as e:
+            self.scan_failed.emit(str(e))
+
+class FolderCheckThread(QThread):
+    """選んだフォルダの必要ファイルの確認をバックグラウンドで実行（ネットワーク共有で固まらないように）"""
+    check_finished = pyqtSignal(str, list, bool, bool)  # (フォルダ, チェックポイント, config, style)
+
+    def __init__(self, folder_path, parent=None):
+        super().__init__(parent)
+        self.folder_path = folder_path
+
+    def run(self):
+        folder = Path(self.folder_path)
+        try:
+            checkpoints = [e['model_path'] for e in scan_folder(str(folder))]
+            if not checkpoints:
+                checkpoints = [str(p) for p in folder.glob("*.safetensors")]
+            config_found = (folder / "config.json").exists()
+            style_found = (folder / "style_vectors.npy").exists()
+        except OSError:
+            checkpoints, config_found, style_found = [], False, False
+        self.check_finished.emit(self.folder_path, checkpoints, config_found, style_found)
+
 class ModelLoaderDialog(QDialog):
     # モデル読み込み完了シグナル（パスを送信）
     model_loaded = pyqtSignal(dict)  # {model_path, config_path, style_path}
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, model_manager=None, scanner=None):
         super().__init__(parent)
+        self.model_manager = model_manager
+        self.scanner = scanner
+        self.scan_thread = None
+        self.check_thread = None
         self.model_paths = {
             'model': None,
             'config': None, 
             'style': None
         }
+        self.checkpoints = []  # フォルダ内の候補（新しい順）
         self.init_ui()
         
     def init_ui(self):
@@ -53,8 +96,16 @@ class ModelLoaderDialog(QDialog):
         self.select_folder_btn.setMinimumHeight(35)
         self.select_folder_btn.clicked.connect(self.select_folder)
         
+        # ライブラリ一括登録（スキャナがある場合のみ）
+        self.scan_library_btn = QPushButton("📚 ライブラリをスキャンして履歴に登録")
+        self.scan_library_btn.setMinimumHeight(30)
+        self.scan_library_btn.setToolTip("フォルダ以下のモデルをすべて検出し、履歴に追加します")
+        self.scan_library_btn.clicked.connect(self.scan_library)
+        self.scan_library_btn.setVisible(self.scanner is not None and self.model_manager is not None)
+        
         folder_layout.addWidget(self.folder_path_label)
         folder_layout.addWidget(self.select_folder_btn)
+        folder_layout.addWidget(self.scan_library_btn)
         layout.addWidget(folder_group)
         
         # ファイルチェック結果
@@ -93,6 +144,13 @@ class ModelLoaderDialog(QDialog):
             files_layout.addWidget(status_label, i, 1)
             files_layout.addWidget(path_label, i, 2)
         
+        # チェックポイント選択（複数ある場合）
+        self.checkpoint_combo = QComboBox()
+        self.checkpoint_combo.setToolTip("使用するチェックポイント")
+        self.checkpoint_combo.currentIndexChanged.connect(self.on_checkpoint_changed)
+        self.checkpoint_combo.setVisible(False)
+        files_layout.addWidget(self.checkpoint_combo, len(required_files), 0, 1, 3)
+        
         layout.addWidget(files_group)
         
         # ボタン
@@ -150,22 +208,42 @@ class ModelLoaderDialog(QDialog):
             self.check_files(folder_path)
     
     def check_files(self, folder_path):
-        """必要ファイルの存在をチェック"""
+        """必要ファイルの存在をチェック（別スレッドで確認し、終わったら表示を更新）"""
+        self.load_btn.setEnabled(False)
+        for key in self.file_checks:
+            self.file_checks[key]['status'].setText("確認中...")
+            self.file_checks[key]['status'].setStyleSheet("color: #666;")
+        self.check_thread = FolderCheckThread(folder_path, self)
+        self.check_thread.check_finished.connect(self.on_files_checked)
+        self.check_thread.start()
+
+    def on_files_checked(self, folder_path, checkpoints, config_found, style_found):
+        if self.check_thread is None or self.check_thread.folder_path != folder_path:
+            return  # 後から別のフォルダが選ばれた
+        self.check_thread = None
         folder = Path(folder_path)
         all_found = True
         
-        # モデルファイル (.safetensors)
-        model_files = list(folder.glob("*.safetensors"))
-        if model_files:
-            self.model_paths['model'] = str(model_files[0])
-            self.update_file_status('model', True, str(model_files[0]))
+        # モデルファイル (.safetensors)：チェックポイントが複数あれば新しい順に選択肢にする
+        self.checkpoints = checkpoints
+        self.checkpoint_combo.blockSignals(True)
+        self.checkpoint_combo.clear()
+        for path in self.checkpoints:
+            self.checkpoint_combo.addItem(Path(path).name, path)
+        self.checkpoint_combo.blockSignals(False)
+        self.checkpoint_combo.setVisible(len(self.checkpoints) > 1)
+        
+        if self.checkpoints:
+            self.model_paths['model'] = self.checkpoints[0]
+            self.update_file_status('model', True, self.checkpoints[0])
         else:
+            self.model_paths['model'] = None
             self.update_file_status('model', False, "見つかりません")
             all_found = False
         
         # config.json
         config_file = folder / "config.json"
-        if config_file.exists():
+        if config_found:
             self.model_paths['config'] = str(config_file)
             self.update_file_status('config', True, str(config_file))
         else:
@@ -174,7 +252,7 @@ class ModelLoaderDialog(QDialog):
             
         # style_vectors.npy
         style_file = folder / "style_vectors.npy"
-        if style_file.exists():
+        if style_found:
             self.model_paths['style'] = str(style_file)
             self.update_file_status('style', True, str(style_file))
         else:
@@ -183,6 +261,50 @@ class ModelLoaderDialog(QDialog):
         
         # 読み込みボタンの有効/無効
         self.load_btn.setEnabled(all_found)
+    
+    def on_checkpoint_changed(self, index):
+        """チェックポイント選択変更時"""
+        path = self.checkpoint_combo.itemData(index)
+        if path:
+            self.model_paths['model'] = path
+            self.update_file_status('model', True, path)
+    
+    def scan_library(self):
+        """ライブラリフォルダ以下のモデルを一括検出して履歴に登録"""
+        root = QFileDialog.getExistingDirectory(
+            self, 
+            "モデルライブラリのフォルダを選択",
+            "",
+            QFileDialog.Option.ShowDirsOnly
+        )
+        if not root or self.scan_thread is not None:
+            return
+        self.scan_library_btn.setEnabled(False)
+        self.scan_library_btn.setText("スキャン中...")
+        self.scan_thread = LibraryScanThread(self.scanner, root, self)
+        self.scan_thread.scan_finished.connect(self.on_library_scanned)
+        self.scan_thread.scan_failed.connect(self.on_library_scan_failed)
+        self.scan_thread.start()
+    
+    def on_library_scanned(self, entries):
+        """スキャン完了時：履歴に登録して結果を表示"""
+        self._finish_scan()
+        added = self.model_manager.import_models(entries)
+        stats = self.scanner.last_stats
+        QMessageBox.information(
+            self, "スキャン完了",
+            f"{len(entries)} 個のモデルが見つかりました（新規登録 {added} 件）。\n"
+            f"フォルダ {stats.get('folders', 0)} 件中 {stats.get('reused', 0)} 件はインデックスを再利用しました。"
+        )
+    
+    def on_library_scan_failed(self, message):
+        self._finish_scan()
+        QMessageBox.critical(self, "エラー", f"スキャンに失敗しました: {message}")
+    
+    def _finish_scan(self):
+        self.scan_thread = None
+        self.scan_library_btn.setEnabled(True)
+        self.scan_library_btn.setText("📚 ライブラリをスキャンして履歴に登録")
         
     def update_file_status(self, key, found, path):
         """ファイル状況表示を更新"""
@@ -0,0 +1,517 @@
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTableView,
+                            QHeaderView, QStyledItemDelegate, QComboBox, QDoubleSpinBox, QAbstractItemView)
+from PyQt6.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QFont
+
+from core.script_store import ScriptStore
+from .tabbed_emotion_control import STYLE_LABELS, DEFAULT_STYLES, PARAM_SPECS, STYLE_WEIGHT_RANGE
+from .waveform_view import WaveformDelegate
+
+# 列定義: (キー, 見出し)
+COLUMNS = [
+    ('play', ""),
+    ('text', "テキスト"),
+    ('model', "モデル"),
+    ('style', "感情"),
+    ('style_weight', "強度"),
+] + [(key, name) for name, key, *_ in PARAM_SPECS] + [
+    ('wave', "波形"),
+]
+
+COLUMN_KEYS = [key for key, _ in COLUMNS]
+
+# モデル列で「読み込み中のモデル」を表す表示
+CURRENT_MODEL_LABEL = "（読み込み中）"
+
+# 数値列の範囲
+PARAM_RANGES = {'style_weight': STYLE_WEIGHT_RANGE}
+PARAM_RANGES.update({key: (min_val, max_val) for _, key, min_val, max_val, *_ in PARAM_SPECS})
+
+
+class ScriptTableModel(QAbstractTableModel):
+    """ScriptStore を表示・編集するテーブルモデル（表示される行だけが描画される）"""
+
+    text_changed = pyqtSignal(str, str)         # row_id, text
+    parameters_changed = pyqtSignal(str, dict)  # row_id, parameters
+    model_changed = pyqtSignal(str, str)        # row_id, model_id
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store or ScriptStore()
+        self.styles = list(DEFAULT_STYLES)
+        self.models = {}  # model_id -> 表示名（ModelManager の履歴から）
+        self.waveform_lookup = None  # waveform_lookup(row) -> WaveformPyramid または None
+
+    def model_label(self, model_id):
+        if not model_id:
+            return CURRENT_MODEL_LABEL
+        return self.models.get(model_id, model_id[:8])
+
+    # ---------- Qt モデル ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section][1]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        key = COLUMN_KEYS[index.column()]
+        row = index.row()
+        if key == 'wave':
+            if role == Qt.ItemDataRole.ToolTipRole and self.waveform_lookup:
+                pyramid = self.waveform_lookup(row)
+                return f"{pyramid.duration:.2f} 秒" if pyramid else "未合成"
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            if key == 'play':
+                return "▶"
+            if key == 'text':
+                return self.store.text(row)
+            if key == 'model':
+                return self.model_label(self.store.model_id(row))
+            if key == 'style':
+                style = self.store.style(row)
+                return STYLE_LABELS.get(style, style)
+            return f"{self.store.value(row, key):.2f}"
+        if role == Qt.ItemDataRole.EditRole:
+            if key == 'text':
+                return self.store.text(row)
+            if key == 'model':
+                return self.store.model_id(row)
+            if key != 'play':
+                return self.store.value(row, key)
+        if role == Qt.ItemDataRole.TextAlignmentRole and key not in ('text', 'model', 'style'):
+            return Qt.AlignmentFlag.AlignCenter
+        if role == Qt.ItemDataRole.ToolTipRole and key == 'play':
+            return "この行を再生(R)"
+        return None
+
+    def flags(self, index):
+        base = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if COLUMN_KEYS[index.column()] not in ('play', 'wave'):
+            base |= Qt.ItemFlag.ItemIsEditable
+        return base
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        key = COLUMN_KEYS[index.column()]
+        row = index.row()
+        row_id = self.store.row_id_at(row)
+        if key == 'text':
+            text = str(value).strip()
+            if text == self.store.text(row):
+                return False
+            self.store.set_text(row, text)
+            self.dataChanged.emit(index, index)
+            wave = self.index(row, COLUMN_KEYS.index('wave'))
+            self.dataChanged.emit(wave, wave)
+            self.text_changed.emit(row_id, text)
+            return True
+        if key in ('play', 'wave'):
+            return False
+        if key == 'model':
+            model_id = str(value or "")
+            if model_id == self.store.model_id(row):
+                return False
+            self.store.set_model(row, model_id)
+            self.dataChanged.emit(index, self.index(row, len(COLUMNS) - 1))
+            self.model_changed.emit(row_id, model_id)
+            return True
+        if key != 'style':
+            low, high = PARAM_RANGES[key]
+            value = min(max(float(value), low), high)
+        self.store.set_value(row, key, value)
+        self.dataChanged.emit(index, self.index(row, len(COLUMNS) - 1))
+        self.parameters_changed.emit(row_id, self.store.parameters(row))
+        return True
+
+    # ---------- 行操作 ----------
+    def add_row(self, text="", parameters=None, position=None):
+        position = len(self.store) if position is None else position
+        self.beginInsertRows(QModelIndex(), position, position)
+        row_id = self.store.insert_row(position, text, parameters)
+        self.endInsertRows()
+        return row_id
+
+    def append_rows(self, rows, chunk_size=1000):
+        """行をまとめて末尾に追加（イテレータから chunk_size 行ずつ挿入）。追加行数を返す"""
+        added = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                added += self._insert_chunk(chunk)
+                chunk = []
+        if chunk:
+            added += self._insert_chunk(chunk)
+        return added
+
+    def _insert_chunk(self, chunk):
+        start = len(self.store)
+        self.beginInsertRows(QModelIndex(), start, start + len(chunk) - 1)
+        for row in chunk:
+            self.store.insert_row(None, row.get('text', ""), row.get('parameters'), model_id=row.get('model_id', ""))
+        self.endInsertRows()
+        return len(chunk)
+
+    def remove_row(self, row_id):
+        row = self.store.index_of(row_id)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.store.remove_row(row)
+        self.endRemoveRows()
+        return True
+
+    def set_parameters(self, row_id, parameters):
+        """行のパラメータをまとめて更新（パネルからの変更用）"""
+        row = self.store.index_of(row_id)
+        if row < 0:
+            return
+        self.store.set_parameters(row, parameters)
+        self.dataChanged.emit(self.index(row, COLUMN_KEYS.index('style')), self.index(row, len(COLUMNS) - 1))
+        self.parameters_changed.emit(row_id, self.store.parameters(row))
+
+    def clear(self):
+        self.beginResetModel()
+        self.store.clear()
+        self.endResetModel()
+
+
+class StyleDelegate(QStyledItemDelegate):
+    """感情列の編集用コンボボックス"""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        for style in self.model.styles:
+            combo.addItem(STYLE_LABELS.get(style, style), style)
+        return combo
+
+    def setEditorData(self, editor, index):
+        i = editor.findData(index.data(Qt.ItemDataRole.EditRole))
+        editor.setCurrentIndex(max(i, 0))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentData(), Qt.ItemDataRole.EditRole)
+
+
+class ModelDelegate(QStyledItemDelegate):
+    """モデル列の編集用コンボボックス（履歴のモデルから選ぶ）"""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        combo.addItem(CURRENT_MODEL_LABEL, "")
+        for model_id, name in self.model.models.items():
+            combo.addItem(name, model_id)
+        return combo
+
+    def setEditorData(self, editor, index):
+        model_id = index.data(Qt.ItemDataRole.EditRole)
+        i = editor.findData(model_id)
+        if i < 0:
+            editor.addItem(self.model.model_label(model_id), model_id)
+            i = editor.count() - 1
+        editor.setCurrentIndex(i)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentData(), Qt.ItemDataRole.EditRole)
+
+
+class ParamDelegate(QStyledItemDelegate):
+    """数値パラメータ列の編集用スピンボックス"""
+
+    def createEditor(self, parent, option, index):
+        key = COLUMN_KEYS[index.column()]
+        spin = QDoubleSpinBox(parent)
+        spin.setRange(*PARAM_RANGES[key])
+        spin.setSingleStep(0.01)
+        spin.setDecimals(2)
+        return spin
+
+    def setEditorData(self, editor, index):
+        editor.setValue(float(index.data(Qt.ItemDataRole.EditRole)))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), Qt.ItemDataRole.EditRole)
+
+
+class ScriptEditorWidget(QWidget):
+    """台本エディタ（モデル/ビュー方式。行数の上限なし）"""
+
+    play_single_requested = pyqtSignal(str, str, dict)  # row_id, text, parameters
+    current_row_changed = pyqtSignal(str)                # row_id
+    text_changed = pyqtSignal(str, str)                  # row_id, text
+    parameters_changed = pyqtSignal(str, dict)           # row_id, parameters
+    model_changed = pyqtSignal(str, str)                 # row_id, model_id
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = ScriptTableModel(parent=self)
+        self.model.text_changed.connect(self.text_changed)
+        self.model.parameters_changed.connect(self.parameters_changed)
+        self.model.model_changed.connect(self.model_changed)
+        self.init_ui()
+
+        # 初期行を1つ追加
+        self.add_row()
+
+    @property
+    def store(self):
+        return self.model.store
+
+    def init_ui(self):
+        """UIを初期化"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(5)
+
+        # ヘッダー
+        header_layout = QHBoxLayout()
+        header_label = QLabel("テキスト入力:")
+        header_label.setFont(QFont("", 10, QFont.Weight.Bold))
+        self.count_label = QLabel("")
+        self.count_label.setStyleSheet("color: #666;")
+        header_layout.addWidget(header_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.count_label)
+
+        # テーブル
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.view.setEditTriggers(
+            QAbstractItemView.EditTrigger.DoubleClicked
+            | QAbstractItemView.EditTrigger.EditKeyPressed
+            | QAbstractItemView.EditTrigger.SelectedClicked
+        )
+        self.view.setWordWrap(False)
+        self.view.setAlternatingRowColors(True)
+        # 行の高さを固定すると、行数に関係なくスクロール位置を計算できる
+        vheader = self.view.verticalHeader()
+        vheader.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vheader.setDefaultSectionSize(28)
+        hheader = self.view.horizontalHeader()
+        hheader.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        hheader.setSectionResizeMode(COLUMN_KEYS.index('text'), QHeaderView.ResizeMode.Stretch)
+        self.view.setColumnWidth(COLUMN_KEYS.index('play'), 32)
+        self.view.setColumnWidth(COLUMN_KEYS.index('model'), 120)
+        self.view.setColumnWidth(COLUMN_KEYS.index('style'), 120)
+        for key in PARAM_RANGES:
+            self.view.setColumnWidth(COLUMN_KEYS.index(key), 60)
+        self.view.setColumnWidth(COLUMN_KEYS.index('wave'), 140)
+        self.view.setStyleSheet("""
+            QTableView {
+                border: 1px solid #ccc;
+                border-radius: 4px;
+                font-size: 12px;
+                gridline-color: #eee;
+            }
+            QTableView::item:selected {
+                background-color: #e3f2fd;
+                color: #1976d2;
+            }
+        """)
+
+        self.style_delegate = StyleDelegate(self.model, self.view)
+        self.model_delegate = ModelDelegate(self.model, self.view)
+        self.param_delegate = ParamDelegate(self.view)
+        self.view.setItemDelegateForColumn(COLUMN_KEYS.index('style'), self.style_delegate)
+        self.view.setItemDelegateForColumn(COLUMN_KEYS.index('model'), self.model_delegate)
+        for key in PARAM_RANGES:
+            self.view.setItemDelegateForColumn(COLUMN_KEYS.index(key), self.param_delegate)
+        self.wave_delegate = WaveformDelegate(self.waveform_at, self.view)
+        self.view.setItemDelegateForColumn(COLUMN_KEYS.index('wave'), self.wave_delegate)
+
+        self.view.clicked.connect(self.on_cell_clicked)
+        self.view.selectionModel().currentRowChanged.connect(self.on_current_row_changed)
+        self.model.rowsInserted.connect(self.update_count)
+        self.model.rowsRemoved.connect(self.update_count)
+        self.model.modelReset.connect(self.update_count)
+
+        # ボタン
+        buttons = QHBoxLayout()
+        add_btn = QPushButton("➕ テキスト行を追加(N)")
+        add_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2196f3;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px;
+                font-size: 12px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #1976d2;
+            }
+        """)
+        add_btn.clicked.connect(lambda: self.add_row())
+
+        delete_btn = QPushButton("× 選択行を削除")
+        delete_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #f44336;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px;
+                font-size: 12px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #d32f2f;
+            }
+        """)
+        delete_btn.clicked.connect(self.delete_current_row)
+
+        buttons.addWidget(add_btn, 1)
+        buttons.addWidget(delete_btn)
+
+        layout.addLayout(header_layout)
+        layout.addWidget(self.view, 1)
+        layout.addLayout(buttons)
+
+    # ---------- 行操作 ----------
+    def add_row(self, text="", parameters=None):
+        """行を追加して選択する"""
+        row_id = self.model.add_row(text, parameters)
+        self.focus_row(len(self.store) - 1, edit=False)
+        return row_id
+
+    def import_rows(self, rows):
+        """台本の行を取り込む（空の1行だけなら置き換える）。取り込んだ行数を返す"""
+        replace_empty = len(self.store) == 1 and not self.store.text(0)
+        added = self.model.append_rows(rows)
+        if replace_empty and added:
+            self.model.remove_row(self.store.row_id_at(0))
+        if added:
+            self.focus_row(0, edit=False)
+        return added
+
+    def delete_row(self, row_id):
+        """行を削除（最低1行は残す）"""
+        if len(self.store) <= 1:
+            return
+        self.model.remove_row(row_id)
+
+    def delete_current_row(self):
+        row_id = self.current_row_id()
+        if row_id:
+            self.delete_row(row_id)
+
+    def clear_all_rows(self):
+        """全行をクリア（空の1行だけ残す）"""
+        self.model.clear()
+        self.add_row()
+
+    def focus_row(self, row, edit=True):
+        """指定行（0始まり）を選択し、必要ならテキストの編集を開始"""
+        if not 0 <= row < len(self.store):
+            return
+        index = self.model.index(row, COLUMN_KEYS.index('text'))
+        self.view.setCurrentIndex(index)
+        self.view.scrollTo(index)
+        if edit:
+            self.view.setFocus()
+            self.view.edit(index)
+
+    def current_row_id(self):
+        index = self.view.currentIndex()
+        if not index.isValid():
+            return None
+        return self.store.row_id_at(index.row())
+
+    def update_count(self, *args):
+        self.count_label.setText(f"{len(self.store)} 行")
+
+    # ---------- パラメータ ----------
+    def set_available_styles(self, styles):
+        self.model.styles = list(styles or DEFAULT_STYLES)
+
+    def set_available_models(self, models):
+        """モデル列の選択肢を設定（models: {model_id: 表示名}）"""
+        self.model.models = dict(models)
+        column = COLUMN_KEYS.index('model')
+        if len(self.store):
+            self.model.dataChanged.emit(self.model.index(0, column), self.model.index(len(self.store) - 1, column))
+
+    # ---------- 波形 ----------
+    def set_waveform_lookup(self, lookup):
+        """lookup(text, model_id, parameters) -> WaveformPyramid または None"""
+        self.model.waveform_lookup = (
+            lambda row: lookup(self.store.text(row), self.store.model_id(row), self.store.parameters(row))
+            if self.store.text(row) else None
+        )
+
+    def waveform_at(self, row):
+        return self.model.waveform_lookup(row) if self.model.waveform_lookup else None
+
+    def get_waveform(self, row_id):
+        row = self.store.index_of(row_id)
+        return self.waveform_at(row) if row >= 0 else None
+
+    def refresh_waveforms(self):
+        """合成後に波形列を描き直す（見えている行だけが再描画される）"""
+        column = COLUMN_KEYS.index('wave')
+        if len(self.store):
+            self.model.dataChanged.emit(self.model.index(0, column), self.model.index(len(self.store) - 1, column))
+
+    def get_model_id(self, row_id):
+        """指定行のモデルID（空文字は読み込み中のモデル）"""
+        row = self.store.index_of(row_id)
+        return self.store.model_id(row) if row >= 0 else ""
+
+    def get_parameters(self, row_id):
+        """指定行のパラメータを取得"""
+        row = self.store.index_of(row_id)
+        return self.store.parameters(row) if row >= 0 else {}
+
+    def set_parameters(self, row_id, parameters):
+        self.model.set_parameters(row_id, parameters)
+
+    # ---------- 再生・取得 ----------
+    def on_cell_clicked(self, index):
+        if COLUMN_KEYS[index.column()] == 'play':
+            self.play_row(self.store.row_id_at(index.row()))
+
+    def on_current_row_changed(self, current, previous):
+        if current.isValid():
+            self.current_row_changed.emit(self.store.row_id_at(current.row()))
+
+    def play_row(self, row_id):
+        """単一行を再生"""
+        row = self.store.index_of(row_id)
+        if row < 0:
+            return
+        text = self.store.text(row)
+        if text:
+            self.play_single_requested.emit(row_id, text, self.store.parameters(row))
+
+    def play_current_row(self):
+        row_id = self.current_row_id()
+        if row_id:
+            self.play_row(row_id)
+
+    def get_all_texts_and_parameters(self):
+        """全てのテキストとパラメータを取得（空行は除く）"""
+        return [row for row in self.store.rows() if row['text']]
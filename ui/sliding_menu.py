@@ -9,13 +9,14 @@ class SlidingMenuWidget(QFrame):
     # シグナル定義
     load_model_clicked = pyqtSignal()
     load_from_history_clicked = pyqtSignal()
+    import_script_clicked = pyqtSignal()
     menu_closed = pyqtSignal()
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_widget = parent
         self.is_visible = False
-        self.target_height = 120  # 展開時の高さ
+        self.target_height = 170  # 展開時の高さ
         
         self.init_ui()
         self.setup_animation()
@@ -64,15 +65,26 @@ class SlidingMenuWidget(QFrame):
         self.load_history_btn.setToolTip("過去に読み込んだモデルから選択")
         self.load_history_btn.clicked.connect(self.on_load_from_history_clicked)
         
+        self.import_script_btn = QPushButton("📄 台本を読み込み")
+        self.import_script_btn.setToolTip("CSV / TSV / JSONL の台本を取り込む")
+        self.import_script_btn.clicked.connect(self.on_import_script_clicked)
+        
         # セパレーター
         separator = QFrame()
         separator.setFrameShape(QFrame.Shape.HLine)
         separator.setFrameShadow(QFrame.Shadow.Sunken)
         separator.setStyleSheet("color: #eee; margin: 0px 10px;")
         
+        separator2 = QFrame()
+        separator2.setFrameShape(QFrame.Shape.HLine)
+        separator2.setFrameShadow(QFrame.Shadow.Sunken)
+        separator2.setStyleSheet("color: #eee; margin: 0px 10px;")
+        
         layout.addWidget(self.load_model_btn)
         layout.addWidget(separator)
         layout.addWidget(self.load_history_btn)
+        layout.addWidget(separator2)
+        layout.addWidget(self.import_script_btn)
         layout.addStretch()
         
     def setup_animation(self):
@@ -146,6 +158,11 @@ class SlidingMenuWidget(QFrame):
         self.hide_menu()
         self.load_from_history_clicked.emit()
     
+    def on_import_script_clicked(self):
+        """台本読み込みボタンクリック"""
+        self.hide_menu()
+        self.import_script_clicked.emit()
+    
     def mousePressEvent(self, event):
         """マウスクリックイベント（メニュー内クリックは伝播させない）"""
         event.accept()  # イベントを消費してバブリングを停止
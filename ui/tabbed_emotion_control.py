@@ -1,26 +1,46 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider, 
-                            QComboBox, QDoubleSpinBox, QGroupBox, QGridLayout, QPushButton, QTabWidget)
+                            QComboBox, QDoubleSpinBox, QGroupBox, QGridLayout, QPushButton)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 
+from core.script_store import DEFAULT_PARAMETERS
+
+# 既知のスタイル名の表示ラベル（未知のスタイルはそのまま表示）
+STYLE_LABELS = {
+    "Neutral": "😐 ニュートラル",
+    "Happy": "😊 喜び",
+    "Sad": "😢 悲しみ",
+    "Angry": "😠 怒り",
+    "Fear": "😰 恐怖",
+    "Disgust": "😖 嫌悪",
+    "Surprise": "😲 驚き",
+}
+
+DEFAULT_STYLES = list(STYLE_LABELS)
+
+# 音声パラメータ定義: (表示名, キー, 最小, 最大, 既定, 説明)
+PARAM_SPECS = [
+    ("話速", "length_scale", 0.3, 1.8, 0.85, "超速い ← → 超遅い"),
+    ("ピッチ", "pitch_scale", 0.5, 1.5, 1.0, "低音 ← → 高音"),
+    ("抑揚", "intonation_scale", 0.5, 1.5, 1.0, "平坦 ← → 抑揚"),
+    ("SDP比率", "sdp_ratio", 0.0, 0.8, 0.25, "単調 ← → 変化"),
+    ("ノイズ", "noise", 0.0, 1.0, 0.35, "クリア ← → 自然")
+]
+
+# 感情強度の範囲
+STYLE_WEIGHT_RANGE = (0.0, 2.0)
+
 class SingleEmotionControl(QWidget):
     """単一行の感情制御ウィジェット"""
     
     parameters_changed = pyqtSignal(str, dict)  # row_id, parameters
     
-    def __init__(self, row_id, parameters=None, parent=None):
+    def __init__(self, row_id, parameters=None, styles=None, parent=None):
         super().__init__(parent)
         
         self.row_id = row_id
-        self.current_params = parameters or {
-            'style': 'Neutral',
-            'style_weight': 1.0,
-            'length_scale': 0.85,
-            'pitch_scale': 1.0,
-            'intonation_scale': 1.0,
-            'sdp_ratio': 0.25,
-            'noise': 0.35
-        }
+        self.styles = list(styles or DEFAULT_STYLES)
+        self.current_params = parameters or dict(DEFAULT_PARAMETERS)
         
         self.init_ui()
         self.load_parameters()
@@ -74,18 +94,7 @@ class SingleEmotionControl(QWidget):
         
         self.emotion_combo = QComboBox()
         self.emotion_combo.setToolTip("感情選択(E)")
-        emotions = [
-            ("Neutral", "😐 ニュートラル"),
-            ("Happy", "😊 喜び"),
-            ("Sad", "😢 悲しみ"), 
-            ("Angry", "😠 怒り"),
-            ("Fear", "😰 恐怖"),
-            ("Disgust", "😖 嫌悪"),
-            ("Surprise", "😲 驚き")
-        ]
-        
-        for value, display in emotions:
-            self.emotion_combo.addItem(display, value)
+        self.populate_styles()
         
         self.emotion_combo.currentTextChanged.connect(self.on_emotion_changed)
         
@@ -98,7 +107,7 @@ class SingleEmotionControl(QWidget):
         intensity_label.setMinimumWidth(80)
         
         self.intensity_slider = QSlider(Qt.Orientation.Horizontal)
-        self.intensity_slider.setRange(0, 200)
+        self.intensity_slider.setRange(int(STYLE_WEIGHT_RANGE[0] * 100), int(STYLE_WEIGHT_RANGE[1] * 100))
         self.intensity_slider.setValue(100)
         self.intensity_slider.setStyleSheet("""
             QSlider::groove:horizontal {
@@ -127,7 +136,7 @@ class SingleEmotionControl(QWidget):
         self.intensity_slider.valueChanged.connect(self.on_intensity_slider_changed)
         
         self.intensity_spinbox = QDoubleSpinBox()
-        self.intensity_spinbox.setRange(0.0, 2.0)
+        self.intensity_spinbox.setRange(*STYLE_WEIGHT_RANGE)
         self.intensity_spinbox.setSingleStep(0.1)
         self.intensity_spinbox.setValue(1.0)
         self.intensity_spinbox.setDecimals(2)
@@ -165,19 +174,10 @@ class SingleEmotionControl(QWidget):
         layout = QGridLayout(group)
         layout.setSpacing(8)
         
-        # パラメータ定義
-        params = [
-            ("話速", "length_scale", 0.3, 1.8, 0.85, "超速い ← → 超遅い"),
-            ("ピッチ", "pitch_scale", 0.5, 1.5, 1.0, "低音 ← → 高音"),
-            ("抑揚", "intonation_scale", 0.5, 1.5, 1.0, "平坦 ← → 抑揚"),
-            ("SDP比率", "sdp_ratio", 0.0, 0.8, 0.25, "単調 ← → 変化"),
-            ("ノイズ", "noise", 0.0, 1.0, 0.35, "クリア ← → 自然")
-        ]
-        
         self.param_sliders = {}
         self.param_spinboxes = {}
         
-        for i, (name, key, min_val, max_val, default, desc) in enumerate(params):
+        for i, (name, key, min_val, max_val, default, desc) in enumerate(PARAM_SPECS):
             label = QLabel(name + ":")
             label.setMinimumWidth(80)
             
@@ -276,6 +276,20 @@ class SingleEmotionControl(QWidget):
         
         return group
     
+    def populate_styles(self):
+        """スタイル一覧でコンボボックスを作り直す"""
+        self.emotion_combo.blockSignals(True)
+        self.emotion_combo.clear()
+        for value in self.styles:
+            self.emotion_combo.addItem(STYLE_LABELS.get(value, value), value)
+        self.emotion_combo.blockSignals(False)
+
+    def set_available_styles(self, styles):
+        """モデルのスタイル一覧を反映（現在のスタイルが無ければ先頭に切り替え）"""
+        self.styles = list(styles or DEFAULT_STYLES)
+        self.populate_styles()
+        self.load_parameters()
+
     def on_emotion_changed(self, text):
         """感情変更時の処理"""
         current_data = self.emotion_combo.currentData()
@@ -337,11 +351,13 @@ class SingleEmotionControl(QWidget):
         """現在のパラメータでUIを更新"""
         self.blockSignals(True)
         
-        # 感情
-        for i in range(self.emotion_combo.count()):
-            if self.emotion_combo.itemData(i) == self.current_params['style']:
-                self.emotion_combo.setCurrentIndex(i)
-                break
+        # 感情（モデルに無いスタイルは先頭のスタイルに置き換える）
+        index = self.emotion_combo.findData(self.current_params['style'])
+        if index == -1 and self.emotion_combo.count():
+            index = 0
+            self.current_params['style'] = self.emotion_combo.itemData(0)
+        if index != -1:
+            self.emotion_combo.setCurrentIndex(index)
         
         # 感情強度
         style_weight = self.current_params['style_weight']
@@ -364,86 +380,9 @@ class SingleEmotionControl(QWidget):
         """現在のパラメータを取得"""
         return self.current_params.copy()
 
-class TabbedEmotionControl(QWidget):
-    """タブ式感情制御ウィジェット"""
-    
-    parameters_changed = pyqtSignal(str, dict)  # row_id, parameters
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.emotion_controls = {}  # row_id -> SingleEmotionControl
-        self.init_ui()
-        
-    def init_ui(self):
-        """UIを初期化"""
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        
-        # タブウィジェット（ヘッダーなし）
-        self.tab_widget = QTabWidget()
-        self.tab_widget.setStyleSheet("""
-            QTabWidget::pane {
-                border: 1px solid #ccc;
-                border-radius: 4px;
-                background-color: white;
-            }
-            QTabBar::tab {
-                background-color: #f5f5f5;
-                border: 1px solid #ccc;
-                border-bottom: none;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-                padding: 6px 12px;
-                margin-right: 2px;
-            }
-            QTabBar::tab:selected {
-                background-color: white;
-                border-bottom: 1px solid white;
-            }
-            QTabBar::tab:hover:!selected {
-                background-color: #e3f2fd;
-            }
-        """)
-        
-        layout.addWidget(self.tab_widget)
-    
-    def add_text_row(self, row_id, row_number, parameters=None):
-        """テキスト行に対応するタブを追加"""
-        if row_id not in self.emotion_controls:
-            control = SingleEmotionControl(row_id, parameters)
-            control.parameters_changed.connect(self.parameters_changed)
-            
-            self.emotion_controls[row_id] = control
-            self.tab_widget.addTab(control, str(row_number))
-    
-    def remove_text_row(self, row_id):
-        """テキスト行に対応するタブを削除"""
-        if row_id in self.emotion_controls:
-            control = self.emotion_controls[row_id]
-            index = self.tab_widget.indexOf(control)
-            if index != -1:
-                self.tab_widget.removeTab(index)
-            del self.emotion_controls[row_id]
-    
-    def update_tab_numbers(self, row_mapping):
-        """タブ番号を更新 {row_id: row_number}"""
-        for row_id, row_number in row_mapping.items():
-            if row_id in self.emotion_controls:
-                control = self.emotion_controls[row_id]
-                index = self.tab_widget.indexOf(control)
-                if index != -1:
-                    self.tab_widget.setTabText(index, str(row_number))
-    
-    def get_parameters(self, row_id):
-        """指定行のパラメータを取得"""
-        if row_id in self.emotion_controls:
-            return self.emotion_controls[row_id].get_current_parameters()
-        return {}
-    
-    def set_current_row(self, row_id):
-        """指定行のタブをアクティブに"""
-        if row_id in self.emotion_controls:
-            control = self.emotion_controls[row_id]
-            index = self.tab_widget.indexOf(control)
-            if index != -1:
-                self.tab_widget.setCurrentIndex(index)
\ No newline at end of file
+    def set_row(self, row_id, parameters):
+        """編集対象の行を切り替える（シグナルは送信しない）"""
+        self.row_id = row_id
+        self.current_params = dict(DEFAULT_PARAMETERS)
+        self.current_params.update(parameters)
+        self.load_parameters()
@@ -0,0 +1,101 @@
+import numpy as np
+from PyQt6.QtWidgets import QWidget, QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QLineF, QRectF
+from PyQt6.QtGui import QPainter, QColor, QPen
+
+
+def draw_peaks(painter, rect, pyramid, start=0.0, end=None, color="#1976d2"):
+    """rect の幅のピクセル数だけ (min, max) を引いて縦線で描く"""
+    width = int(rect.width())
+    if width <= 0:
+        return
+    mins, maxs = pyramid.peaks(width, start, end)
+    mid = rect.center().y()
+    half = rect.height() / 2
+    ys_top = mid - np.clip(maxs, -1.0, 1.0) * half
+    ys_bottom = mid - np.clip(mins, -1.0, 1.0) * half
+    left = rect.left()
+    painter.setPen(QPen(QColor(color), 1))
+    painter.drawLines([QLineF(left + x, ys_top[x], left + x, ys_bottom[x]) for x in range(len(mins))])
+
+
+class WaveformDelegate(QStyledItemDelegate):
+    """台本の波形列（行ごとの全体表示）"""
+
+    def __init__(self, lookup, parent=None):
+        super().__init__(parent)
+        self.lookup = lookup  # lookup(row) -> WaveformPyramid または None
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, QColor("#e3f2fd"))
+        pyramid = self.lookup(index.row()) if self.lookup else None
+        if pyramid is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        draw_peaks(painter, QRectF(option.rect).adjusted(2, 3, -2, -3), pyramid)
+        painter.restore()
+
+
+class WaveformView(QWidget):
+    """選択中の行の波形（ホイールで拡大縮小、ドラッグで移動）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pyramid = None
+        self.start = 0.0
+        self.end = 0.0
+        self._drag_x = None
+        self.setMinimumHeight(60)
+        self.setMaximumHeight(80)
+
+    def set_pyramid(self, pyramid):
+        self.pyramid = pyramid
+        self.start = 0.0
+        self.end = pyramid.duration if pyramid else 0.0
+        self.update()
+
+    def wheelEvent(self, event):
+        if not self.pyramid:
+            return
+        span = self.end - self.start
+        # カーソル位置を中心に拡大縮小（最小 10ms まで）
+        anchor = self.start + span * event.position().x() / max(self.width(), 1)
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        span = min(max(span * factor, 0.01), self.pyramid.duration)
+        ratio = (anchor - self.start) / (self.end - self.start) if self.end > self.start else 0.0
+        self._set_window(anchor - span * ratio, span)
+
+    def mousePressEvent(self, event):
+        self._drag_x = event.position().x()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None or not self.pyramid:
+            return
+        span = self.end - self.start
+        dx = event.position().x() - self._drag_x
+        self._drag_x = event.position().x()
+        self._set_window(self.start - dx * span / max(self.width(), 1), span)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+    def _set_window(self, start, span):
+        start = min(max(start, 0.0), self.pyramid.duration - span)
+        self.start, self.end = start, start + span
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#ffffff"))
+        painter.setPen(QColor("#dee2e6"))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+        if not self.pyramid:
+            painter.setPen(QColor("#999"))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "再生・保存すると波形が表示されます")
+            return
+        draw_peaks(painter, QRectF(self.rect()).adjusted(1, 4, -1, -4), self.pyramid, self.start, self.end)
+        painter.setPen(QColor("#666"))
+        painter.drawText(self.rect().adjusted(6, 2, -6, -2), Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop,
+                         f"{self.start:.2f}〜{self.end:.2f} 秒")
@@ -0,0 +1,97 @@
+import os
+import json
+import tempfile
+
+
+def atomic_write_bytes(path, data, suffix=".tmp", mode=None):
+    """バイト列を一時ファイル経由で書き込み、os.replace で置き換える（途中で落ちても壊れない）
+
+    mode を渡すとその権限で作る（鍵などを他のユーザーに読ませないとき 0o600）。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp は 0600 で作るので、既存ファイルの権限を引き継ぐ
+        if mode is None:
+            mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path, data, indent=None, mode=None):
+    """JSONを一時ファイル経由で書き込み、os.replace で置き換える（途中で落ちても壊れない）"""
+    text = json.dumps(data, ensure_ascii=False, indent=indent)
+    atomic_write_bytes(path, text.encode('utf-8'), suffix=".json", mode=mode)
+
+
+def read_json(path, default=None):
+    """JSONを読み込む。存在しない・壊れている場合は default を返す"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def sampled_file_hash(path, sample_size=1024 * 1024):
+    """ファイルサイズと先頭・中央・末尾のサンプルから高速なハッシュを作る
+
+    大きな重みファイルでも読み込むのは最大 3 * sample_size バイトのみ。
+    """
+    import hashlib
+
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, 'rb') as f:
+        if size <= sample_size * 3:
+            h.update(f.read())
+        else:
+            for offset in (0, size // 2 - sample_size // 2, size - sample_size):
+                f.seek(offset)
+                h.update(f.read(sample_size))
+    return h.hexdigest()
+
+
+def file_signature(path):
+    """ファイルの stat 情報 [サイズ, 更新時刻(ns)]。内容ハッシュの再計算要否の判定に使う"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def content_fingerprint(paths, length=12):
+    """複数ファイルの内容から指紋（16進文字列）を作る"""
+    import hashlib
+
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        h.update(sampled_file_hash(path).encode())
+    return h.hexdigest()[:length]
+
+
+def is_remote_path(path):
+    """ネットワーク上のパス（UNC・ネットワークドライブ）かどうか"""
+    path = str(path)
+    if path.startswith("\\\\") or path.startswith("//"):
+        return True
+    if os.name == "nt":
+        drive = os.path.splitdrive(os.path.abspath(path))[0]
+        if drive:
+            try:
+                import ctypes
+                DRIVE_REMOTE = 4
+                return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
+            except Exception:
+                return False
+    return False